@@ -0,0 +1,176 @@
+"""
+Registry of base model engines and a common evaluation run
+
+The base model under the RL layer is chosen by name (AMICOOKED_BASE_ENGINE,
+or per /retrain request). Every engine is trained and measured on the same
+train/test split so the speed/accuracy tradeoff can be picked per deployment:
+
+    python api/base_engines.py
+    python api/base_engines.py --engines gbr hist_gbr --dataset big.csv --output engines.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from sklearn.base import RegressorMixin
+from sklearn.ensemble import GradientBoostingRegressor, HistGradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import Ridge
+
+
+@dataclass
+class BaseEngine:
+    """A base model type that can be trained under the RL layer"""
+    name: str
+    description: str
+    factory: Callable[[], RegressorMixin]
+    # Parameter counting boosting stages, for warm-started incremental updates (None: not supported)
+    stages_param: Optional[str] = None
+
+    def create(self) -> RegressorMixin:
+        return self.factory()
+
+
+ENGINES: Dict[str, BaseEngine] = {}
+
+
+def register_engine(engine: BaseEngine):
+    ENGINES[engine.name] = engine
+
+
+def get_engine(name: str) -> BaseEngine:
+    """Registered engine by name (ValueError if unknown)"""
+    engine = ENGINES.get(name)
+    if engine is None:
+        raise ValueError(f"Unknown base engine '{name}' (available: {', '.join(sorted(ENGINES))})")
+    return engine
+
+
+register_engine(BaseEngine(
+    name="gbr",
+    description="Gradient Boosting Regressor (exact splits; the original engine)",
+    factory=lambda: GradientBoostingRegressor(
+        n_estimators=100,
+        learning_rate=0.1,
+        max_depth=5,
+        random_state=42,
+        subsample=0.8,
+    ),
+    stages_param="n_estimators",
+))
+register_engine(BaseEngine(
+    name="hist_gbr",
+    description="Histogram Gradient Boosting (binned features; trains fast on large datasets)",
+    factory=lambda: HistGradientBoostingRegressor(
+        max_iter=100,
+        learning_rate=0.1,
+        max_depth=5,
+        early_stopping=False,
+        random_state=42,
+    ),
+    stages_param="max_iter",
+))
+register_engine(BaseEngine(
+    name="random_forest",
+    description="Random Forest (averaged independent trees)",
+    factory=lambda: RandomForestRegressor(
+        n_estimators=100,
+        max_depth=10,
+        random_state=42,
+    ),
+))
+register_engine(BaseEngine(
+    name="linear",
+    description="Ridge linear regression (fastest training and inference)",
+    factory=lambda: Ridge(alpha=1.0),
+))
+
+# Engine used for newly trained models
+DEFAULT_ENGINE = os.environ.get("AMICOOKED_BASE_ENGINE", "gbr")
+
+
+def _latency(fn: Callable[[], object], iterations: int) -> Dict[str, float]:
+    fn()
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - started
+    p50, p99 = np.percentile(timings, [50, 99]) * 1000
+    return {"p50_ms": float(p50), "p99_ms": float(p99)}
+
+
+def evaluate_engines(X_train, X_test, y_train, y_test, names: Optional[List[str]] = None,
+                     iterations: int = 200) -> Dict[str, Dict]:
+    """
+    Train each engine on the same split and report training time, inference
+    latency (one row, and the whole test set as a batch) and test R²
+
+    Single-row latency goes through the flattened tree engine when the model
+    supports it, as predict_score does.
+    """
+    from tree_engine import FlatTreeEnsemble
+
+    X_test_array = np.asarray(X_test, dtype=float)
+    row = X_test_array[:1]
+    report = {}
+    for name in names or list(ENGINES):
+        base_model = get_engine(name).create()
+        started = time.perf_counter()
+        base_model.fit(X_train, y_train)
+        train_seconds = time.perf_counter() - started
+
+        flat = FlatTreeEnsemble.try_from_model(base_model)
+        single = flat.predict if flat is not None else base_model.predict
+        batch = _latency(lambda: base_model.predict(X_test_array), max(1, iterations // 10))
+
+        report[name] = {
+            "description": ENGINES[name].description,
+            "train_seconds": train_seconds,
+            "train_rows": len(X_train),
+            "train_r2": float(base_model.score(X_train, y_train)),
+            "test_r2": float(base_model.score(X_test, y_test)),
+            "predict_one": _latency(lambda: single(row), iterations),
+            "predict_batch": dict(batch, rows=len(X_test_array),
+                                  rows_per_sec=len(X_test_array) / (batch["p50_ms"] / 1000)),
+            "incremental_updates": ENGINES[name].stages_param is not None,
+        }
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from contextlib import redirect_stdout
+    from dataset import DATASET_PATH
+    from rl_model import AmICookedRLModel
+
+    parser = argparse.ArgumentParser(description="Train and compare the registered base model engines")
+    parser.add_argument("--engines", nargs="+", choices=sorted(ENGINES), help="Engines to evaluate (default: all)")
+    parser.add_argument("--dataset", default=DATASET_PATH, help="Training CSV (same schema as student-por.csv)")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed single-row predictions per engine")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    # Dataset loading progress would mix with the JSON report
+    with redirect_stdout(sys.stderr):
+        X_train, X_test, y_train, y_test = AmICookedRLModel().training_split(args.dataset)
+    report = {
+        "dataset": args.dataset,
+        "rows": len(X_train) + len(X_test),
+        "engines": evaluate_engines(X_train, X_test, y_train, y_test, args.engines, args.iterations),
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
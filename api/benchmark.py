@@ -0,0 +1,227 @@
+"""
+Benchmarks for the model and API hot paths
+
+Runs in-process (direct AmICookedRLModel calls and FastAPI's TestClient, no
+live server) and writes machine-readable JSON with p50/p95/p99 latencies and
+ops/sec per benchmark:
+
+    python api/benchmark.py --output bench.json
+    python api/benchmark.py --quick --compare baseline.json
+
+With --compare, benchmarks whose p50 got slower than the baseline by more
+than --threshold are listed and the exit code is 1.
+"""
+import argparse
+import contextlib
+import copy
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from prediction_cache import PredictionCache
+from rl_model import AmICookedRLModel
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SAMPLE_STUDENT = {"studytime": 3, "failures": 0, "absences": 4, "G1": 70, "G2": 75, "higher": "yes"}
+
+
+def measure(fn: Callable[[], object], iterations: int, warmup: int = 3) -> Dict[str, float]:
+    """Time `iterations` calls of fn (after `warmup` untimed calls)"""
+    for _ in range(warmup):
+        fn()
+
+    timings = np.empty(iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        call_started = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - call_started
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = np.percentile(timings, [50, 95, 99]) * 1000
+    return {
+        "iterations": iterations,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(timings.mean() * 1000),
+        "min_ms": float(timings.min() * 1000),
+        "max_ms": float(timings.max() * 1000),
+        "ops_per_sec": iterations / elapsed if elapsed > 0 else float("inf"),
+    }
+
+
+def cycle(items: List) -> Callable[[], object]:
+    """Endless iterator over items, as a zero-argument function"""
+    state = {"i": 0}
+
+    def next_item():
+        item = items[state["i"] % len(items)]
+        state["i"] += 1
+        return item
+
+    return next_item
+
+
+def model_benchmarks(trained: AmICookedRLModel, rows: List[Dict], scale: float = 1.0) -> Dict[str, Dict]:
+    """Direct AmICookedRLModel calls"""
+    def n(iterations: int) -> int:
+        return max(1, int(iterations * scale))
+
+    results = {}
+    next_row = cycle(rows)
+
+    results["prepare_features"] = measure(lambda: trained.prepare_features(next_row()), n(5000))
+
+    uncached = copy.copy(trained)
+    uncached.prediction_cache = PredictionCache(maxsize=0)
+    results["predict_score"] = measure(lambda: uncached.predict_score(next_row()), n(2000))
+    results["predict_score_cached"] = measure(lambda: trained.predict_score(SAMPLE_STUDENT), n(5000))
+    results["predict_scores_batch"] = measure(lambda: trained.predict_scores(rows), n(50))
+
+    learner = copy.deepcopy(trained)
+    feedback = cycle(["true", "higher", "lower"])
+    results["apply_feedback"] = measure(
+        lambda: learner.apply_feedback(features=next_row(), predicted_score=5, feedback=feedback()),
+        n(2000),
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, path in (("artifact", Path(tmp) / "model"), ("pickle", Path(tmp) / "model.pkl")):
+            results[f"save_model_{label}"] = measure(lambda: learner.save_model(path), n(20), warmup=1)
+            results[f"load_model_{label}"] = measure(lambda: AmICookedRLModel.load_model(path), n(20), warmup=1)
+
+    results["train"] = measure(lambda: AmICookedRLModel().load_and_train_initial_model(), n(5), warmup=1)
+    return results
+
+
+def api_benchmarks(server, scale: float = 1.0) -> Dict[str, Dict]:
+    """HTTP endpoints through FastAPI's TestClient (the server module's model is used as is)"""
+    from fastapi.testclient import TestClient
+
+    def n(iterations: int) -> int:
+        return max(1, int(iterations * scale))
+
+    results = {}
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 120
+        while client.get("/health/ready").status_code != 200:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Server did not become ready")
+            time.sleep(0.05)
+
+        rows = server.model.training_data[server.model.feature_names].head(200).to_dict("records")
+        next_row = cycle(rows)
+
+        results["api_predict"] = measure(lambda: client.post("/predict", json=SAMPLE_STUDENT), n(1000))
+        results["api_predict_batch"] = measure(
+            lambda: client.post("/predict/batch", json={"students": rows}), n(50)
+        )
+        results["api_feedback"] = measure(
+            lambda: client.post("/feedback", json={
+                "features": next_row(), "predicted_score": 5, "feedback": "higher",
+            }),
+            n(500),
+        )
+        # Feedback changes the Q-table, so the first call after it recomputes the summary
+        results["api_average_stats"] = measure(lambda: client.get("/average-stats"), n(500))
+        results["average_stats_compute"] = measure(
+            lambda: server.compute_average_stats(server.model), n(50)
+        )
+    return results
+
+
+def run_benchmarks(server=None, scale: float = 1.0) -> Dict:
+    """Run every benchmark and return the JSON report"""
+    trained = AmICookedRLModel()
+    trained.load_and_train_initial_model()
+    rows = pd.read_csv(REPO_ROOT / "api" / "student-por.csv")[trained.feature_names].to_dict("records")
+
+    results = model_benchmarks(trained, rows, scale)
+    if server is not None:
+        results.update(api_benchmarks(server, scale))
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+            "scale": scale,
+        },
+        "results": results,
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = 1.25) -> List[Dict]:
+    """Benchmarks whose p50 is more than `threshold` times the baseline's"""
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None or before["p50_ms"] <= 0:
+            continue
+        ratio = result["p50_ms"] / before["p50_ms"]
+        if ratio > threshold:
+            regressions.append({
+                "benchmark": name,
+                "baseline_p50_ms": before["p50_ms"],
+                "p50_ms": result["p50_ms"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def load_server(state_dir: str):
+    """Import ml_server with its model and journal under state_dir"""
+    os.environ.setdefault("AMICOOKED_MODEL_PATH", os.path.join(state_dir, "rl_model"))
+    os.environ.setdefault("AMICOOKED_JOURNAL_PATH", os.path.join(state_dir, "feedback_journal.jsonl"))
+    import ml_server
+    return ml_server
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the AmICooked model and API")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="Run a tenth of the iterations")
+    parser.add_argument("--no-api", action="store_true", help="Skip the TestClient benchmarks")
+    parser.add_argument("--compare", help="Baseline JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Allowed p50 slowdown versus the baseline (default 1.25x)")
+    args = parser.parse_args(argv)
+
+    os.chdir(REPO_ROOT)
+    # Training and save/load progress messages would mix with the JSON report
+    with tempfile.TemporaryDirectory() as state_dir, contextlib.redirect_stdout(sys.stderr):
+        server = None if args.no_api else load_server(state_dir)
+        report = run_benchmarks(server, scale=0.1 if args.quick else 1.0)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(report, json.loads(Path(args.compare).read_text()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['benchmark']}: p50 {regression['baseline_p50_ms']:.3f} ms -> "
+                  f"{regression['p50_ms']:.3f} ms ({regression['ratio']:.2f}x)", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
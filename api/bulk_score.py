@@ -0,0 +1,238 @@
+"""
+Score a large CSV or JSONL file of students with the saved model
+
+The input is streamed in fixed-size chunks. Each chunk is encoded and scored
+with one vectorized predict_scores call, and the results are appended to the
+output file in input order. With --workers N, chunks are scored in N worker
+processes, each with its own copy of the model. At most two chunks per
+worker are in flight, so memory stays bounded whatever the input size.
+
+    python api/bulk_score.py roster.csv scores.csv
+    python api/bulk_score.py roster.jsonl scores.jsonl --workers 4 --id-column student_id
+
+Records use the training data's format (the columns of student-por.csv, with
+grades on the 0-20 scale); missing or empty fields are treated like features
+left out of a /predict request. Unless --no-journal is given, the tail of the
+server's feedback journal is replayed so scores match the live server.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from rl_model import AmICookedRLModel, DEFAULT_MODEL_PATH
+
+DEFAULT_CHUNK_SIZE = 10000
+
+# Model used by a worker process (or the main process without --workers)
+_model: Optional[AmICookedRLModel] = None
+
+
+def file_format(path: str, explicit: Optional[str] = None) -> str:
+    """'csv' or 'jsonl', from --format or the file extension"""
+    if explicit:
+        return explicit
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"Cannot tell the format of {path}; pass --format csv or --format jsonl")
+
+
+def read_chunks(path: str, fmt: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Input rows as DataFrames of at most chunk_size rows"""
+    if fmt == "csv":
+        yield from pd.read_csv(path, chunksize=chunk_size)
+        return
+    with open(path) as f:
+        records = []
+        for line in f:
+            if line.strip():
+                records.append(json.loads(line))
+            if len(records) == chunk_size:
+                yield pd.DataFrame(records)
+                records = []
+        if records:
+            yield pd.DataFrame(records)
+
+
+def load_model(model_path: str, journal_path: Optional[str]) -> AmICookedRLModel:
+    """The saved model, plus the journal tail when a journal is given"""
+    model = AmICookedRLModel.load_model(model_path)
+    if not model.is_trained:
+        raise RuntimeError(f"No trained model at {model_path}")
+    if journal_path is not None:
+        # Read-only: the live server may be appending to (or compacting) the journal
+        from feedback_journal import replay_file
+
+        replay_file(journal_path, model)
+    return model
+
+
+def _init_worker(model_path: str, journal_path: Optional[str]):
+    global _model
+    with redirect_stdout(sys.stderr):
+        _model = load_model(model_path, journal_path)
+
+
+def score_chunk(rows: List[Dict], use_rl_adjustment: bool = True) -> List[Dict]:
+    """Score one chunk of feature dicts with the process's model"""
+    scores = _model.predict_scores(rows, use_rl_adjustment=use_rl_adjustment)
+    return [{"score": score, "label": _model.get_score_label(score)} for score in scores]
+
+
+def chunk_records(chunk: pd.DataFrame, feature_names: List[str]) -> List[Dict]:
+    """Feature dicts for a chunk, without the columns the model does not use and missing values"""
+    names = []
+    columns = []
+    for name in feature_names:
+        if name not in chunk.columns:
+            continue
+        column = chunk[name]
+        # Integer columns with gaps are parsed as floats; the RL states expect ints
+        if column.dtype.kind == "f" and (column.dropna() % 1 == 0).all():
+            column = column.astype("Int64")
+        names.append(name)
+        columns.append(column.astype(object).where(column.notna(), None).tolist())
+    if not columns:
+        return [{} for _ in range(len(chunk))]
+    return [
+        {name: value for name, value in zip(names, values) if value is not None}
+        for values in zip(*columns)
+    ]
+
+
+class ResultWriter:
+    """Appends scored rows to a CSV or JSONL file"""
+
+    def __init__(self, path: str, fmt: str, id_column: Optional[str]):
+        self.file = open(path, "w", newline="")
+        self.fmt = fmt
+        self.id_column = id_column
+        self.rows = 0
+        if fmt == "csv":
+            self.file.write(",".join(([id_column] if id_column else ["row"]) + ["score", "label"]) + "\n")
+
+    def write(self, ids: List, results: List[Dict]):
+        if self.fmt == "csv":
+            lines = [f"{_csv_field(key)},{result['score']},{_csv_field(result['label'])}\n"
+                     for key, result in zip(ids, results)]
+        else:
+            key_name = self.id_column or "row"
+            lines = [json.dumps({key_name: key, **result}) + "\n" for key, result in zip(ids, results)]
+        self.file.writelines(lines)
+        self.rows += len(results)
+
+    def close(self):
+        self.file.close()
+
+
+def _csv_field(value) -> str:
+    text = str(value)
+    if any(c in text for c in ',"\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def score_file(input_path: str, output_path: str, model_path: str = DEFAULT_MODEL_PATH,
+               journal_path: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               workers: int = 0, input_format: Optional[str] = None, output_format: Optional[str] = None,
+               id_column: Optional[str] = None, use_rl_adjustment: bool = True) -> Dict:
+    """
+    Stream input_path through the model into output_path
+
+    Returns a summary with the row count and throughput.
+    """
+    in_fmt = file_format(input_path, input_format)
+    out_fmt = file_format(output_path, output_format)
+    started = time.perf_counter()
+
+    if workers > 0:
+        # Only the workers load the model
+        feature_names = AmICookedRLModel.saved_feature_names(model_path)
+    else:
+        _init_worker(model_path, journal_path)
+        feature_names = _model.feature_names
+    writer = ResultWriter(output_path, out_fmt, id_column)
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker, initargs=(model_path, journal_path))
+    try:
+        pending = deque()
+        next_row = 0
+        for chunk in read_chunks(input_path, in_fmt, chunk_size):
+            if id_column is not None:
+                if id_column not in chunk.columns:
+                    raise ValueError(f"Input has no column '{id_column}'")
+                ids = chunk[id_column].tolist()
+            else:
+                ids = list(range(next_row, next_row + len(chunk)))
+            next_row += len(chunk)
+            rows = chunk_records(chunk, feature_names)
+
+            if executor is None:
+                writer.write(ids, score_chunk(rows, use_rl_adjustment))
+                continue
+            pending.append((ids, executor.submit(score_chunk, rows, use_rl_adjustment)))
+            # Bound the chunks held in memory; results are written in input order
+            while len(pending) >= 2 * workers:
+                done_ids, future = pending.popleft()
+                writer.write(done_ids, future.result())
+        while pending:
+            done_ids, future = pending.popleft()
+            writer.write(done_ids, future.result())
+    finally:
+        writer.close()
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    seconds = time.perf_counter() - started
+    return {
+        "rows": writer.rows,
+        "seconds": seconds,
+        "rows_per_sec": writer.rows / seconds if seconds > 0 else float("inf"),
+        "workers": workers,
+        "chunk_size": chunk_size,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Score a CSV or JSONL file of students")
+    parser.add_argument("input", help="Students, one per row/line")
+    parser.add_argument("output", help="Where to write row (or id), score and label")
+    parser.add_argument("--model", default=os.environ.get("AMICOOKED_MODEL_PATH", DEFAULT_MODEL_PATH))
+    parser.add_argument("--journal", default=os.environ.get("AMICOOKED_JOURNAL_PATH", "api/feedback_journal.jsonl"),
+                        help="Feedback journal whose tail is included (the server's journal by default)")
+    parser.add_argument("--no-journal", action="store_true", help="Score with the saved snapshot only")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows scored per vectorized call")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 scores in this process)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from the extension)")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="Output format (default: from the extension)")
+    parser.add_argument("--id-column", help="Input column copied to the output to identify each row")
+    parser.add_argument("--no-rl", action="store_true", help="Base model scores without the RL adjustment")
+    args = parser.parse_args(argv)
+
+    journal = None if args.no_journal or not os.path.exists(args.journal) else args.journal
+    with redirect_stdout(sys.stderr):
+        summary = score_file(
+            args.input, args.output, model_path=args.model, journal_path=journal,
+            chunk_size=args.chunk_size, workers=args.workers, input_format=args.format,
+            output_format=args.output_format, id_column=args.id_column, use_rl_adjustment=not args.no_rl,
+        )
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
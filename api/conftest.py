@@ -0,0 +1,70 @@
+"""
+Shared pytest fixtures for the in-process model tests.
+
+The model reads its dataset from api/student-por.csv relative to the repository
+root, so tests always run from there.
+"""
+import os
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from rl_model import AmICookedRLModel
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Admin token the test server is started with
+ADMIN_TOKEN = "test-admin-token"
+
+
+@pytest.fixture(autouse=True)
+def repo_root_cwd(monkeypatch):
+    """Run every test from the repository root"""
+    monkeypatch.chdir(REPO_ROOT)
+
+
+@pytest.fixture(scope="session")
+def trained_model():
+    """A model trained once on the bundled dataset"""
+    cwd = os.getcwd()
+    os.chdir(REPO_ROOT)
+    try:
+        model = AmICookedRLModel()
+        model.load_and_train_initial_model()
+    finally:
+        os.chdir(cwd)
+    return model
+
+
+@pytest.fixture(scope="session")
+def student_rows(trained_model):
+    """Every student in the dataset as a features dict"""
+    df = pd.read_csv(REPO_ROOT / "api" / "student-por.csv")
+    return df[trained_model.feature_names].to_dict("records")
+
+
+@pytest.fixture(scope="session")
+def server(trained_model, tmp_path_factory):
+    """
+    The ml_server module, pointed at a temporary snapshot and journal
+
+    ml_server reads its paths when imported, so the environment is only
+    changed for the import and restored before any other test runs.
+    """
+    state_dir = tmp_path_factory.mktemp("server")
+    trained_model.save_model(state_dir / "rl_model")
+
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("AMICOOKED_MODEL_PATH", str(state_dir / "rl_model"))
+        patch.setenv("AMICOOKED_JOURNAL_PATH", str(state_dir / "feedback_journal.jsonl"))
+        patch.setenv("AMICOOKED_ADMIN_TOKEN", ADMIN_TOKEN)
+        patch.chdir(REPO_ROOT)
+        import ml_server
+    return ml_server
+
+
+@pytest.fixture
+def admin_headers(server):
+    """Headers authorizing the server's admin endpoints"""
+    return {"X-Admin-Token": ADMIN_TOKEN}
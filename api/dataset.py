@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DATASET_PATH = "api/student-por.csv"
+
+# Parsed datasets, one directory per source file digest
+DATASET_CACHE_DIR = os.environ.get("AMICOOKED_DATASET_CACHE_DIR", "api/.dataset_cache")
+
+CACHE_FORMAT_VERSION = 1
+
+
+def file_digest(path) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ColumnarDataset:
+    """
+    Student dataset held as one compact, typed NumPy array per column.
+
+    Text columns are stored as integer codes into a sorted list of categories
+    and integer columns are downcast to the smallest dtype that holds them.
+    The arrays are cached on disk (keyed on the source file's digest) and
+    memory-mapped on load, so the CSV is parsed once per distinct file.
+    """
+
+    def __init__(self, columns: Dict[str, np.ndarray], categories: Dict[str, List[str]],
+                 source_digest: str, source_bytes: Optional[int] = None):
+        self.columns = columns
+        self.categories = categories
+        self.source_digest = source_digest
+
+        # In-memory size of the same data parsed with default pandas dtypes
+        self.source_bytes = source_bytes
+
+    @property
+    def n_rows(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, source_digest: str) -> "ColumnarDataset":
+        columns = {}
+        categories = {}
+        for name in df.columns:
+            series = df[name]
+            if pd.api.types.is_numeric_dtype(series):
+                downcast = "integer" if pd.api.types.is_integer_dtype(series) else "float"
+                columns[name] = pd.to_numeric(series, downcast=downcast).to_numpy()
+            else:
+                categorical = pd.Categorical(series.astype(str))
+                categories[name] = [str(c) for c in categorical.categories]
+                columns[name] = pd.to_numeric(pd.Series(categorical.codes), downcast="integer").to_numpy()
+        return cls(columns, categories, source_digest, int(df.memory_usage(deep=True).sum()))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """DataFrame view with categorical dtype for text columns"""
+        data = {}
+        for name, values in self.columns.items():
+            if name in self.categories:
+                data[name] = pd.Categorical.from_codes(values, categories=self.categories[name])
+            else:
+                data[name] = values
+        return pd.DataFrame(data)
+
+    def save(self, directory):
+        """Write one .npy file per column plus a JSON header"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for i, values in enumerate(self.columns.values()):
+            np.save(directory / f"col{i}.npy", values)
+        with open(directory / "dataset.json", "w") as f:
+            json.dump({
+                "format_version": CACHE_FORMAT_VERSION,
+                "columns": list(self.columns),
+                "categories": self.categories,
+                "source_digest": self.source_digest,
+                "source_bytes": self.source_bytes,
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode: Optional[str] = "r") -> "ColumnarDataset":
+        directory = Path(directory)
+        with open(directory / "dataset.json") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != CACHE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported dataset cache version in {directory}")
+        columns = {
+            name: np.asarray(np.load(directory / f"col{i}.npy", mmap_mode=mmap_mode))
+            for i, name in enumerate(meta["columns"])
+        }
+        return cls(columns, meta["categories"], meta["source_digest"], meta.get("source_bytes"))
+
+    def memory_report(self) -> Dict:
+        """Bytes per column, in total, and compared to the default-dtype DataFrame"""
+        columns = {
+            name: {"dtype": str(values.dtype), "bytes": int(values.nbytes)}
+            for name, values in self.columns.items()
+        }
+        for name, categories in self.categories.items():
+            columns[name]["categories"] = len(categories)
+            columns[name]["category_bytes"] = sum(len(c) for c in categories)
+        total = sum(c["bytes"] + c.get("category_bytes", 0) for c in columns.values())
+        return {
+            "rows": self.n_rows,
+            "columns": columns,
+            "total_bytes": total,
+            "default_pandas_bytes": self.source_bytes,
+            "compression_ratio": self.source_bytes / total if self.source_bytes and total else None,
+        }
+
+
+# Datasets loaded by this process, by path: (mtime_ns, size, dataset)
+_loaded: Dict[str, tuple] = {}
+_loaded_lock = threading.Lock()
+
+
+def load_dataset(path: str = DATASET_PATH, cache_dir: Optional[str] = DATASET_CACHE_DIR) -> ColumnarDataset:
+    """
+    Load a CSV dataset through the columnar cache
+
+    A file that has not changed since the last call in this process is
+    returned without touching the disk. Otherwise the file is hashed and the
+    cached columns for that digest are loaded, parsing the CSV only if no
+    cache exists yet. cache_dir=None parses without caching.
+    """
+    stat = os.stat(path)
+    key = str(Path(path).resolve())
+    with _loaded_lock:
+        cached = _loaded.get(key)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+    digest = file_digest(path)
+    dataset = None
+    if cache_dir is not None:
+        directory = Path(cache_dir) / digest
+        if (directory / "dataset.json").exists():
+            try:
+                dataset = ColumnarDataset.load(directory)
+            except ValueError:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    if dataset is None:
+        dataset = ColumnarDataset.from_dataframe(pd.read_csv(path), digest)
+        if cache_dir is not None:
+            # Build under a private name, then rename (another process may win the race)
+            tmp_dir = Path(cache_dir) / f".{digest}.{uuid.uuid4().hex}.tmp"
+            dataset.save(tmp_dir)
+            try:
+                os.rename(tmp_dir, directory)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    with _loaded_lock:
+        _loaded[key] = (stat.st_mtime_ns, stat.st_size, dataset)
+    return dataset
+
+
+def dataframe_memory_report(df: pd.DataFrame) -> Dict:
+    """Memory used by a DataFrame, per column and in total"""
+    usage = df.memory_usage(deep=True, index=False)
+    return {
+        "rows": len(df),
+        "total_bytes": int(usage.sum()),
+        "columns": {name: {"dtype": str(df[name].dtype), "bytes": int(usage[name])} for name in df.columns},
+    }
+
+
+if __name__ == "__main__":
+    report = load_dataset().memory_report()
+    print(f"{report['rows']} rows, {report['total_bytes']:,} bytes "
+          f"(default pandas dtypes: {report['default_pandas_bytes']:,} bytes, "
+          f"{report['compression_ratio']:.1f}x smaller)")
+    for name, column in report["columns"].items():
+        extra = f", {column['categories']} categories" if "categories" in column else ""
+        print(f"  {name:12s} {column['dtype']:8s} {column['bytes']:>8,} bytes{extra}")
@@ -0,0 +1,275 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from model_artifact import json_default
+from rl_model import RLFeedback
+
+
+def _encode_record(seq: int, feedback: RLFeedback) -> str:
+    return json.dumps({"seq": seq, **asdict(feedback)}, default=json_default) + "\n"
+
+
+def _encode_checkpoint(seq: int) -> str:
+    return json.dumps({"seq": seq, "checkpoint": True}) + "\n"
+
+
+def read_records(path, after_seq: int = 0) -> Iterator[Tuple[int, RLFeedback]]:
+    """
+    Yield (seq, feedback) for every record of a journal file with a sequence
+    number above after_seq
+
+    Only reads the file: no lock is taken and a partially written last line is
+    skipped rather than repaired, so it is safe on a journal a server is using.
+    """
+    path = Path(path)
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # Record still being written
+            record = json.loads(line)
+            seq = record.pop("seq")
+            if record.pop("checkpoint", False):
+                continue
+            if seq > after_seq:
+                yield seq, RLFeedback(**record)
+
+
+def replay_file(path, model) -> int:
+    """Apply the records of a journal file newer than the model's snapshot, read-only (see read_records)"""
+    return FeedbackJournal._apply(model, list(read_records(path, after_seq=model.journal_seq)))
+
+
+class FeedbackJournal:
+    """
+    Append-only JSONL journal of RLFeedback events.
+
+    Each /feedback appends one line instead of re-pickling the whole model, so
+    the write cost does not depend on how much feedback has been collected.
+    Records carry an increasing sequence number; a model snapshot remembers the
+    last sequence number it includes (AmICookedRLModel.journal_seq), so on
+    startup only the journal tail after the snapshot needs to be replayed.
+    Compaction leaves a checkpoint line so numbering continues after it.
+
+    The journal is safe to share between processes: writers serialize on an
+    flock'd lock file, and every process can tail records written by the others
+    (sync_into), which keeps their Q-tables identical.
+
+    fsync policies:
+    - "always": fsync after every record (no acknowledged feedback is lost)
+    - "interval": fsync at most every `fsync_interval` seconds
+    - "never": leave flushing to the OS
+    """
+
+    FSYNC_POLICIES = ("always", "interval", "never")
+
+    def __init__(self, path: str = "api/feedback_journal.jsonl", fsync: str = "interval",
+                 fsync_interval: float = 1.0):
+        if fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}. Must be one of {self.FSYNC_POLICIES}")
+
+        self.path = Path(path)
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._last_fsync = time.monotonic()
+        self._file = None
+        self._reader = None
+
+        # Records written by other processes that sync_into has not applied yet
+        self._unsynced: List[Tuple[int, RLFeedback]] = []
+        self._buffered_seq = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(self.path.with_name(self.path.name + ".lock"), "a")
+
+        with self.exclusive():
+            self._repair_tail()
+            self._reopen()
+
+    @contextmanager
+    def exclusive(self):
+        """Hold the journal lock (across threads and processes)"""
+        with self._lock:
+            if self._lock_depth == 0:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                if self._reader is not None:
+                    self._reopen_if_replaced()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _repair_tail(self):
+        """Drop a partially written last line left behind by a crash"""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def _reopen(self):
+        """(Re)open the journal file and rescan it"""
+        for handle in (self._file, self._reader):
+            if handle is not None and not handle.closed:
+                handle.close()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._reader = open(self.path, "rb")
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+        # Sequence number of the last line, and records since the last compaction
+        self.last_seq = 0
+        self.pending = 0
+        self._scan_offset = 0
+        self._scan()
+
+    def _reopen_if_replaced(self):
+        """Pick up a journal that another process compacted or reset"""
+        try:
+            replaced = os.stat(self.path).st_ino != self._inode
+        except FileNotFoundError:
+            replaced = True
+        if replaced:
+            # Nothing is appended to the old file once it is replaced, so drain it first
+            self._scan()
+            self._reopen()
+
+    def _scan(self):
+        """Read complete lines appended since the last scan"""
+        self._reader.seek(self._scan_offset)
+        data = self._reader.read()
+        end = data.rfind(b"\n") + 1  # Ignore a record still being written
+        self._scan_offset += end
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            seq = record.pop("seq")
+            self.last_seq = seq
+            if record.pop("checkpoint", False):
+                continue
+            self.pending += 1
+            # Records are buffered until sync_into; a compacted copy may repeat some
+            if seq > self._buffered_seq:
+                self._unsynced.append((seq, RLFeedback(**record)))
+                self._buffered_seq = seq
+
+    def _sync(self, force: bool = False):
+        """Flush buffered records and fsync according to the policy"""
+        self._file.flush()
+        now = time.monotonic()
+        if force or self.fsync == "always" or (
+            self.fsync == "interval" and now - self._last_fsync >= self.fsync_interval
+        ):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def append(self, feedback: RLFeedback) -> int:
+        """Append a feedback event and return its sequence number"""
+        with self.exclusive():
+            self._scan()  # Records from other processes come first
+            seq = self.last_seq + 1
+            self._file.write(_encode_record(seq, feedback))
+            self._sync()
+            self._scan_offset = os.fstat(self._file.fileno()).st_size
+            self.last_seq = seq
+            self.pending += 1
+            return seq
+
+    def has_new_records(self) -> bool:
+        """Cheap check for records written by other processes since the last scan"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        return stat.st_ino != self._inode or stat.st_size > self._scan_offset or bool(self._unsynced)
+
+    def read(self, after_seq: int = 0) -> Iterator[Tuple[int, RLFeedback]]:
+        """Yield (seq, feedback) for every record with a sequence number above after_seq"""
+        return read_records(self.path, after_seq)
+
+    def sync_into(self, model) -> int:
+        """Apply records written by other processes that the model has not seen yet"""
+        with self.exclusive():
+            self._scan()
+            records, self._unsynced = self._unsynced, []
+        return self._apply(model, records)
+
+    def replay_into(self, model) -> int:
+        """Apply every record newer than the model's snapshot (on startup or after a reload)"""
+        with self.exclusive():
+            self._scan()
+            self._unsynced = []
+            self._buffered_seq = self.last_seq
+            records = list(self.read(after_seq=model.journal_seq))
+        return self._apply(model, records)
+
+    @staticmethod
+    def _apply(model, records: List[Tuple[int, RLFeedback]]) -> int:
+        """Apply (seq, feedback) records newer than model.journal_seq, in order"""
+        applied = 0
+        for seq, feedback in records:
+            if seq <= model.journal_seq:
+                continue
+            model.apply_feedback(
+                features=feedback.features,
+                predicted_score=feedback.predicted_score,
+                feedback=feedback.feedback,
+                timestamp=feedback.timestamp,
+                actual_grade=feedback.actual_grade,
+            )
+            model.journal_seq = seq
+            applied += 1
+        return applied
+
+    def compact(self, upto_seq: int):
+        """Drop records already covered by a snapshot taken at upto_seq"""
+        with self.exclusive():
+            self._sync(force=True)
+            self._scan()
+            lines = [_encode_checkpoint(max(upto_seq, 0))] + [
+                _encode_record(seq, feedback) for seq, feedback in self.read(after_seq=upto_seq)
+            ]
+            self._replace_file(lines)
+
+    def reset(self):
+        """Discard every record and restart sequence numbers (used when the model is reset)"""
+        with self.exclusive():
+            self._replace_file([])
+            self._unsynced = []
+            self._buffered_seq = 0
+
+    def _replace_file(self, lines: List[str]):
+        """Atomically swap in new journal contents (other processes notice the new inode)"""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._reopen()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def close(self):
+        """Flush and fsync outstanding records"""
+        with self._lock:
+            if not self._file.closed:
+                self._sync(force=True)
+                self._file.close()
+                self._reader.close()
+            self._lock_file.close()
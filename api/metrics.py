@@ -0,0 +1,206 @@
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from rolling_stats import Histogram
+
+# Latency buckets in seconds, from 10µs (one feature encode) to 10s (a retrain)
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Label sets are tuples of (name, value) pairs, e.g. (("stage", "base_predict"),)
+Labels = Tuple[Tuple[str, str], ...]
+GaugeValue = Union[float, Dict[Labels, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = labels + (extra,) if extra is not None else labels
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Metrics:
+    """
+    In-process counters, latency histograms and gauges, rendered in the
+    Prometheus text exposition format.
+
+    Recording is a dict lookup plus a bisect and a short lock, so it is cheap
+    enough to stay on in production. Gauges are callbacks evaluated only when
+    the metrics are rendered. Each worker process keeps its own metrics.
+    """
+
+    def __init__(self, namespace: str = "amicooked", enabled: bool = True):
+        self.namespace = namespace
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._help: Dict[str, str] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._gauges: Dict[str, Tuple[Callable[[], GaugeValue], str]] = {}
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1):
+        """Add to a counter (name without the _total suffix)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[labels] = series.get(labels, 0) + value
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        """Record one observation in a histogram"""
+        if not self.enabled:
+            return
+        series = self._histograms.get(name)
+        histogram = series.get(labels) if series is not None else None
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, {}).setdefault(labels, Histogram(LATENCY_BUCKETS))
+        histogram.observe(value)
+
+    def observe_stage(self, stage: str, seconds: float):
+        """Record the time spent in one stage of request processing"""
+        self.observe("stage_duration_seconds", seconds, (("stage", stage),))
+
+    def time_stage(self, stage: str) -> "StageTimer":
+        """Context manager recording the duration of its block as a stage"""
+        return StageTimer(self, stage)
+
+    def register_gauge(self, name: str, help_text: str, read: Callable[[], GaugeValue], kind: str = "gauge"):
+        """
+        Value read at render time; read() returns a number or {labels: number}
+
+        kind="counter" exposes a monotonic count kept by another component
+        (rendered with the _total suffix).
+        """
+        self._help[name] = help_text
+        self._gauges[name] = (read, kind)
+
+    def register_histogram(self, name: str, help_text: str, histogram: Histogram, labels: Labels = ()):
+        """Expose a Histogram owned by another component"""
+        self._help[name] = help_text
+        with self._lock:
+            self._histograms.setdefault(name, {})[labels] = histogram
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+
+        def header(name: str, full_name: str, kind: str):
+            if name in self._help:
+                lines.append(f"# HELP {full_name} {self._help[name]}")
+            lines.append(f"# TYPE {full_name} {kind}")
+
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+
+        for name in sorted(counters):
+            full_name = f"{self.namespace}_{name}_total"
+            header(name, full_name, "counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+
+        for name in sorted(histograms):
+            full_name = f"{self.namespace}_{name}"
+            header(name, full_name, "histogram")
+            for labels, histogram in sorted(histograms[name].items()):
+                for bound, count in histogram.cumulative().items():
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, ('le', bound))} {count}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(histogram.total)}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+
+        for name in sorted(self._gauges):
+            read, kind = self._gauges[name]
+            try:
+                value = read()
+            except Exception:
+                continue  # A gauge that cannot be read right now is left out of this scrape
+            if value is None:
+                continue
+            full_name = f"{self.namespace}_{name}_total" if kind == "counter" else f"{self.namespace}_{name}"
+            header(name, full_name, kind)
+            series = value if isinstance(value, dict) else {(): value}
+            for labels, sample in sorted(series.items()):
+                lines.append(f"{full_name}{_format_labels(labels)} {_format_value(sample)}")
+
+        return "\n".join(lines) + "\n"
+
+
+class StageTimer:
+    """Times a block with perf_counter and records it as a stage"""
+
+    __slots__ = ("metrics", "stage", "started")
+
+    def __init__(self, metrics: Metrics, stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe_stage(self.stage, time.perf_counter() - self.started)
+        return False
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware recording HTTP request latency per route template and status
+
+    Written as plain ASGI (rather than BaseHTTPMiddleware) so it adds no extra
+    task or body buffering to each request.
+    """
+
+    def __init__(self, app, metrics: Optional[Metrics] = None):
+        self.app = app
+        self.metrics = metrics if metrics is not None else METRICS
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            # The router stores the matched route in the scope; unmatched paths share one label
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            labels = (("method", scope["method"]), ("route", path), ("status", str(status["code"])))
+            self.metrics.observe("http_request_duration_seconds", elapsed, labels)
+
+
+# Process-wide registry used by the model and the server (AMICOOKED_METRICS=0 turns recording off)
+METRICS = Metrics(enabled=os.environ.get("AMICOOKED_METRICS", "1") != "0")
+METRICS.describe("stage_duration_seconds", "Time spent in each stage of request processing")
+METRICS.describe("http_request_duration_seconds", "HTTP request latency by route template and status")
@@ -0,0 +1,104 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from rolling_stats import Histogram
+
+QUEUE_DEPTH_BUCKETS = [0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-item requests and scores them with one batched call.
+
+    Requests are queued on the event loop. A single worker task takes the first
+    waiting request, gathers more until `max_batch_size` is reached or
+    `max_wait_us` microseconds have passed, then runs `score_batch` on the whole
+    batch in a thread and resolves each request with its own result.
+
+    The window is adaptive: when the previous batch held a single request and
+    nothing else is queued (light traffic), the request is dispatched right away
+    instead of waiting. Under bursts, requests pile up while a batch is being
+    scored, so the next batch is formed from them without adding latency.
+    """
+
+    def __init__(self, score_batch: Callable[[List[Any]], List[Any]], max_batch_size: int = 32,
+                 max_wait_us: int = 1000):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be at least 1, got {max_batch_size}")
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+
+        # Requests already waiting when one arrives, and requests per scored batch
+        self.queue_depth = Histogram(QUEUE_DEPTH_BUCKETS)
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._last_batch_size = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result (exceptions from score_batch propagate)"""
+        queue = self._ensure_worker()
+        future = self._loop.create_future()
+        self.queue_depth.observe(queue.qsize())
+        queue.put_nowait((item, future))
+        return await future
+
+    def _ensure_worker(self) -> asyncio.Queue:
+        """Start the worker task on the running event loop (once per loop)"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(self._queue))
+        return self._queue
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            if not (queue.empty() and self._last_batch_size <= 1):
+                await self._fill(queue, batch)
+            self._last_batch_size = len(batch)
+            await self._dispatch(batch)
+
+    async def _fill(self, queue: asyncio.Queue, batch: List[Tuple[Any, asyncio.Future]]):
+        """Add queued requests to the batch until it is full or the wait window closes"""
+        deadline = self._loop.time() + self.max_wait_us / 1e6
+        while len(batch) < self.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Score a batch in a worker thread and resolve its futures"""
+        self.batch_sizes.observe(len(batch))
+        try:
+            results = await asyncio.to_thread(self.score_batch, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():  # The client may have gone away
+                future.set_result(result)
+
+    def stats(self) -> Dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_us": self.max_wait_us,
+            "current_queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_depth": self.queue_depth.to_dict(),
+            "batch_size": self.batch_sizes.to_dict(),
+        }
@@ -1,13 +1,46 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, ConfigDict, model_validator
-from typing import Optional, Dict, Literal, Any
-from rl_model import AmICookedRLModel
+from fastapi.responses import JSONResponse, PlainTextResponse
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, ConfigDict, ValidationError, model_validator
+from typing import Optional, Dict, List, Literal, Any, Union
+from rl_model import AmICookedRLModel, DEFAULT_MODEL_PATH, INCREMENTAL_MIN_LABELS, WHAT_IF_RANGES
+from base_engines import ENGINES
+from feedback_journal import FeedbackJournal
+from training_jobs import TrainingJobManager
+from shared_state import SharedModelState
+from micro_batcher import MicroBatcher
+from dataset import DATASET_PATH, dataframe_memory_report, load_dataset
+from metrics import METRICS, RequestMetricsMiddleware
+from request_profiler import RequestProfiler
 import uvicorn
 import threading
+import os
+import time
+import uuid
 import numpy as np
 
-app = FastAPI(title="AmICooked RL API", version="3.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load (or train) the model in the background so the server answers health checks meanwhile"""
+    global journal
+    if journal.closed:
+        journal = open_journal()
+    startup_complete.clear()
+    startup_thread = threading.Thread(target=run_startup, name="model-startup", daemon=True)
+    startup_thread.start()
+    if INCREMENTAL_INTERVAL_SECONDS > 0:
+        threading.Thread(target=run_incremental_schedule, name="incremental-update", daemon=True).start()
+    yield
+    training_jobs.shutdown()
+    # A startup still training holds the journal; the daemon thread ends with the process
+    if startup_complete.is_set():
+        journal.close()
+
+
+app = FastAPI(title="AmICooked RL API", version="3.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -18,22 +51,356 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Initialize RL model (load from disk if exists)
-model = AmICookedRLModel.load_model()
+# Per-route request latency, exposed with the other metrics on GET /metrics
+app.add_middleware(RequestMetricsMiddleware, metrics=METRICS)
+
+SNAPSHOT_EVERY = int(os.environ.get("AMICOOKED_SNAPSHOT_EVERY", "100"))
+
+# Where the model snapshot lives (an artifact directory, or a legacy .pkl file)
+MODEL_PATH = os.environ.get("AMICOOKED_MODEL_PATH", DEFAULT_MODEL_PATH)
+
+# Feedback journal (read once, so a restarted lifespan reopens the same file)
+JOURNAL_PATH = os.environ.get("AMICOOKED_JOURNAL_PATH", "api/feedback_journal.jsonl")
+
+# Dataset rows scored by the startup warm-up before the server reports ready (0 disables it)
+WARMUP_REQUESTS = int(os.environ.get("AMICOOKED_WARMUP_REQUESTS", "32"))
+
+# With AMICOOKED_WORKERS > 1 the server runs one process per worker. Each keeps its
+# own model; feedback is replicated through the shared journal and base model swaps
+# through SharedModelState (under AMICOOKED_SHARED_DIR).
+WORKERS = int(os.environ.get("AMICOOKED_WORKERS", "1"))
+
+# Serializes feedback writes with snapshots so a snapshot always matches its journal position
+#
+# Model state is copy-on-write: a published model is never modified. Writers hold
+# feedback_lock, apply their changes to model.fork() (or build a new model) and
+# publish the result by rebinding `model`. Readers take `model` once per request
+# and use that instance throughout, without locking, so predictions never wait
+# for feedback writes or snapshots and never see a half-applied update.
+feedback_lock = threading.Lock()
+
+
+def open_journal() -> FeedbackJournal:
+    return FeedbackJournal(
+        path=JOURNAL_PATH,
+        fsync=os.environ.get("AMICOOKED_JOURNAL_FSYNC", "interval"),
+        fsync_interval=float(os.environ.get("AMICOOKED_JOURNAL_FSYNC_INTERVAL", "1.0")),
+    )
+
+
+# Feedback is appended to a journal; the full model is only snapshotted every
+# SNAPSHOT_EVERY records (and after training), then the journal is compacted.
+journal = open_journal()
+
+shared_state = (
+    SharedModelState(os.environ.get("AMICOOKED_SHARED_DIR", "api/shared")) if WORKERS > 1 else None
+)
+
+# Placeholder until the startup task has loaded or trained the real model
+model = AmICookedRLModel()
 
-# Train on startup if not trained
-if not model.is_trained:
-    print("Model not trained. Training on startup...")
+# Set once the startup task has finished (whether or not it ended with a trained model)
+startup_complete = threading.Event()
+startup_status: Dict[str, Any] = {"phase": "starting", "error": None, "timings": {}}
+
+
+def load_or_train_model():
+    """Load the model snapshot (training if there is none) and replay the journal tail"""
+    global model
+    # The journal lock also keeps concurrently starting workers from all training at once
+    with journal.exclusive():
+        # Initialize RL model (load from disk if exists)
+        loaded = AmICookedRLModel.load_model(MODEL_PATH)
+
+        # Train on startup if not trained
+        if not loaded.is_trained:
+            print("Model not trained. Training on startup...")
+            startup_status["phase"] = "training"
+            try:
+                loaded.load_and_train_initial_model()
+                loaded.save_model(MODEL_PATH)
+                print("Startup training complete.")
+            except Exception as e:
+                print(f"Startup training failed: {e}")
+        elif shared_state is not None and loaded.model_id is None:
+            # Snapshot from before model ids; give it one so workers share its engine
+            loaded.model_id = uuid.uuid4().hex
+            loaded.save_model(MODEL_PATH)
+
+        # Restore feedback received since the last snapshot
+        if loaded.is_trained:
+            replayed = journal.replay_into(loaded)
+            if replayed:
+                print(f"Replayed {replayed} feedback events from {journal.path}")
+
+        if shared_state is not None:
+            shared_state.mark_current()
+    if shared_state is not None:
+        shared_state.attach(loaded)
+
+    with feedback_lock:
+        model = loaded
+
+
+def warm_up_model(current: AmICookedRLModel, n_requests: int):
+    """Run predictions on dataset rows so the first real requests do not pay one-off costs"""
+    if n_requests <= 0 or not current.is_trained or current.training_data is None:
+        return
+    rows = current.training_data[current.feature_names].head(n_requests).to_dict("records")
+    for row in rows:
+        current.predict_score(row)
+    current.predict_scores(rows)
+
+
+def run_startup():
+    """Startup task: load or train the model, then warm it up"""
+    started = time.perf_counter()
+    startup_status["error"] = None
     try:
-        model.load_and_train_initial_model()
-        model.save_model()
-        print("Startup training complete.")
+        startup_status["phase"] = "loading"
+        load_or_train_model()
+        loaded_at = time.perf_counter()
+        startup_status["timings"]["load_seconds"] = loaded_at - started
+
+        startup_status["phase"] = "warming_up"
+        warm_up_model(model, WARMUP_REQUESTS)
+        startup_status["timings"]["warmup_seconds"] = time.perf_counter() - loaded_at
+
+        startup_status["phase"] = "ready" if model.is_trained else "untrained"
     except Exception as e:
-        print(f"Startup training failed: {e}")
+        startup_status["phase"] = "failed"
+        startup_status["error"] = f"{type(e).__name__}: {e}"
+        print(f"Startup failed: {startup_status['error']}")
+    finally:
+        startup_status["timings"]["total_seconds"] = time.perf_counter() - started
+        startup_complete.set()
+
+
+def ensure_started():
+    """Reject requests that need the model while the startup task is still running"""
+    if not startup_complete.is_set():
+        raise HTTPException(
+            status_code=503,
+            detail=f"Model is starting up ({startup_status['phase']}). Retry once GET /health/ready returns 200."
+        )
+
+
+def load_published_model() -> AmICookedRLModel:
+    """Load the latest snapshot plus journal tail (after another worker swapped models)"""
+    with journal.exclusive():
+        shared_state.mark_current()
+        fresh = AmICookedRLModel.load_model(MODEL_PATH)
+        if fresh.is_trained:
+            journal.replay_into(fresh)
+    shared_state.attach(fresh)
+    return fresh
+
+
+def _sync_journal_locked():
+    """Publish a copy of the model with other workers' journal records; the caller holds feedback_lock"""
+    global model
+    if model.is_trained and journal.has_new_records():
+        updated = model.fork()
+        if journal.sync_into(updated):
+            model = updated
+
+
+def _sync_shared_state_locked():
+    """Body of sync_shared_state; the caller holds feedback_lock"""
+    global model
+    if shared_state is not None and shared_state.changed():
+        model = load_published_model()
+    else:
+        _sync_journal_locked()
+
+
+def sync_shared_state():
+    """Catch up with model swaps and feedback from other worker processes"""
+    if shared_state is None or not startup_complete.is_set():
+        return
+    if shared_state.changed() or journal.has_new_records():
+        with feedback_lock:
+            _sync_shared_state_locked()
+
+
+def snapshot_model(publish: bool = False):
+    """
+    Save the full model and drop the journal records it now covers
+
+    publish=True announces a new base model to the other worker processes.
+    Saving moves the feedback history to the new version, so a fork is saved
+    and then published in place of the model readers may still hold.
+    """
+    global model
+    with feedback_lock, journal.exclusive():
+        if publish:
+            _sync_journal_locked()
+        else:
+            # Include other workers' feedback (or compaction would drop it), and
+            # never overwrite a model another worker published with a stale one
+            _sync_shared_state_locked()
+
+        with METRICS.time_stage("snapshot"):
+            snapshot = model.fork()
+            snapshot.save_model(MODEL_PATH)
+            journal.compact(snapshot.journal_seq)
+        model = snapshot
+        if publish and shared_state is not None:
+            shared_state.publish(model)
+
+
+def swap_in_trained_model(trained: AmICookedRLModel):
+    """Atomically replace the live base model, keeping the RL state and feedback"""
+    global model
+    with feedback_lock:
+        model = model.with_base_model(trained)
+    snapshot_model(publish=True)
+    print(f"Swapped in retrained model (test R² {model.current_score:.4f})")
+
+
+# Background /retrain jobs run in a worker process and swap in the result when validated
+training_jobs = TrainingJobManager(
+    on_trained=swap_in_trained_model,
+    min_test_r2=float(os.environ.get("AMICOOKED_RETRAIN_MIN_R2", "0.0")),
+)
+
+
+# Labelled feedback (with an actual grade) is fitted into the base model as extra
+# boosting stages once AMICOOKED_INCREMENTAL_EVERY_LABELS records are pending and/or
+# every AMICOOKED_INCREMENTAL_INTERVAL_SECONDS (0 disables either trigger)
+INCREMENTAL_EVERY_LABELS = int(os.environ.get("AMICOOKED_INCREMENTAL_EVERY_LABELS", "0"))
+INCREMENTAL_INTERVAL_SECONDS = float(os.environ.get("AMICOOKED_INCREMENTAL_INTERVAL_SECONDS", "0"))
+
+# Held while an incremental update is fitting, so triggers never overlap
+incremental_lock = threading.Lock()
+
+
+def run_incremental_update(n_estimators: Optional[int] = None) -> Optional[Dict]:
+    """
+    Extend the base model with the pending labelled feedback and swap it in
+
+    Fitting runs outside feedback_lock, on the model as it was when the update
+    started; the result is swapped in only if it lowered the MAE on held-out
+    labels and no retrain replaced that base model meanwhile. Returns the update
+    summary, or None if another update is running or too few labels are pending.
+    """
+    global model
+    if not incremental_lock.acquire(blocking=False):
+        return None
+    try:
+        sync_shared_state()
+        current = model
+        if not current.is_trained or not current.pending_labelled:
+            return None
+        kwargs = {} if n_estimators is None else {"n_estimators": n_estimators}
+        with METRICS.time_stage("incremental_update"):
+            result = current.extend_base_model(**kwargs)
+        if result is None:
+            return None
+
+        extended = result.pop("model")
+        if extended is None:
+            result["swapped"] = False
+            print(f"Kept base model: {result['samples']} labelled feedback records did not lower the "
+                  f"held-out MAE ({result['mae_before']:.3f} -> {result['mae_after']:.3f})")
+            return result
+        with feedback_lock:
+            if model.model_id != current.model_id:
+                result["swapped"] = False
+                return result
+            model = model.with_base_model(extended)
+        snapshot_model(publish=True)
+        result["swapped"] = True
+        result["model_version"] = model.model_version
+        print(f"Extended base model with {result['samples']} labelled feedback records "
+              f"(MAE {result['mae_before']:.3f} -> {result['mae_after']:.3f})")
+        return result
+    finally:
+        incremental_lock.release()
+
+
+def incremental_update_if_due():
+    """Incremental update once enough labelled feedback is pending"""
+    if INCREMENTAL_EVERY_LABELS > 0 and model.pending_labelled >= INCREMENTAL_EVERY_LABELS:
+        try:
+            run_incremental_update()
+        except Exception as e:
+            print(f"Incremental update failed: {e}")
+
+
+def run_incremental_schedule():
+    """Scheduler thread: incremental update every INCREMENTAL_INTERVAL_SECONDS"""
+    startup_complete.wait()
+    while True:
+        time.sleep(INCREMENTAL_INTERVAL_SECONDS)
+        try:
+            run_incremental_update()
+        except Exception as e:
+            print(f"Incremental update failed: {e}")
+
+
+def snapshot_if_due():
+    """Snapshot once enough feedback has accumulated in the journal"""
+    if journal.pending >= SNAPSHOT_EVERY:
+        snapshot_model()
+
+# Optional micro-batching of concurrent /predict requests into one vectorized call
+predict_batcher = (
+    MicroBatcher(
+        score_batch=lambda features_list: model.predict_scores(features_list),
+        max_batch_size=int(os.environ.get("AMICOOKED_MICROBATCH_MAX_SIZE", "32")),
+        max_wait_us=int(os.environ.get("AMICOOKED_MICROBATCH_MAX_WAIT_US", "1000")),
+    )
+    if os.environ.get("AMICOOKED_MICROBATCH", "0") == "1" else None
+)
+
+# Gauges read from the live model when /metrics is scraped
+METRICS.register_gauge("ready", "1 once startup has finished with a trained model",
+                       lambda: startup_complete.is_set() and model.is_trained)
+METRICS.register_gauge("model_version", "Base model version (bumped on every (re)train)",
+                       lambda: model.model_version)
+METRICS.register_gauge("q_table_size", "States in the RL Q-table", lambda: len(model.rl_layer.q_table))
+METRICS.register_gauge("feedback_history_size", "Feedback records held by the model",
+                       lambda: len(model.feedback_history))
+METRICS.register_gauge("journal_pending_records", "Journal records not yet covered by a snapshot",
+                       lambda: journal.pending)
+METRICS.register_gauge("prediction_cache_entries", "Entries in the prediction cache",
+                       lambda: model.prediction_cache.stats()["size"])
+
+
+def _prediction_cache_lookups() -> Dict:
+    stats = model.prediction_cache.stats()
+    return {(("result", "hit"),): stats["hits"], (("result", "miss"),): stats["misses"]}
+
+
+METRICS.register_gauge("prediction_cache_lookups", "Prediction cache lookups by result",
+                       _prediction_cache_lookups, kind="counter")
+if predict_batcher is not None:
+    METRICS.register_histogram("microbatch_size", "Requests scored per /predict micro-batch",
+                               predict_batcher.batch_sizes)
+    METRICS.register_histogram("microbatch_queue_depth", "Queued /predict requests seen on arrival",
+                               predict_batcher.queue_depth)
+
+# Opt-in sampling profiler for handlers (AMICOOKED_PROFILE_SAMPLE_RATE / AMICOOKED_PROFILE_SLOW_MS,
+# or PUT /admin/profiling); writes collapsed stacks under AMICOOKED_PROFILE_DIR
+profiler = RequestProfiler.from_env()
+
+# Admin endpoints require this token in the X-Admin-Token header (disabled when it is unset)
+ADMIN_TOKEN = os.environ.get("AMICOOKED_ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set AMICOOKED_ADMIN_TOKEN")
+    if x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Admin-Token")
 
 # Training lock to prevent concurrent retraining
 training_lock = threading.Lock()
 
+# Upper bound on students scored by a single POST /predict/batch call
+MAX_BATCH_SIZE = 10000
+
 
 class StudentFeatures(BaseModel):
     """Input features for scoring - Portugal student dataset
@@ -80,9 +447,12 @@ class StudentFeatures(BaseModel):
     @classmethod
     def normalize_inputs(cls, data: Any) -> Any:
         if isinstance(data, dict):
+            # Only numbers are rescaled; other values are left for field validation to reject
+            numeric = {key for key, value in data.items() if isinstance(value, (int, float))}
+
             # Normalize studytime (raw hours to 1-4 scale)
             # 1: <2h, 2: 2-5h, 3: 5-10h, 4: >10h
-            if 'studytime' in data and data['studytime'] is not None:
+            if 'studytime' in numeric:
                 val = data['studytime']
                 # Assume any input is raw hours since we expect unnormalized data
                 if val < 2:
@@ -96,7 +466,7 @@ class StudentFeatures(BaseModel):
             
             # Normalize traveltime (raw minutes to 1-4 scale)
             # 1: <15m, 2: 15-30m, 3: 30-60m, 4: >60m
-            if 'traveltime' in data and data['traveltime'] is not None:
+            if 'traveltime' in numeric:
                 val = data['traveltime']
                 if val < 15:
                     data['traveltime'] = 1
@@ -108,34 +478,41 @@ class StudentFeatures(BaseModel):
                     data['traveltime'] = 4
             
             # Clamp values
-            if 'failures' in data and data['failures'] is not None:
+            if 'failures' in numeric:
                 data['failures'] = min(data['failures'], 4)
             
-            if 'absences' in data and data['absences'] is not None:
+            if 'absences' in numeric:
                 data['absences'] = min(data['absences'], 93)
                 
-            if 'G1' in data and data['G1'] is not None:
+            if 'G1' in numeric:
                 data['G1'] = min(round(data['G1'] / 5), 20)
                 
-            if 'G2' in data and data['G2'] is not None:
+            if 'G2' in numeric:
                 data['G2'] = min(round(data['G2'] / 5), 20)
             
             # Clamp age (15-22)
-            if 'age' in data and data['age'] is not None:
+            if 'age' in numeric:
                 data['age'] = max(15, min(data['age'], 22))
                 
             # Clamp 0-4 scale features
             for field in ['Medu', 'Fedu']:
-                if field in data and data[field] is not None:
+                if field in numeric:
                     data[field] = max(0, min(data[field], 4))
             
             # Clamp 1-5 scale features
             for field in ['famrel', 'freetime', 'goout', 'Dalc', 'Walc', 'health']:
-                if field in data and data[field] is not None:
+                if field in numeric:
                     data[field] = max(1, min(data[field], 5))
                 
         return data
 
+    @model_validator(mode='wrap')
+    @classmethod
+    def record_validation_time(cls, data: Any, handler) -> Any:
+        # Defined last so it wraps the whole validation, including normalize_inputs
+        with METRICS.time_stage("validation"):
+            return handler(data)
+
     model_config = ConfigDict(
         json_schema_extra={
             "example": {
@@ -156,12 +533,103 @@ class StudentFeatures(BaseModel):
     )
 
 
+class Explanation(BaseModel):
+    """What drives a prediction: expected grade + contributions = predicted grade (0-20)"""
+    expected_grade: float = Field(..., description="Average base model grade over the training data")
+    predicted_grade: float = Field(..., description="Base model grade for this student, before the RL adjustment")
+    contributions: Dict[str, float] = Field(
+        ..., description="Grade points each feature adds (positive = less cooked)"
+    )
+
+
 class ScoreResponse(BaseModel):
     """Response with AmICooked score"""
     score: int = Field(..., ge=1, le=10, description="AmICooked score (1=Chilling, 10=Cooked)")
     label: str = Field(..., description="Human-readable label")
     message: str = Field(..., description="Detailed message")
     confidence: Optional[str] = Field(None, description="Model confidence indicator")
+    explanation: Optional[Explanation] = Field(None, description="Feature contributions (with ?explain=true)")
+
+
+class BatchPredictRequest(BaseModel):
+    """Batch of student profiles to score in one call"""
+    # Items are validated one by one in the handler, so one bad item only fails itself
+    students: List[Any] = Field(
+        ...,
+        max_length=MAX_BATCH_SIZE,
+        description="Student feature dicts, each in the same format as POST /predict"
+    )
+    explain: bool = Field(False, description="Include per-feature contributions for each student")
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "students": [
+                    {"studytime": 3, "absences": 4, "failures": 0, "G1": 14, "G2": 15},
+                    {"studytime": 1, "absences": 20, "failures": 2, "G1": 8, "G2": 9}
+                ]
+            }
+        }
+    )
+
+
+ControllableFeature = Literal["studytime", "absences", "goout", "Dalc", "Walc", "freetime", "paid", "activities"]
+
+
+class WhatIfRequest(BaseModel):
+    """A base profile and the controllable features to vary"""
+    features: StudentFeatures = Field(..., description="Base profile, in the same format as POST /predict")
+    vary: Optional[List[ControllableFeature]] = Field(
+        None, description="Features to sweep (default: every controllable feature)"
+    )
+    values: Dict[ControllableFeature, List[Union[int, float, str]]] = Field(
+        default_factory=dict,
+        description="Values to try per feature, on the model's scale (studytime 1-4, ratings 1-5, "
+                    "absences 0-93, yes/no); features without values use the default range"
+    )
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "features": {"studytime": 3, "absences": 10, "G1": 12, "G2": 12, "goout": 4},
+                "vary": ["studytime", "absences", "goout"],
+                "values": {"absences": [0, 5, 10, 20]}
+            }
+        }
+    )
+
+
+class WhatIfPoint(BaseModel):
+    """Score with one feature set to one value"""
+    value: Union[int, float, str]
+    score: int = Field(..., ge=1, le=10)
+    label: str
+
+
+class WhatIfResponse(BaseModel):
+    """Score curves across each varied feature's range"""
+    baseline_score: int = Field(..., ge=1, le=10, description="Score of the unchanged profile")
+    baseline_label: str
+    sweeps: Dict[str, List[WhatIfPoint]]
+
+
+class BatchScoreItem(BaseModel):
+    """Score (or validation error) for one student in a batch"""
+    index: int = Field(..., description="Position of the student in the request")
+    score: Optional[int] = Field(None, ge=1, le=10, description="AmICooked score (1=Chilling, 10=Cooked)")
+    label: Optional[str] = Field(None, description="Human-readable label")
+    message: Optional[str] = Field(None, description="Detailed message")
+    confidence: Optional[str] = Field(None, description="Model confidence indicator")
+    error: Optional[str] = Field(None, description="Why this student could not be scored")
+    explanation: Optional[Explanation] = Field(None, description="Feature contributions (with explain=true)")
+
+
+class BatchScoreResponse(BaseModel):
+    """Response with AmICooked scores for a batch, in request order"""
+    results: List[BatchScoreItem]
+    total: int
+    succeeded: int
+    failed: int
 
 
 class FeedbackRequest(BaseModel):
@@ -172,6 +640,10 @@ class FeedbackRequest(BaseModel):
         ...,
         description="Feedback: 'true' (correct), 'higher' (should be more cooked), 'lower' (should be less cooked)"
     )
+    actual_grade: Optional[float] = Field(
+        None, ge=0, le=20,
+        description="Final grade (0-20) the student actually got, if known; used to extend the base model"
+    )
 
     model_config = ConfigDict(
         json_schema_extra={
@@ -198,6 +670,19 @@ class FeedbackResponse(BaseModel):
     rl_stats: Dict
 
 
+class ProfilingSettings(BaseModel):
+    """Profiler settings to change; omitted fields keep their current value"""
+    sample_rate: Optional[float] = Field(None, ge=0, le=1, description="Fraction of requests to profile")
+    slow_ms: Optional[float] = Field(None, ge=0, description="Keep profiles of requests slower than this")
+    interval_ms: Optional[float] = Field(None, gt=0, description="Stack sampling interval")
+
+
+class ReplayRequest(BaseModel):
+    """Q-learning parameters for a feedback replay; omitted fields keep the current value"""
+    learning_rate: Optional[float] = Field(None, gt=0, le=1, description="New learning rate (alpha)")
+    discount_factor: Optional[float] = Field(None, ge=0, le=1, description="New discount factor (gamma)")
+
+
 class TrainingResponse(BaseModel):
     """Response from training operations"""
     success: bool
@@ -213,17 +698,46 @@ def read_root():
         "version": "3.0.0",
         "model": "Reinforcement Learning with Q-Learning Adjustment Layer",
         "description": "Uses base ML model + online RL learning from user feedback",
-        "endpoints": ["/predict", "/feedback", "/stats", "/train", "/average-stats"]
+        "endpoints": ["/predict", "/predict/batch", "/predict/what-if", "/feedback", "/stats", "/train", "/average-stats",
+                      "/health/live", "/health/ready", "/dataset/memory", "/engines"]
+    }
+
+
+@app.get("/health/live")
+def liveness():
+    """Liveness probe: the process is up and serving requests (even while the model loads)"""
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def readiness():
+    """
+    Readiness probe: 200 once the model is loaded, trained and warmed up, 503 before
+
+    The body reports the startup phase (starting, loading, training,
+    warming_up, ready, untrained or failed) and how long each step took.
+    """
+    ready = startup_complete.is_set() and model.is_trained
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "phase": startup_status["phase"],
+        "error": startup_status["error"],
+        "timings": startup_status["timings"],
     }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
 
 
 @app.post("/train", response_model=TrainingResponse)
+@profiler.profile
 def train_initial_model(background_tasks: BackgroundTasks):
     """
     Train the initial model on the student performance dataset.
-    This downloads the dataset and trains a Gradient Boosting model.
+    This loads the dataset and trains the base model with the configured
+    engine (AMICOOKED_BASE_ENGINE, Gradient Boosting by default).
     Call this once before making predictions.
     """
+    ensure_started()
+    sync_shared_state()
     if model.is_trained:
         return TrainingResponse(
             success=False,
@@ -234,8 +748,10 @@ def train_initial_model(background_tasks: BackgroundTasks):
     try:
         with training_lock:
             print("Starting initial training...")
-            results = model.load_and_train_initial_model()
-            model.save_model()
+            # Trained separately and swapped in, keeping the RL state and feedback
+            trained = AmICookedRLModel(model.engine)
+            results = trained.load_and_train_initial_model()
+            swap_in_trained_model(trained)
 
         return TrainingResponse(
             success=True,
@@ -246,30 +762,94 @@ def train_initial_model(background_tasks: BackgroundTasks):
         raise HTTPException(status_code=500, detail=f"Training error: {str(e)}")
 
 
-@app.post("/retrain", response_model=TrainingResponse)
-def retrain_model(background_tasks: BackgroundTasks):
+class RetrainRequest(BaseModel):
+    """Options for a background retrain"""
+    engine: Optional[str] = Field(None, description="Base model engine to train (see GET /engines); default: the live model's")
+
+
+@app.post("/retrain", response_model=TrainingResponse, status_code=202)
+@profiler.profile
+def retrain_model(request: Optional[RetrainRequest] = None):
     """
-    Retrain the base model on the student performance dataset.
+    Retrain the base model on the student performance dataset in the background.
     Useful if the underlying CSV data has changed.
     Preserves existing RL feedback history.
-    """
-    try:
-        with training_lock:
-            print("Starting retraining...")
-            results = model.load_and_train_initial_model()
-            model.save_model()
 
-        return TrainingResponse(
-            success=True,
-            message="Model successfully retrained on dataset",
-            details=results
+    Training runs in a separate worker process on a fresh model while the
+    current model keeps serving. Once the new model passes validation it is
+    swapped in atomically. Poll GET /retrain/{job_id} for progress. Pass
+    {"engine": ...} to switch to another base model engine.
+    """
+    ensure_started()
+    engine = request.engine if request is not None and request.engine else model.engine
+    if engine not in ENGINES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown engine '{engine}'. Available: {', '.join(sorted(ENGINES))}"
         )
+    try:
+        job = training_jobs.submit(engine)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Retraining error: {str(e)}")
 
+    return TrainingResponse(
+        success=True,
+        message=f"Retraining job {job.job_id} is {job.status}. Poll GET /retrain/{job.job_id} for status.",
+        details=job.to_dict()
+    )
+
+
+@app.get("/engines")
+def list_engines():
+    """Registered base model engines and the one the live model uses"""
+    return {
+        "current": model.engine,
+        "engines": {
+            name: {"description": engine.description, "incremental_updates": engine.stages_param is not None}
+            for name, engine in ENGINES.items()
+        },
+    }
+
+
+@app.get("/retrain/{job_id}")
+def get_retrain_status(job_id: str):
+    """Status of a background retraining job"""
+    job = training_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown retraining job: {job_id}")
+    return job.to_dict()
+
+
+def score_message(score: int) -> tuple[str, str]:
+    """Detailed message and confidence for a score (1 = best, 10 = worst)"""
+    if score <= 2:
+        return "You're doing excellent! Keep up the great work.", "High"
+    elif score <= 4:
+        return "You're on a good track. Stay consistent with your efforts.", "High"
+    elif score <= 6:
+        return "You're doing okay, but there's room for improvement. Consider studying more or getting additional support.", "Medium"
+    elif score <= 8:
+        return "This is concerning. You should significantly increase your study time and seek help.", "Medium"
+    else:
+        return "Critical situation! Immediate action needed - talk to teachers, get tutoring, and reassess your study habits.", "High"
+
+
+@profiler.profile
+def predict(current: AmICookedRLModel, features_dict: Dict[str, Any]) -> int:
+    """Score one student (the part of POST /predict that runs in the threadpool)"""
+    return current.predict_score(features_dict)
+
+
+def explain(current: AmICookedRLModel, features_list: List[Dict[str, Any]]) -> List[Dict]:
+    """Feature contributions, with unsupported base models reported as a client error"""
+    try:
+        return current.explain(features_list)
+    except TypeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 @app.post("/predict", response_model=ScoreResponse)
-def predict_score(features: StudentFeatures):
+async def predict_score(features: StudentFeatures, explain_score: bool = Query(False, alias="explain")):
     """
     Predict AmICooked score based on student features using ML model
 
@@ -279,8 +859,18 @@ def predict_score(features: StudentFeatures):
     - 5-6: Okay (room for improvement)
     - 7-8: Concerning (need help)
     - 9-10: Cooked (urgent attention needed)
+
+    With AMICOOKED_MICROBATCH=1, concurrent requests are scored together in
+    micro-batches (see MicroBatcher); otherwise each is scored in the threadpool.
+
+    With ?explain=true the response also holds the exact contribution of each
+    feature to the base model's predicted grade (TreeSHAP).
     """
-    if not model.is_trained:
+    ensure_started()
+    if shared_state is not None:
+        await run_in_threadpool(sync_shared_state)
+    current = model
+    if not current.is_trained:
         raise HTTPException(
             status_code=400,
             detail="Model not trained yet. Call POST /train first."
@@ -296,38 +886,145 @@ def predict_score(features: StudentFeatures):
         )
 
     try:
-        score = model.predict_score(features_dict)
-        label = model.get_score_label(score)
-
-        # Generate detailed message (1 = best, 10 = worst)
-        if score <= 2:
-            message = "You're doing excellent! Keep up the great work."
-            confidence = "High"
-        elif score <= 4:
-            message = "You're on a good track. Stay consistent with your efforts."
-            confidence = "High"
-        elif score <= 6:
-            message = "You're doing okay, but there's room for improvement. Consider studying more or getting additional support."
-            confidence = "Medium"
-        elif score <= 8:
-            message = "This is concerning. You should significantly increase your study time and seek help."
-            confidence = "Medium"
+        if predict_batcher is not None:
+            score = await predict_batcher.submit(features_dict)
         else:
-            message = "Critical situation! Immediate action needed - talk to teachers, get tutoring, and reassess your study habits."
-            confidence = "High"
+            score = await run_in_threadpool(predict, current, features_dict)
+        label = current.get_score_label(score)
+        message, confidence = score_message(score)
+        explanation = (await run_in_threadpool(explain, current, [features_dict]))[0] if explain_score else None
 
         return ScoreResponse(
             score=score,
             label=label,
             message=message,
-            confidence=confidence
+            confidence=confidence,
+            explanation=explanation
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
 
 
+@app.post("/predict/what-if", response_model=WhatIfResponse)
+@profiler.profile
+def predict_what_if(request: WhatIfRequest):
+    """
+    Score curves for "what if I changed this" questions
+
+    Each varied feature is set to every value of its range in turn, with the
+    rest of the profile unchanged. All variants are scored in a single batched
+    base model call with the RL adjustment applied, so a full sweep costs about
+    as much as one small POST /predict/batch.
+    """
+    ensure_started()
+    sync_shared_state()
+    current = model
+    if not current.is_trained:
+        raise HTTPException(
+            status_code=400,
+            detail="Model not trained yet. Call POST /train first."
+        )
+
+    features_dict = {k: v for k, v in request.features.model_dump().items() if v is not None}
+    vary = request.vary if request.vary is not None else list(WHAT_IF_RANGES)
+    sweeps = {name: request.values.get(name) for name in dict.fromkeys(vary + list(request.values))}
+
+    try:
+        result = current.what_if(features_dict, sweeps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    return WhatIfResponse(
+        baseline_score=result["baseline"],
+        baseline_label=current.get_score_label(result["baseline"]),
+        sweeps={
+            name: [WhatIfPoint(value=value, score=score, label=current.get_score_label(score))
+                   for value, score in points]
+            for name, points in result["sweeps"].items()
+        },
+    )
+
+
+@app.post("/predict/batch", response_model=BatchScoreResponse)
+@profiler.profile
+def predict_scores_batch(batch: BatchPredictRequest):
+    """
+    Predict AmICooked scores for many students in one call
+
+    Each student is validated exactly like POST /predict. Students that fail
+    validation get an error entry; the rest are scored together with a single
+    vectorized model call. Results are returned in request order. With
+    "explain": true each result also holds its feature contributions.
+    """
+    ensure_started()
+    sync_shared_state()
+    current = model
+    if not current.is_trained:
+        raise HTTPException(
+            status_code=400,
+            detail="Model not trained yet. Call POST /train first."
+        )
+
+    results: List[Optional[BatchScoreItem]] = [None] * len(batch.students)
+    valid_indices = []
+    valid_features = []
+
+    for index, raw_features in enumerate(batch.students):
+        try:
+            features = StudentFeatures.model_validate(raw_features)
+        except ValidationError as e:
+            errors = "; ".join(
+                f"{'.'.join(str(loc) for loc in err['loc']) or 'input'}: {err['msg']}"
+                for err in e.errors()
+            )
+            results[index] = BatchScoreItem(index=index, error=errors)
+            continue
+        except (TypeError, ValueError):
+            results[index] = BatchScoreItem(index=index, error="input: Invalid student features")
+            continue
+
+        features_dict = {k: v for k, v in features.model_dump().items() if v is not None}
+        if not features_dict:
+            results[index] = BatchScoreItem(index=index, error="At least one feature must be provided")
+            continue
+
+        valid_indices.append(index)
+        valid_features.append(features_dict)
+
+    try:
+        scores = current.predict_scores(valid_features)
+        explanations = explain(current, valid_features) if batch.explain else [None] * len(scores)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+
+    for index, score, explanation in zip(valid_indices, scores, explanations):
+        message, confidence = score_message(score)
+        results[index] = BatchScoreItem(
+            index=index,
+            score=score,
+            label=current.get_score_label(score),
+            message=message,
+            confidence=confidence,
+            explanation=explanation
+        )
+
+    return BatchScoreResponse(
+        results=results,
+        total=len(results),
+        succeeded=len(valid_indices),
+        failed=len(results) - len(valid_indices)
+    )
+
+
 @app.post("/feedback", response_model=FeedbackResponse)
-def submit_feedback(feedback_request: FeedbackRequest):
+@profiler.profile
+def submit_feedback(feedback_request: FeedbackRequest, background_tasks: BackgroundTasks):
     """
     Submit feedback on a prediction to improve the model via reinforcement learning
 
@@ -337,7 +1034,14 @@ def submit_feedback(feedback_request: FeedbackRequest):
     - "lower": The score should be lower/less cooked (negative reward, learn to decrease)
 
     The RL model learns immediately from each feedback using Q-learning.
+    Each event is appended to the feedback journal; the full model is
+    snapshotted in the background every SNAPSHOT_EVERY events. The update is
+    applied to a copy of the model that replaces the live one when done, so
+    concurrent predictions carry on with the previous state meanwhile.
     """
+    global model
+    ensure_started()
+    sync_shared_state()
     if not model.is_trained:
         raise HTTPException(
             status_code=400,
@@ -345,18 +1049,36 @@ def submit_feedback(feedback_request: FeedbackRequest):
         )
 
     try:
-        # Apply feedback to RL model (immediate online learning)
-        model.apply_feedback(
-            features=feedback_request.features,
-            predicted_score=feedback_request.predicted_score,
-            feedback=feedback_request.feedback
-        )
-
-        # Save updated model (includes RL Q-table)
-        model.save_model()
+        with feedback_lock, journal.exclusive():
+            # Feedback from other worker processes comes first, so every worker
+            # applies the same records in the same (journal) order
+            with METRICS.time_stage("journal_sync"):
+                _sync_journal_locked()
+
+            # Apply feedback to RL model (immediate online learning)
+            updated = model.fork()
+            with METRICS.time_stage("apply_feedback"):
+                rl_feedback = updated.apply_feedback(
+                    features=feedback_request.features,
+                    predicted_score=feedback_request.predicted_score,
+                    feedback=feedback_request.feedback,
+                    actual_grade=feedback_request.actual_grade
+                )
+
+            # Persist the event (the Q-table is rebuilt from snapshot + journal on startup),
+            # and only then publish it
+            with METRICS.time_stage("journal_append"):
+                updated.journal_seq = journal.append(rl_feedback)
+            model = updated
+        METRICS.inc("feedback", (("feedback", feedback_request.feedback),))
+
+        if journal.pending >= SNAPSHOT_EVERY:
+            background_tasks.add_task(snapshot_if_due)
+        if INCREMENTAL_EVERY_LABELS > 0 and updated.pending_labelled >= INCREMENTAL_EVERY_LABELS:
+            background_tasks.add_task(incremental_update_if_due)
 
         # Get current stats
-        stats = model.get_stats()
+        stats = updated.get_stats()
 
         return FeedbackResponse(
             message=f"Feedback '{feedback_request.feedback}' applied! Model learned from this interaction.",
@@ -376,22 +1098,157 @@ def submit_feedback(feedback_request: FeedbackRequest):
 
 
 @app.get("/stats")
+@profiler.profile
 def get_model_stats():
     """Get model performance statistics and metadata"""
-    stats = model.get_stats()
+    sync_shared_state()
+    current = model
+    stats = current.get_stats()
 
     return {
         "model_stats": stats,
-        "base_model_type": "Gradient Boosting Regressor",
+        "base_model_type": ENGINES[current.engine].description,
+        "base_model_engine": current.engine,
         "rl_layer": "Q-Learning Adjustment Layer",
         "learning_method": "Online Reinforcement Learning",
         "description": "Base model + RL layer that learns from each feedback in real-time",
-        "is_trained": model.is_trained,
-        "feedback_count": len(model.feedback_history)
+        "is_trained": current.is_trained,
+        "feedback_count": len(current.feedback_history),
+        "prediction_cache": current.prediction_cache.stats(),
+        "micro_batching": predict_batcher.stats() if predict_batcher is not None else None
     }
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Metrics in the Prometheus text exposition format
+
+    - amicooked_stage_duration_seconds: histograms per stage (validation,
+      prepare_features, base_predict, rl_adjustment, apply_feedback, journal
+      append/sync, snapshot, explain; batch_* for vectorized scoring)
+    - amicooked_http_request_duration_seconds: latency per route and status
+    - amicooked_feedback_total: feedback received, by type
+    - gauges for the Q-table, feedback history, journal and prediction cache
+
+    With several workers, each process reports its own metrics.
+    """
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/admin/profiling", dependencies=[Depends(require_admin)])
+def get_profiling():
+    """Profiler settings and the most recent profile files"""
+    return profiler.stats()
+
+
+@app.put("/admin/profiling", dependencies=[Depends(require_admin)])
+def update_profiling(settings: ProfilingSettings):
+    """
+    Turn request profiling on or off at runtime (this worker process only)
+
+    - sample_rate: profile this fraction of requests (0 disables)
+    - slow_ms: trace every request and keep those slower than this; send
+      null explicitly to disable the threshold
+
+    Profiles are collapsed stacks (one "frame;frame;... count" line per
+    stack), ready for flamegraph.pl or speedscope.
+    """
+    changes = settings.model_dump(exclude_unset=True)
+    profiler.configure(**changes)
+    return profiler.stats()
+
+
+@app.post("/admin/replay-feedback", dependencies=[Depends(require_admin)])
+@profiler.profile
+def replay_feedback_history(request: ReplayRequest):
+    """
+    Rebuild the RL Q-table by replaying the whole feedback history
+
+    Base scores are recomputed with the current base model in one batched
+    pass and the feedback is re-applied in order to a fresh Q-table, with new
+    learning rate / discount factor if given. The result is snapshotted and
+    published to the other workers. (Offline: python api/rl_replay.py)
+    """
+    global model
+    ensure_started()
+    started = time.perf_counter()
+    with feedback_lock, journal.exclusive():
+        _sync_shared_state_locked()
+        if not model.is_trained:
+            raise HTTPException(
+                status_code=400,
+                detail="Model not trained yet. Call POST /train first."
+            )
+        try:
+            updated = model.fork()
+            summary = updated.replay_feedback(request.learning_rate, request.discount_factor)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Replay error: {str(e)}")
+        model = updated
+    snapshot_model(publish=True)
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+class IncrementalUpdateRequest(BaseModel):
+    """Settings for one incremental base model update"""
+    n_estimators: Optional[int] = Field(None, ge=1, le=500, description="Boosting stages to add (default AMICOOKED_INCREMENTAL_ESTIMATORS)")
+
+
+@app.post("/admin/incremental-update", dependencies=[Depends(require_admin)])
+@profiler.profile
+def incremental_update(request: IncrementalUpdateRequest):
+    """
+    Fit the labelled feedback received since the last update into the base model
+
+    The gradient boosting ensemble is warm-started with extra stages fitted on
+    the new labelled records only, so the cost grows with the new feedback, not
+    the training set. The RL layer and feedback history are kept. Nothing is
+    fitted until AMICOOKED_INCREMENTAL_MIN_LABELS labels are pending, and the
+    extended model is only swapped in if it lowers the MAE on held-out labels.
+    """
+    ensure_started()
+    if not model.is_trained:
+        raise HTTPException(
+            status_code=400,
+            detail="Model not trained yet. Call POST /train first."
+        )
+    pending = model.pending_labelled
+    try:
+        result = run_incremental_update(request.n_estimators)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Incremental update error: {str(e)}")
+    if result is None:
+        if incremental_lock.locked():
+            raise HTTPException(status_code=409, detail="An incremental update is already running")
+        return {"samples": 0, "swapped": False, "pending_labelled": pending, "min_labels": INCREMENTAL_MIN_LABELS}
+    return result
+
+
+@app.get("/dataset/memory")
+@profiler.profile
+def get_dataset_memory():
+    """
+    Memory report for the training data
+
+    - columnar_cache: the parsed dataset as compact columns, per column, compared
+      with the same CSV parsed with default pandas dtypes
+    - training_data: the DataFrame held by the live model
+    """
+    ensure_started()
+    try:
+        report = {"columnar_cache": load_dataset(DATASET_PATH).memory_report()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error reading dataset: {str(e)}")
+
+    training_data = model.training_data
+    report["training_data"] = dataframe_memory_report(training_data) if training_data is not None else None
+    return report
+
+
 @app.get("/rl-q-table")
+@profiler.profile
 def get_rl_q_table():
     """
     Get the Q-table from the RL adjustment layer
@@ -400,135 +1257,189 @@ def get_rl_q_table():
     State: predicted score
     Action: adjustment (-2, -1, 0, +1, +2)
     """
-    if not model.is_trained:
+    ensure_started()
+    sync_shared_state()
+    current = model
+    if not current.is_trained:
         raise HTTPException(
             status_code=400,
             detail="Model not trained yet. Call POST /train first."
         )
 
     try:
+        layer = current.rl_layer
         q_table_dict = {}
-        for state, actions in model.rl_layer.q_table.items():
+        for state, actions in layer.q_table.items():
             q_table_dict[state] = dict(actions)
 
         return {
             "q_table": q_table_dict,
             "description": "Q-values for each state-action pair",
             "total_states": len(q_table_dict),
-            "actions": model.rl_layer.actions,
-            "learning_rate": model.rl_layer.learning_rate,
-            "discount_factor": model.rl_layer.discount_factor,
-            "epsilon": model.rl_layer.epsilon
+            "actions": layer.actions,
+            "learning_rate": layer.learning_rate,
+            "discount_factor": layer.discount_factor,
+            "epsilon": layer.epsilon
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting Q-table: {str(e)}")
 
 
+def compute_average_params(df) -> Dict[str, Any]:
+    """Mean values for numeric features and modes/percentages for categorical ones"""
+    numeric_features = [
+        'age', 'Medu', 'Fedu', 'traveltime', 'studytime', 'failures',
+        'famrel', 'freetime', 'goout', 'Dalc', 'Walc', 'health', 'absences', 'G1', 'G2'
+    ]
+
+    average_params = {}
+    for feature in numeric_features:
+        if feature in df.columns:
+            average_params[feature] = float(df[feature].mean())
+
+    # For yes/no categorical features, calculate percentage and mode
+    yesno_features = [
+        'schoolsup', 'famsup', 'paid', 'activities', 'nursery',
+        'higher', 'internet', 'romantic'
+    ]
+    for feature in yesno_features:
+        if feature in df.columns:
+            # Calculate percentage of "yes"
+            yes_count = (df[feature] == 'yes').sum()
+            average_params[f"{feature}_yes_percentage"] = float(yes_count / len(df) * 100)
+            # Get mode (most common value)
+            mode_val = df[feature].mode()
+            average_params[feature] = mode_val[0] if len(mode_val) > 0 else None
+
+    # For other categorical features, get mode
+    other_categorical = ['sex', 'address', 'famsize', 'Pstatus', 'Mjob', 'Fjob']
+    for feature in other_categorical:
+        if feature in df.columns:
+            mode_val = df[feature].mode()
+            average_params[feature] = mode_val[0] if len(mode_val) > 0 else None
+
+    return average_params
+
+
+# Cached /average-stats results. Dataset averages depend only on the training data;
+# the score summary also depends on the base model and the Q-table state. Neither is
+# keyed on the model instance, since every feedback publishes a new one (see fork).
+_average_stats_lock = threading.Lock()
+_average_params_cache: Dict[str, Any] = {"training_data": None, "value": None}
+_average_stats_cache: Dict[str, Any] = {"key": None, "value": None}
+
+
+def _cached_average_params(current_model: AmICookedRLModel) -> Dict[str, Any]:
+    """Dataset averages and per-student feature dicts, recomputed only after (re)training"""
+    cache = _average_params_cache
+    df = current_model.training_data
+    if cache["training_data"] is not df:
+        cache["value"] = {
+            "average_person_params": compute_average_params(df),
+            "students": df[current_model.feature_names].to_dict("records"),
+            "sample_size": len(df),
+        }
+        cache["training_data"] = df
+    return cache["value"]
+
+
+def compute_average_stats(current_model: AmICookedRLModel) -> Dict[str, Any]:
+    """Score every student in the training data with one batched prediction"""
+    params = _cached_average_params(current_model)
+
+    # Calculate average cooked score by running model on all students
+    predictions = current_model.predict_scores(params["students"])
+
+    average_cooked_score = float(np.mean(predictions)) if predictions else None
+    median_cooked_score = float(np.median(predictions)) if predictions else None
+
+    # Score distribution
+    score_distribution = {}
+    if predictions:
+        counts = np.bincount(predictions, minlength=11)
+        for score in range(1, 11):
+            score_distribution[score] = int(counts[score])
+
+    return {
+        "average_cooked_score": average_cooked_score,
+        "median_cooked_score": median_cooked_score,
+        "score_distribution": score_distribution,
+        "average_person_params": params["average_person_params"],
+        "sample_size": params["sample_size"],
+        "successful_predictions": len(predictions)
+    }
+
+
 @app.get("/average-stats")
+@profiler.profile
 def get_average_stats():
     """
     Get average cooked score and average student parameters from the training dataset
 
+    Results are cached and only recomputed after the base model is retrained
+    or the Q-table changes (/train, /retrain, /feedback, /reset-model).
+
     Returns:
     - average_cooked_score: Mean score when running the model on all students
     - average_person_params: Mean values for all student features
     - sample_size: Number of students in the dataset
     """
-    if not model.is_trained:
+    ensure_started()
+    sync_shared_state()
+    current_model = model
+
+    if not current_model.is_trained:
         raise HTTPException(
             status_code=400,
             detail="Model not trained yet. Call POST /train first."
         )
 
-    if model.training_data is None:
+    if current_model.training_data is None:
         raise HTTPException(
             status_code=500,
             detail="Training data not available"
         )
 
     try:
-        # Get the training data
-        df = model.training_data.copy()
-
-        # Calculate average parameters for numeric features
-        numeric_features = [
-            'age', 'Medu', 'Fedu', 'traveltime', 'studytime', 'failures',
-            'famrel', 'freetime', 'goout', 'Dalc', 'Walc', 'health', 'absences', 'G1', 'G2'
-        ]
-
-        average_params = {}
-        for feature in numeric_features:
-            if feature in df.columns:
-                average_params[feature] = float(df[feature].mean())
-
-        # For yes/no categorical features, calculate percentage and mode
-        yesno_features = [
-            'schoolsup', 'famsup', 'paid', 'activities', 'nursery',
-            'higher', 'internet', 'romantic'
-        ]
-        for feature in yesno_features:
-            if feature in df.columns:
-                # Calculate percentage of "yes"
-                yes_count = (df[feature] == 'yes').sum()
-                average_params[f"{feature}_yes_percentage"] = float(yes_count / len(df) * 100)
-                # Get mode (most common value)
-                mode_val = df[feature].mode()
-                average_params[feature] = mode_val[0] if len(mode_val) > 0 else None
-
-        # For other categorical features, get mode
-        other_categorical = ['sex', 'address', 'famsize', 'Pstatus', 'Mjob', 'Fjob']
-        for feature in other_categorical:
-            if feature in df.columns:
-                mode_val = df[feature].mode()
-                average_params[feature] = mode_val[0] if len(mode_val) > 0 else None
-
-        # Calculate average cooked score by running model on all students
-        predictions = []
-        for idx, row in df.iterrows():
-            # Build feature dict for each student
-            student_features = {}
-            for feature in model.feature_names:
-                if feature in row:
-                    student_features[feature] = row[feature]
-
-            # Predict score
-            try:
-                score = model.predict_score(student_features)
-                predictions.append(score)
-            except Exception as e:
-                # Skip if prediction fails for this student
-                continue
-
-        average_cooked_score = float(np.mean(predictions)) if predictions else None
-        median_cooked_score = float(np.median(predictions)) if predictions else None
-
-        # Score distribution
-        score_distribution = {}
-        if predictions:
-            for score in range(1, 11):
-                score_distribution[score] = int(sum(1 for s in predictions if s == score))
-
-        return {
-            "average_cooked_score": average_cooked_score,
-            "median_cooked_score": median_cooked_score,
-            "score_distribution": score_distribution,
-            "average_person_params": average_params,
-            "sample_size": len(df),
-            "successful_predictions": len(predictions)
-        }
+        with _average_stats_lock:
+            cache = _average_stats_cache
+            layer = current_model.rl_layer
+            key = (current_model.model_id, current_model.model_version, layer.lineage, layer.version)
+            if cache["key"] != key:
+                cache["value"] = compute_average_stats(current_model)
+                cache["key"] = key
+            return cache["value"]
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating averages: {str(e)}")
 
 
 @app.post("/reset-model")
+@profiler.profile
 def reset_model():
     """Reset model to untrained state (useful for testing)"""
+    ensure_started()
     global model
-    model = AmICookedRLModel()
-    model.save_model()
+    with feedback_lock, journal.exclusive():
+        reset = AmICookedRLModel()
+        journal.reset()
+        reset.save_model(MODEL_PATH)
+        model = reset
+        if shared_state is not None:
+            shared_state.publish(model)
     return {"message": "RL Model reset to untrained state. Call POST /train to train."}
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    if WORKERS > 1:
+        # Each worker imports the app by name; the first to start trains (if needed)
+        # while the others wait on the journal lock, then load its snapshot
+        uvicorn.run(
+            "ml_server:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=WORKERS,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+        )
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
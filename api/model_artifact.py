@@ -0,0 +1,252 @@
+import copy
+import json
+import os
+import shutil
+import threading
+import uuid
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+# Versioned artifact directory layout:
+#   <root>/CURRENT          name of the latest complete version
+#   <root>/v000001/...      one directory per save (see AmICookedRLModel.save_artifact)
+ARTIFACT_FORMAT = "amicooked-model"
+ARTIFACT_VERSION = 1
+MANIFEST_FILE = "model.json"
+CURRENT_FILE = "CURRENT"
+
+# Versions kept on disk; older ones are deleted after a save
+KEEP_VERSIONS = 2
+
+_MISSING = object()
+
+
+def json_default(value):
+    """Serialize numpy scalars that can appear in feature dicts"""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _identity(value):
+    return value
+
+
+class LazyFile:
+    """
+    A value stored in an artifact file, read on first use.
+
+    The file is opened right away, so the value stays readable even after its
+    version directory has been pruned by a later save.
+    """
+
+    def __init__(self, path, load: Callable[[Any], Any]):
+        self.path = Path(path)
+        self._load = load
+        self._file = open(self.path, "rb")
+        self._value = _MISSING
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        with self._lock:
+            if self._value is _MISSING:
+                self._file.seek(0)
+                self._value = self._load(self._file)
+                self._file.close()
+            return self._value
+
+    # Copies and pickles hold the loaded value itself
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self.get(), memo)
+
+    def __reduce__(self):
+        return _identity, (self.get(),)
+
+
+class LazyAttribute:
+    """Instance attribute that may hold a LazyFile, loaded on first access"""
+
+    def __set_name__(self, owner, name):
+        self.slot = f"_{name}"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        value = instance.__dict__.get(self.slot)
+        if isinstance(value, LazyFile):
+            value = value.get()
+            instance.__dict__[self.slot] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.slot] = value
+
+    def is_loaded(self, instance) -> bool:
+        return not isinstance(instance.__dict__.get(self.slot), LazyFile)
+
+
+class FeedbackHistory:
+    """
+    Feedback history backed by a JSONL file in a model artifact.
+
+    Records saved with the artifact stay on disk and are only read when the
+    history is iterated or indexed; records added since are kept in memory
+    until the next save. Its size in memory therefore does not grow with the
+    amount of feedback collected over the model's lifetime.
+    """
+
+    def __init__(self, path, saved_count: int, decode: Callable[[Dict], Any]):
+        self.path = Path(path)
+        self.saved_count = saved_count
+        self.decode = decode
+        self._file = open(self.path, "rb")  # Readable even after its version is pruned
+        self._lock = threading.Lock()
+        self._new: List[Any] = []
+
+    def append(self, record):
+        self._new.append(record)
+
+    def __len__(self) -> int:
+        return self.saved_count + len(self._new)
+
+    def _saved_lines(self) -> List[bytes]:
+        with self._lock:
+            self._file.seek(0)
+            return self._file.read().splitlines()[:self.saved_count]
+
+    def __iter__(self) -> Iterator[Any]:
+        for line in self._saved_lines():
+            yield self.decode(json.loads(line))
+        yield from list(self._new)
+
+    def since(self, start: int) -> List[Any]:
+        """Records from position `start` on (only those lines are decoded)"""
+        records = [self.decode(json.loads(line)) for line in self._saved_lines()[start:]]
+        return records + list(self._new[max(0, start - self.saved_count):])
+
+    def __getitem__(self, index):
+        if isinstance(index, int) and -len(self._new) <= index < 0:
+            return self._new[index]
+        return list(self)[index]
+
+    def fork(self) -> "FeedbackHistory":
+        """Copy that can be appended to independently (the saved file is shared, not copied)"""
+        forked = FeedbackHistory.__new__(FeedbackHistory)
+        forked.__dict__.update(self.__dict__)
+        forked._new = list(self._new)
+        return forked
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return list, (list(self),)
+
+    @staticmethod
+    def write(records: Iterable[Any], path, append_to: Optional["FeedbackHistory"] = None) -> int:
+        """Write records as JSONL (after the saved part of `append_to`); returns the line count"""
+        count = 0
+        with open(path, "wb") as f:
+            if append_to is not None:
+                # The saved file holds exactly saved_count lines; copy it without parsing
+                with append_to._lock:
+                    append_to._file.seek(0)
+                    shutil.copyfileobj(append_to._file, f)
+                count = append_to.saved_count
+            for record in records:
+                f.write(json.dumps(asdict(record), default=json_default).encode("utf-8") + b"\n")
+                count += 1
+        return count
+
+    def save(self, path) -> int:
+        """Write the full history to path; returns the number of records"""
+        return self.write(list(self._new), path, append_to=self)
+
+    def rebased(self, path, saved_count: int) -> "FeedbackHistory":
+        """
+        History reading a newly saved copy, keeping only the records it does not hold
+
+        A new instance rather than an update in place, so readers of this one
+        (which may still read the old file) never see a half-moved history.
+        """
+        rebased = FeedbackHistory(path, saved_count, self.decode)
+        rebased._new = self._new[saved_count - self.saved_count:]
+        return rebased
+
+
+def link_or_copy(src: Path, dst: Path):
+    """Hard-link an unchanged file into a new version (copy where links are unsupported)"""
+    if src.is_dir():
+        dst.mkdir()
+        for child in src.iterdir():
+            link_or_copy(child, dst / child.name)
+        return
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def current_version(root) -> Optional[Path]:
+    """Directory of the latest complete version, or None if nothing was saved yet"""
+    root = Path(root)
+    try:
+        name = (root / CURRENT_FILE).read_text().strip()
+    except FileNotFoundError:
+        return None
+    return root / name
+
+
+def read_manifest(directory: Path) -> Dict:
+    with open(directory / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ValueError(f"{directory} is not a model artifact")
+    if manifest.get("format_version", 0) > ARTIFACT_VERSION:
+        raise ValueError(
+            f"Artifact format version {manifest['format_version']} is newer than supported ({ARTIFACT_VERSION})"
+        )
+    return manifest
+
+
+def write_manifest(directory: Path, manifest: Dict):
+    with open(directory / MANIFEST_FILE, "w") as f:
+        json.dump({"format": ARTIFACT_FORMAT, "format_version": ARTIFACT_VERSION, **manifest}, f, indent=2)
+
+
+def write_version(root, write: Callable[[Path, Optional[Path]], None]) -> Path:
+    """
+    Save a new artifact version
+
+    `write(directory, previous)` fills a fresh directory; `previous` is the
+    current version (or None), so unchanged files can be linked from it. The
+    version only becomes current once it is complete, so readers never see a
+    partial save. Writers must be serialized by the caller.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    previous = current_version(root)
+
+    tmp_dir = root / f".tmp-{os.getpid()}-{uuid.uuid4().hex}"
+    tmp_dir.mkdir()
+    try:
+        write(tmp_dir, previous)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    number = int(previous.name[1:]) + 1 if previous is not None else 1
+    directory = root / f"v{number:06d}"
+    os.rename(tmp_dir, directory)
+
+    tmp_current = root / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+    tmp_current.write_text(directory.name)
+    os.replace(tmp_current, root / CURRENT_FILE)
+
+    versions = sorted(p for p in root.iterdir() if p.is_dir() and p.name.startswith("v"))
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(old, ignore_errors=True)
+    return directory
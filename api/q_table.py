@@ -0,0 +1,212 @@
+import json
+import re
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+# Grid dimensions: score 1-10, studytime/failures slot 0 = not provided, 1-5 = value 0-4
+N_SCORES = 10
+N_SLOTS = 6
+MAX_SLOT_VALUE = N_SLOTS - 2
+
+_STATE_KEY_PATTERN = re.compile(r"^score_(?P<score>.+?)(?:_st(?P<st>.+?))?(?:_f(?P<f>.+))?$")
+
+# A state is either a grid index (score, studytime slot, failures slot) or, for
+# values that do not fit the grid, its string state key
+StateLocator = Union[Tuple[int, int, int], str]
+
+
+def _slot(value) -> Optional[int]:
+    """Grid slot for a studytime/failures value, or None if it does not fit the grid"""
+    if isinstance(value, (int, np.integer)) and not isinstance(value, (bool, np.bool_)):
+        if 0 <= value <= MAX_SLOT_VALUE:
+            return int(value) + 1
+    return None
+
+
+def _score_index(score) -> Optional[int]:
+    """Grid index for a predicted score, or None if it does not fit the grid"""
+    if isinstance(score, (int, np.integer)) and not isinstance(score, (bool, np.bool_)):
+        if 1 <= score <= N_SCORES:
+            return int(score) - 1
+    return None
+
+
+def _parse_slot(text: Optional[str]) -> Optional[int]:
+    """Grid slot for a studytime/failures fragment of a state key"""
+    if text is None:
+        return 0
+    if text.isdigit():
+        return _slot(int(text))
+    return None
+
+
+class DenseQTable:
+    """
+    Q-table stored as a dense ndarray indexed by (score, studytime, failures, action).
+
+    The grid covers every state produced by normalized survey inputs. Values that
+    do not fit it (e.g. raw, unnormalized feedback features) fall back to a small
+    sparse table keyed by the original string state key, so learning behaviour is
+    unchanged. Reading a state never creates an entry; only updates mark a state
+    as visited.
+    """
+
+    def __init__(self, actions: List[int]):
+        self.actions = list(actions)
+        self.values = np.zeros((N_SCORES, N_SLOTS, N_SLOTS, len(self.actions)))
+        self.visited = np.zeros((N_SCORES, N_SLOTS, N_SLOTS), dtype=bool)
+        self.overflow: Dict[str, np.ndarray] = {}
+
+        # Per-state update counters, so cached predictions can tell when their state changed
+        self.state_versions = np.zeros((N_SCORES, N_SLOTS, N_SLOTS), dtype=np.int64)
+        self.overflow_versions: Dict[str, int] = {}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "state_versions" not in state:
+            self.state_versions = np.zeros((N_SCORES, N_SLOTS, N_SLOTS), dtype=np.int64)
+            self.overflow_versions = {}
+
+    @classmethod
+    def from_dict(cls, q_table: Dict[str, Dict[int, float]], actions: List[int]):
+        """Build from the legacy {state_key: {action: q}} representation"""
+        table = cls(actions)
+        for state, action_values in q_table.items():
+            row = np.array([action_values.get(action, 0.0) for action in table.actions], dtype=float)
+            if not row.any():
+                continue  # Entry created by a read, never updated
+            loc = table.locate_key(state)
+            if isinstance(loc, tuple):
+                table.values[loc] = row
+                table.visited[loc] = True
+            else:
+                table.overflow[loc] = row
+        return table
+
+    def copy(self) -> "DenseQTable":
+        """Independent copy (arrays and off-grid rows are copied)"""
+        table = DenseQTable.__new__(DenseQTable)
+        table.actions = list(self.actions)
+        table.values = self.values.copy()
+        table.visited = self.visited.copy()
+        table.state_versions = self.state_versions.copy()
+        table.overflow = {key: row.copy() for key, row in self.overflow.items()}
+        table.overflow_versions = dict(self.overflow_versions)
+        return table
+
+    def save(self, directory):
+        """Write the grid as .npy files and the off-grid states as JSON"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "values.npy", self.values)
+        np.save(directory / "visited.npy", self.visited)
+        np.save(directory / "state_versions.npy", self.state_versions)
+        with open(directory / "overflow.json", "w") as f:
+            json.dump({
+                "actions": self.actions,
+                "overflow": {key: row.tolist() for key, row in self.overflow.items()},
+                "overflow_versions": self.overflow_versions,
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode: Optional[str] = "c") -> "DenseQTable":
+        """
+        Read a table written by save()
+
+        The default copy-on-write mapping shares the grid's pages between
+        processes until a process updates a state.
+        """
+        directory = Path(directory)
+        with open(directory / "overflow.json") as f:
+            meta = json.load(f)
+        table = cls(meta["actions"])
+        for name in ("values", "visited", "state_versions"):
+            setattr(table, name, np.asarray(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode)))
+        table.overflow = {key: np.array(row, dtype=float) for key, row in meta["overflow"].items()}
+        table.overflow_versions = meta["overflow_versions"]
+        return table
+
+    def locate(self, score, studytime=None, failures=None,
+               has_studytime: bool = False, has_failures: bool = False) -> StateLocator:
+        """Locate the state for a score and optional studytime/failures values"""
+        score_index = _score_index(score)
+        st_slot = _slot(studytime) if has_studytime else 0
+        f_slot = _slot(failures) if has_failures else 0
+        if score_index is not None and st_slot is not None and f_slot is not None:
+            return (score_index, st_slot, f_slot)
+
+        key = f"score_{score}"
+        if has_studytime:
+            key += f"_st{studytime}"
+        if has_failures:
+            key += f"_f{failures}"
+        return key
+
+    def locate_key(self, state: str) -> StateLocator:
+        """Locate the state for a legacy string state key"""
+        match = _STATE_KEY_PATTERN.match(state)
+        if match and match.group("score").isdigit():
+            score_index = _score_index(int(match.group("score")))
+            st_slot = _parse_slot(match.group("st"))
+            f_slot = _parse_slot(match.group("f"))
+            if score_index is not None and st_slot is not None and f_slot is not None:
+                return (score_index, st_slot, f_slot)
+        return state
+
+    def key_for(self, loc: StateLocator) -> str:
+        """String state key for a locator (the format used by get_state_key)"""
+        if isinstance(loc, str):
+            return loc
+        score_index, st_slot, f_slot = loc
+        key = f"score_{score_index + 1}"
+        if st_slot:
+            key += f"_st{st_slot - 1}"
+        if f_slot:
+            key += f"_f{f_slot - 1}"
+        return key
+
+    def get(self, loc: StateLocator) -> np.ndarray:
+        """Q-values for every action in a state (zeros for unseen states)"""
+        if isinstance(loc, tuple):
+            return self.values[loc]
+        row = self.overflow.get(loc)
+        return row if row is not None else np.zeros(len(self.actions))
+
+    def set(self, loc: StateLocator, action_index: int, value: float):
+        """Set one Q-value and mark the state as visited"""
+        if isinstance(loc, tuple):
+            self.values[loc + (action_index,)] = value
+            self.visited[loc] = True
+            self.state_versions[loc] += 1
+        else:
+            row = self.overflow.setdefault(loc, np.zeros(len(self.actions)))
+            row[action_index] = value
+            self.overflow_versions[loc] = self.overflow_versions.get(loc, 0) + 1
+
+    def set_row(self, loc: StateLocator, values: np.ndarray, updates: int = 1):
+        """Set every Q-value of a state at once, counting it as `updates` updates"""
+        if isinstance(loc, tuple):
+            self.values[loc] = values
+            self.visited[loc] = True
+            self.state_versions[loc] += updates
+        else:
+            self.overflow[loc] = np.array(values, dtype=float)
+            self.overflow_versions[loc] = self.overflow_versions.get(loc, 0) + updates
+
+    def version_of(self, loc: StateLocator) -> int:
+        """Number of updates a state has received"""
+        if isinstance(loc, tuple):
+            return int(self.state_versions[loc])
+        return self.overflow_versions.get(loc, 0)
+
+    def items(self) -> Iterator[Tuple[str, Dict[int, float]]]:
+        """Yield (state_key, {action: q}) for every visited state"""
+        for loc in zip(*np.nonzero(self.visited)):
+            loc = tuple(int(i) for i in loc)
+            yield self.key_for(loc), dict(zip(self.actions, self.values[loc].tolist()))
+        for key, row in self.overflow.items():
+            yield key, dict(zip(self.actions, row.tolist()))
+
+    def __len__(self) -> int:
+        return int(self.visited.sum()) + len(self.overflow)
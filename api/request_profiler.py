@@ -0,0 +1,224 @@
+import functools
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+_UNSET = object()
+
+
+class _Trace:
+    """Stack samples collected for one request"""
+
+    __slots__ = ("name", "sampled", "thread_id", "frame", "started", "stacks")
+
+    def __init__(self, name: str, sampled: bool, frame):
+        self.name = name
+        self.sampled = sampled
+        self.thread_id = threading.get_ident()
+        self.frame = frame
+        self.started = time.perf_counter()
+        self.stacks: Counter = Counter()
+
+
+class RequestProfiler:
+    """
+    Opt-in sampling profiler for request handlers.
+
+    Handlers wrapped with profile() are traced when either a random fraction
+    of requests is selected (sample_rate) or a latency threshold is set
+    (slow_ms, which traces every request and keeps only the slow ones). While
+    any request is traced, a background thread samples the stack of each
+    traced request's thread every `interval_ms` milliseconds (in practice no
+    finer than the interpreter's switch interval, 5ms by default, while the
+    handler holds the GIL). Requests that end before the first sample leave
+    no profile.
+
+    Kept traces are written as collapsed stacks ("frame;frame;frame count" per
+    line, the input format of flamegraph.pl and speedscope) to `directory`,
+    which is rotated to the newest `max_files` files. Only the frames below
+    the handler are recorded, so concurrent requests do not mix.
+    """
+
+    def __init__(self, directory: str = "api/profiles", sample_rate: float = 0.0,
+                 slow_ms: Optional[float] = None, interval_ms: float = 5.0, max_files: int = 200):
+        self.directory = Path(directory)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._active = threading.Condition(self._lock)
+        self._traces: Dict[int, _Trace] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self.written = 0
+        self.sample_rate = 0.0
+        self.slow_ms: Optional[float] = None
+        self.interval_ms = 5.0
+        self.configure(sample_rate=sample_rate, slow_ms=slow_ms, interval_ms=interval_ms)
+
+    def configure(self, sample_rate: Optional[float] = None, slow_ms: Any = _UNSET,
+                  interval_ms: Optional[float] = None):
+        """Change settings at runtime; omitted arguments keep their value (slow_ms=None disables it)"""
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+        if slow_ms is not _UNSET and slow_ms is not None and slow_ms < 0:
+            raise ValueError("slow_ms must not be negative")
+        if interval_ms is not None and interval_ms <= 0:
+            raise ValueError("interval_ms must be positive")
+
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        if slow_ms is not _UNSET:
+            self.slow_ms = slow_ms
+        if interval_ms is not None:
+            self.interval_ms = interval_ms
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        slow_ms = os.environ.get("AMICOOKED_PROFILE_SLOW_MS")
+        return cls(
+            directory=os.environ.get("AMICOOKED_PROFILE_DIR", "api/profiles"),
+            sample_rate=float(os.environ.get("AMICOOKED_PROFILE_SAMPLE_RATE", "0")),
+            slow_ms=float(slow_ms) if slow_ms else None,
+            interval_ms=float(os.environ.get("AMICOOKED_PROFILE_INTERVAL_MS", "5")),
+            max_files=int(os.environ.get("AMICOOKED_PROFILE_MAX_FILES", "200")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.slow_ms is not None
+
+    def profile(self, func: Callable) -> Callable:
+        """Decorator tracing a (sync or async) handler according to the current settings"""
+        name = func.__name__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                trace = self._start(name)
+                if trace is None:
+                    return await func(*args, **kwargs)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self._finish(trace)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = self._start(name)
+            if trace is None:
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._finish(trace)
+        return wrapper
+
+    def _start(self, name: str) -> Optional[_Trace]:
+        if not self.enabled:
+            return None
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+        if not sampled and self.slow_ms is None:
+            return None
+        # The wrapper's frame: samples are cut there so only the handler's stack is kept
+        trace = _Trace(name, sampled, sys._getframe(1))
+        with self._lock:
+            self._traces[id(trace)] = trace
+            if self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+                self._sampler.start()
+            self._active.notify()
+        return trace
+
+    def _finish(self, trace: _Trace):
+        elapsed_ms = (time.perf_counter() - trace.started) * 1000
+        with self._lock:
+            self._traces.pop(id(trace), None)
+        trace.frame = None
+
+        # With a threshold set every request is traced, but only slow ones are kept
+        slow = self.slow_ms is not None and elapsed_ms >= self.slow_ms
+        if (trace.sampled or slow) and trace.stacks:
+            self._write(trace, elapsed_ms)
+
+    def _sample_loop(self):
+        while True:
+            with self._lock:
+                while not self._traces:
+                    self._active.wait()
+            time.sleep(self.interval_ms / 1000)
+
+            frames = sys._current_frames()
+            with self._lock:
+                traces = list(self._traces.values())
+            for trace in traces:
+                stack = self._collapse(frames.get(trace.thread_id), trace.frame)
+                if stack:
+                    trace.stacks[stack] += 1
+
+    @staticmethod
+    def _collapse(frame, stop) -> Optional[str]:
+        """Frames from the handler down to `frame`, root first; None if the handler is not on the stack"""
+        if stop is None:
+            return None
+        names = []
+        while frame is not None and frame is not stop:
+            code = frame.f_code
+            names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        if frame is None:
+            return None  # The thread is running something else (e.g. a suspended async handler)
+        return ";".join(reversed(names))
+
+    def _write(self, trace: _Trace, elapsed_ms: float):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"{time.strftime('%Y%m%dT%H%M%S')}-{trace.name}-{int(elapsed_ms)}ms-{uuid.uuid4().hex[:8]}.collapsed"
+        lines = [f"{trace.name};{stack} {count}\n" for stack, count in trace.stacks.most_common()]
+        tmp_path = self.directory / f".{name}.tmp"
+        tmp_path.write_text("".join(lines))
+        os.replace(tmp_path, self.directory / name)
+        with self._lock:
+            self.written += 1
+        self._rotate()
+
+    def _rotate(self):
+        files = self.files()
+        for old in files[:-self.max_files] if self.max_files > 0 else files:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass  # Removed by another worker process
+
+    def files(self) -> List[Path]:
+        """Profile files, oldest first"""
+        entries = []
+        try:
+            for path in self.directory.iterdir():
+                if path.suffix == ".collapsed":
+                    try:
+                        entries.append((path.stat().st_mtime_ns, path.name, path))
+                    except FileNotFoundError:
+                        pass  # Rotated away by another worker process
+        except FileNotFoundError:
+            return []
+        return [path for _, _, path in sorted(entries)]
+
+    def stats(self) -> Dict[str, Any]:
+        files = self.files()
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "interval_ms": self.interval_ms,
+            "directory": str(self.directory),
+            "max_files": self.max_files,
+            "written": self.written,
+            "files": [p.name for p in files[-20:]],
+            "file_count": len(files),
+        }
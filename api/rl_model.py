@@ -1,8 +1,13 @@
 import numpy as np
 import pandas as pd
+import copy
+import json
+import os
 import pickle
+import time
+import uuid
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 from dataclasses import dataclass, field
 from datetime import datetime
 from collections import defaultdict
@@ -17,10 +22,74 @@ def _default_float():
     """Default float factory (pickle-compatible)"""
     return 0.0
 
-from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
 
+from feature_encoder import CompiledFeatureEncoder
+from q_table import DenseQTable, StateLocator
+from rolling_stats import RollingWindow, RunningStats
+from prediction_cache import PredictionCache
+from tree_engine import FlatTreeEnsemble
+from tree_shap import TreeShapExplainer
+from base_engines import DEFAULT_ENGINE, get_engine
+from dataset import DATASET_PATH, load_dataset
+from metrics import METRICS
+from rl_replay import replay_feedback, unique_features
+from model_artifact import (
+    FeedbackHistory, LazyAttribute, LazyFile, current_version, link_or_copy, read_manifest,
+    write_manifest, write_version,
+)
+
+# Number of recent feedback events kept for windowed statistics
+REWARD_WINDOW_SIZE = 1000
+
+# Largest batch scored with the flattened tree engine instead of sklearn
+ENGINE_MAX_BATCH = 64
+
+# Default model location: a versioned artifact directory (see model_artifact)
+DEFAULT_MODEL_PATH = "api/rl_model"
+
+# Artifact files derived from the trained base model, reused across saves until it changes
+BASE_MODEL_FILES = ("base_model.pkl", "training_data.pkl", "encoder.json", "engine")
+
+# Feedback events scored per batched base model call when replaying the history
+REPLAY_CHUNK_SIZE = 65536
+
+# Trees added to the base model per incremental update from labelled feedback
+INCREMENTAL_ESTIMATORS = int(os.environ.get("AMICOOKED_INCREMENTAL_ESTIMATORS", "10"))
+
+# Labelled records needed before an incremental update fits anything; every
+# INCREMENTAL_HOLDOUT_EVERY-th one is held out to check the update helps
+INCREMENTAL_MIN_LABELS = int(os.environ.get("AMICOOKED_INCREMENTAL_MIN_LABELS", "10"))
+INCREMENTAL_HOLDOUT_EVERY = 5
+
+# Values swept by what_if for each controllable feature, on the model's scale
+# (studytime 1-4, 1-5 ratings, absence counts, yes/no)
+WHAT_IF_RANGES = {
+    "studytime": [1, 2, 3, 4],
+    "absences": [0, 2, 4, 6, 8, 10, 15, 20, 30],
+    "goout": [1, 2, 3, 4, 5],
+    "Dalc": [1, 2, 3, 4, 5],
+    "Walc": [1, 2, 3, 4, 5],
+    "freetime": [1, 2, 3, 4, 5],
+    "paid": ["no", "yes"],
+    "activities": ["no", "yes"],
+}
+
+# Valid (min, max) of custom what_if values for the numeric features (the dataset's scales)
+WHAT_IF_BOUNDS = {
+    "studytime": (1, 4),
+    "absences": (0, 93),
+    "goout": (1, 5),
+    "Dalc": (1, 5),
+    "Walc": (1, 5),
+    "freetime": (1, 5),
+}
+
+# predict_score result cache (size 0 disables it)
+PREDICTION_CACHE_SIZE = int(os.environ.get("AMICOOKED_PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL = float(os.environ.get("AMICOOKED_PREDICTION_CACHE_TTL", "300"))
+
 
 @dataclass
 class RLFeedback:
@@ -29,6 +98,7 @@ class RLFeedback:
     predicted_score: int
     feedback: str  # "true", "higher", or "lower"
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    actual_grade: Optional[float] = None  # Final grade (0-20) when the user reported it
 
     def get_reward(self) -> float:
         """Calculate reward based on feedback"""
@@ -47,6 +117,10 @@ class RLFeedback:
             return -1  # Need to decrease score (less cooked)
         return 0
 
+    @classmethod
+    def from_dict(cls, state: Dict) -> "RLFeedback":
+        return cls(**state)
+
 
 class RLAdjustmentLayer:
     """
@@ -63,79 +137,205 @@ class RLAdjustmentLayer:
         self.discount_factor = discount_factor  # γ: importance of future rewards
         self.epsilon = epsilon  # Exploration rate (for epsilon-greedy)
 
-        # Q-table: Q(state, action) -> expected reward
-        # State = predicted score (1-10)
-        # Action = adjustment (-2, -1, 0, +1, +2)
-        self.q_table = defaultdict(_default_dict)
-
         # Available actions (adjustments to score)
         self.actions = [-2, -1, 0, 1, 2]
 
-        # Track episode rewards for monitoring
-        self.episode_rewards: List[float] = []
+        # Q-table: Q(state, action) -> expected reward
+        # State = predicted score (1-10) + studytime + failures
+        # Action = adjustment (-2, -1, 0, +1, +2)
+        self.q_table = DenseQTable(self.actions)
+
+        # Track episode rewards for monitoring (constant memory)
+        self.reward_stats = RunningStats()
+        self.recent_rewards = RollingWindow(REWARD_WINDOW_SIZE)
 
         # Feature-based adjustments: learn patterns from features
         self.feature_adjustments = defaultdict(_default_dict)
 
+        # Incremented on every Q-table update so derived results can be cached
+        self.version = 0
+
+        # Shared by clones, so state versions stay comparable across them (see clone)
+        self.lineage = object()
+
+        self._init_action_lookup()
+
+    def _init_action_lookup(self):
+        """Precompute action indices and the greedy tie-break order"""
+        self._action_index = {action: i for i, action in enumerate(self.actions)}
+        self._action_array = np.asarray(self.actions)
+        # On ties prefer the smallest adjustment (0, then -1/+1, then -2/+2)
+        self._greedy_order = np.argsort(np.abs(self._action_array), kind="stable")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ("_action_index", "_action_array", "_greedy_order", "lineage"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        """Restore from pickle, migrating models saved with the dict-based Q-table"""
+        self.__dict__.update(state)
+        self.__dict__.setdefault("version", 0)
+        self.lineage = object()
+        if "episode_rewards" in self.__dict__:
+            episode_rewards = self.__dict__.pop("episode_rewards")
+            self.reward_stats = RunningStats.from_values(episode_rewards)
+            self.recent_rewards = RollingWindow(REWARD_WINDOW_SIZE)
+            for reward in episode_rewards[-REWARD_WINDOW_SIZE:]:
+                self.recent_rewards.append(reward, timestamp=np.nan)  # Time of legacy rewards is unknown
+        if not isinstance(self.q_table, DenseQTable):
+            self.q_table = DenseQTable.from_dict(self.q_table, self.actions)
+        self._init_action_lookup()
+
+    def clone(self) -> "RLAdjustmentLayer":
+        """
+        Copy to apply updates to while readers keep using this layer
+
+        The clone continues this layer's lineage: a state version seen on
+        either one refers to the same Q-values, so cached adjustments stay
+        valid across clones until their state is updated.
+        """
+        cloned = copy.copy(self)
+        cloned.q_table = self.q_table.copy()
+        cloned.reward_stats = self.reward_stats.copy()
+        cloned.recent_rewards = self.recent_rewards.copy()
+        return cloned
+
+    def save(self, directory: Path):
+        """Write the Q-table and reward window as .npy files and the rest as JSON"""
+        directory.mkdir(parents=True, exist_ok=True)
+        self.q_table.save(directory / "q_table")
+        self.recent_rewards.save(directory / "recent_rewards")
+        with open(directory / "rl_layer.json", "w") as f:
+            json.dump({
+                "learning_rate": self.learning_rate,
+                "discount_factor": self.discount_factor,
+                "epsilon": self.epsilon,
+                "actions": self.actions,
+                "version": self.version,
+                "reward_stats": self.reward_stats.to_dict(),
+                "feature_adjustments": {key: dict(value) for key, value in self.feature_adjustments.items()},
+            }, f)
+
+    @classmethod
+    def load(cls, directory: Path) -> "RLAdjustmentLayer":
+        """Read a layer written by save(), mapping its arrays copy-on-write"""
+        with open(directory / "rl_layer.json") as f:
+            meta = json.load(f)
+        layer = cls(meta["learning_rate"], meta["discount_factor"], meta["epsilon"])
+        layer.actions = meta["actions"]
+        layer.version = meta["version"]
+        layer.q_table = DenseQTable.load(directory / "q_table")
+        layer.recent_rewards = RollingWindow.load(directory / "recent_rewards")
+        layer.reward_stats = RunningStats.from_dict(meta["reward_stats"])
+        layer.feature_adjustments.update(
+            {key: defaultdict(float, value) for key, value in meta["feature_adjustments"].items()}
+        )
+        layer._init_action_lookup()
+        return layer
+
     def get_state_key(self, score: int, features: Optional[Dict] = None) -> str:
         """Convert score (and optionally features) to state key"""
-        # Simple state: just the score
-        state = f"score_{score}"
-
-        # Optionally include key features for more granular learning
-        if features:
-            # Include key controllable features
-            if 'studytime' in features:
-                state += f"_st{features['studytime']}"
-            if 'failures' in features:
-                state += f"_f{features['failures']}"
+        return self.q_table.key_for(self.get_state(score, features))
+
+    def get_state(self, score: int, features: Optional[Dict] = None) -> StateLocator:
+        """Locate the Q-table state for a score (and optionally key controllable features)"""
+        if not features:
+            return self.q_table.locate(score)
+        return self.q_table.locate(
+            score,
+            studytime=features.get('studytime'),
+            failures=features.get('failures'),
+            has_studytime='studytime' in features,
+            has_failures='failures' in features,
+        )
 
+    def _resolve_state(self, state: Union[StateLocator, str]) -> StateLocator:
+        """Accept either a locator or a legacy string state key"""
+        if isinstance(state, str):
+            return self.q_table.locate_key(state)
         return state
 
-    def select_action(self, state: str, training: bool = True) -> int:
+    def select_action(self, state: Union[StateLocator, str], training: bool = True) -> int:
         """
         Select action using epsilon-greedy policy
 
         Args:
-            state: Current state key
+            state: Current state (locator or state key)
             training: If True, use epsilon-greedy. If False, use greedy (best action)
         """
         if training and np.random.random() < self.epsilon:
             # Exploration: random action
             return np.random.choice(self.actions)
         else:
-            # Exploitation: best action based on Q-values
-            q_values = [self.q_table[state][action] for action in self.actions]
-            max_q = max(q_values)
-            # If multiple actions have same Q-value, choose randomly among them
-            best_actions = [action for action, q in zip(self.actions, q_values) if q == max_q]
-            return np.random.choice(best_actions)
+            # Exploitation: best action based on Q-values (ties go to the smallest adjustment)
+            q_values = self.q_table.get(self._resolve_state(state))
+            return int(self._action_array[self._greedy_order[q_values[self._greedy_order].argmax()]])
 
-    def update_q_value(self, state: str, action: int, reward: float, next_state: str):
+    def update_q_value(self, state: Union[StateLocator, str], action: int, reward: float,
+                       next_state: Union[StateLocator, str], timestamp: Optional[float] = None):
         """
         Update Q-value using Q-learning update rule:
         Q(s,a) ← Q(s,a) + α[r + γ max_a' Q(s',a') - Q(s,a)]
         """
-        current_q = self.q_table[state][action]
+        state = self._resolve_state(state)
+        action_index = self._action_index[action]
+        current_q = self.q_table.get(state)[action_index]
 
         # Get max Q-value for next state
-        next_max_q = max([self.q_table[next_state][a] for a in self.actions])
+        next_max_q = self.q_table.get(self._resolve_state(next_state)).max()
 
         # Q-learning update
         new_q = current_q + self.learning_rate * (reward + self.discount_factor * next_max_q - current_q)
 
-        self.q_table[state][action] = new_q
+        self.q_table.set(state, action_index, float(new_q))
+        self.version += 1
 
         # Track reward
-        self.episode_rewards.append(reward)
+        self.reward_stats.update(reward)
+        self.recent_rewards.append(reward, timestamp=timestamp)
 
     def get_adjustment(self, predicted_score: int, features: Optional[Dict] = None, training: bool = False) -> int:
         """Get the adjustment to apply to the predicted score"""
-        state = self.get_state_key(predicted_score, features)
+        state = self.get_state(predicted_score, features)
         action = self.select_action(state, training=training)
         return action
 
-    def apply_feedback(self, predicted_score: int, feedback: str, features: Optional[Dict] = None):
+    def get_adjustments(self, predicted_scores: np.ndarray, features_list: List[Optional[Dict]],
+                        training: bool = False) -> np.ndarray:
+        """
+        Vectorized version of get_adjustment for a batch of predictions
+
+        Grid states are gathered from the dense Q-table with one fancy-indexing
+        call and the greedy choice is an argmax over all rows at once.
+        """
+        n = len(predicted_scores)
+        q_values = np.empty((n, len(self.actions)))
+        grid_rows, grid_index = [], []
+        for i, (score, features) in enumerate(zip(predicted_scores, features_list)):
+            state = self.get_state(score, features)
+            if isinstance(state, tuple):
+                grid_rows.append(i)
+                grid_index.append(state)
+            else:
+                q_values[i] = self.q_table.get(state)
+
+        if grid_rows:
+            score_idx, st_idx, f_idx = np.array(grid_index, dtype=np.intp).T
+            q_values[grid_rows] = self.q_table.values[score_idx, st_idx, f_idx]
+
+        best = q_values[:, self._greedy_order].argmax(axis=1)
+        actions = self._action_array[self._greedy_order[best]]
+
+        if training:
+            explore = np.random.random(n) < self.epsilon
+            actions[explore] = np.random.choice(self.actions, size=int(explore.sum()))
+
+        return actions
+
+    def apply_feedback(self, predicted_score: int, feedback: str, features: Optional[Dict] = None,
+                       timestamp: Optional[float] = None):
         """
         Apply user feedback to update the Q-table
 
@@ -143,9 +343,10 @@ class RLAdjustmentLayer:
             predicted_score: The score that was predicted
             feedback: "true", "higher", or "lower"
             features: Optional features for more granular learning
+            timestamp: When the feedback was given (epoch seconds, defaults to now)
         """
         # Current state
-        state = self.get_state_key(predicted_score, features)
+        state = self.get_state(predicted_score, features)
 
         # Determine what action should have been taken
         if feedback == "true":
@@ -161,11 +362,11 @@ class RLAdjustmentLayer:
             return
 
         # Calculate next state (after applying optimal action)
-        next_score = np.clip(predicted_score + optimal_action, 1, 10)
-        next_state = self.get_state_key(next_score, features)
+        next_score = int(np.clip(predicted_score + optimal_action, 1, 10))
+        next_state = self.get_state(next_score, features)
 
         # Update Q-value for the action that should have been taken
-        self.update_q_value(state, optimal_action, reward, next_state)
+        self.update_q_value(state, optimal_action, reward, next_state, timestamp=timestamp)
 
         # Also update Q-values for actual action taken (if we tracked it)
         # For now, we're doing offline learning from feedback
@@ -182,15 +383,14 @@ class AmICookedRLModel:
     Scoring: 1 = Chilling (doing great), 10 = Cooked (struggling)
     """
 
-    def __init__(self):
-        # Base ML model (same as before)
-        self.base_model = GradientBoostingRegressor(
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=5,
-            random_state=42,
-            subsample=0.8,
-        )
+    # Loaded on first use when the model comes from an artifact directory
+    base_model = LazyAttribute()
+    training_data = LazyAttribute()
+
+    def __init__(self, engine: Optional[str] = None):
+        # Base ML model, created by a registered engine (see base_engines)
+        self.engine = engine or DEFAULT_ENGINE
+        self.base_model = get_engine(self.engine).create()
 
         # RL adjustment layer
         self.rl_layer = RLAdjustmentLayer(
@@ -225,6 +425,21 @@ class AmICookedRLModel:
             "higher", "internet", "romantic"
         ]
 
+        # Compiled lookup tables for prepare_features (rebuilt on train/load)
+        self.feature_encoder: Optional[CompiledFeatureEncoder] = None
+
+        # Flattened copy of base_model for fast small-batch inference (rebuilt on train/load)
+        self.inference_engine: Optional[FlatTreeEnsemble] = None
+
+        # Per-leaf attribution tables for explain(), built on first use
+        self.explainer: Optional[TreeShapExplainer] = None
+
+        # predict_score results by encoded feature vector (cleared on retrain)
+        self.prediction_cache = PredictionCache(
+            maxsize=PREDICTION_CACHE_SIZE,
+            ttl=PREDICTION_CACHE_TTL,
+        )
+
         # Feedback history
         self.feedback_history: List[RLFeedback] = []
         self.training_data: Optional[pd.DataFrame] = None
@@ -236,14 +451,37 @@ class AmICookedRLModel:
         self.total_corrections = 0
         self.correct_predictions = 0
 
-    def load_and_train_initial_model(self):
-        """Load dataset and train initial base model"""
+        # Windowed accuracy: 1.0 for "true" feedback, 0.0 otherwise
+        self.recent_feedback = RollingWindow(REWARD_WINDOW_SIZE)
+        self.stats_window_minutes = 60
+
+        # Incremented whenever the base model is (re)trained so derived results can be cached
+        self.model_version = 0
+
+        # Identifies the trained base model across processes (new on every (re)train)
+        self.model_id: Optional[str] = None
+
+        # Sequence number of the last feedback journal record included in this state
+        self.journal_seq = 0
+
+        # Feedback with an actual grade: received in total, and already fitted into the
+        # base model by extend_base_model (all records before labelled_position)
+        self.labelled_feedback = 0
+        self.labelled_used = 0
+        self.labelled_position = 0
+
+    def training_split(self, dataset_path: str = DATASET_PATH):
+        """
+        Load the dataset, fit the label encoders and return the encoded
+        (X_train, X_test, y_train, y_test) split used for training
+        """
         print("Loading dataset...")
 
-        df = pd.read_csv("api/student-por.csv")
+        # Parsed once per distinct file into compact columns (categorical codes, small ints)
+        df = load_dataset(dataset_path).to_dataframe()
 
         print(f"Dataset loaded: {df.shape}")
-        self.training_data = df.copy()
+        self.training_data = df
 
         # Prepare features and target
         X = df[self.feature_names].copy()
@@ -262,12 +500,16 @@ class AmICookedRLModel:
                 X[col] = X[col] * self.non_controllable_weight
 
         # Train-test split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.1, random_state=42
-        )
+        return train_test_split(X, y, test_size=0.1, random_state=42)
+
+    def load_and_train_initial_model(self, dataset_path: str = DATASET_PATH):
+        """Load dataset and train initial base model"""
+        X_train, X_test, y_train, y_test = self.training_split(dataset_path)
 
-        print(f"Training base model on {len(X_train)} samples...")
+        print(f"Training {self.engine} base model on {len(X_train)} samples...")
+        started = time.perf_counter()
         self.base_model.fit(X_train, y_train)
+        train_seconds = time.perf_counter() - started
 
         # Evaluate
         train_score = self.base_model.score(X_train, y_train)
@@ -276,57 +518,141 @@ class AmICookedRLModel:
         self.initial_score = test_score
         self.current_score = test_score
         self.is_trained = True
+        self.model_version += 1
+        self.model_id = uuid.uuid4().hex
+        self.compile_feature_encoder()
+        self.compile_inference_engine()
+        self.prediction_cache.clear()
 
         print("Training complete!")
         print(f"Train R² score: {train_score:.4f}")
         print(f"Test R² score: {test_score:.4f}")
 
         return {
+            "engine": self.engine,
             "train_score": train_score,
             "test_score": test_score,
+            "train_seconds": train_seconds,
         }
 
+    def with_base_model(self, trained: "AmICookedRLModel") -> "AmICookedRLModel":
+        """
+        New model instance using the base model of `trained` and the RL state of this one
+
+        Used to swap in a model retrained elsewhere without touching the live
+        instance: the Q-table, feedback history and counters carry over.
+        """
+        swapped = copy.copy(self)
+        swapped.engine = trained.engine
+        swapped.base_model = trained.base_model
+        swapped.label_encoders = trained.label_encoders
+        swapped.training_data = trained.training_data
+        swapped.initial_score = trained.initial_score
+        swapped.current_score = trained.current_score
+        swapped.is_trained = trained.is_trained
+        swapped.model_version = self.model_version + 1
+        swapped.model_id = trained.model_id
+        swapped.labelled_used = trained.labelled_used
+        swapped.labelled_position = trained.labelled_position
+        swapped.prediction_cache = PredictionCache(
+            maxsize=self.prediction_cache.maxsize,
+            ttl=self.prediction_cache.ttl,
+        )
+        swapped.compile_feature_encoder()
+        swapped.compile_inference_engine()
+        return swapped
+
+    def fork(self) -> "AmICookedRLModel":
+        """
+        Copy of this model for a writer to update while readers keep using this one
+
+        The base model, encoders, dataset and prediction cache are shared; the
+        RL layer, feedback window and feedback history are copied, so feedback
+        applied to the fork is only seen once it is published in place of this
+        instance. Only the unsaved tail of an artifact's history is copied.
+        """
+        forked = copy.copy(self)
+        forked.rl_layer = self.rl_layer.clone()
+        forked.recent_feedback = self.recent_feedback.copy()
+        history = self.feedback_history
+        forked.feedback_history = history.fork() if isinstance(history, FeedbackHistory) else list(history)
+        return forked
+
+    def compile_feature_encoder(self) -> CompiledFeatureEncoder:
+        """Build the lookup tables used by prepare_features from the current encoders and data"""
+        self.feature_encoder = CompiledFeatureEncoder.build(
+            feature_names=self.feature_names,
+            categorical_features=self.categorical_features,
+            non_controllable_features=self.non_controllable_features,
+            non_controllable_weight=self.non_controllable_weight,
+            label_encoders=self.label_encoders,
+            training_data=self.training_data,
+        )
+        return self.feature_encoder
+
+    def _get_feature_encoder(self) -> CompiledFeatureEncoder:
+        """Return the compiled encoder, building it on first use"""
+        if self.feature_encoder is None:
+            return self.compile_feature_encoder()
+        return self.feature_encoder
+
+    def compile_inference_engine(self) -> Optional[FlatTreeEnsemble]:
+        """Export base_model into a flattened tree ensemble (None if it is not a supported type)"""
+        self.inference_engine = FlatTreeEnsemble.try_from_model(self.base_model) if self.is_trained else None
+        self.explainer = None
+        return self.inference_engine
+
+    def get_explainer(self) -> TreeShapExplainer:
+        """TreeSHAP explainer for the base model, built on first use"""
+        explainer = self.explainer
+        if explainer is None:
+            engine = self.inference_engine
+            if engine is None or engine.cover is None:
+                # Engines saved before node covers were recorded are re-exported
+                engine = FlatTreeEnsemble.try_from_model(self.base_model)
+            if engine is None:
+                raise TypeError(f"Feature contributions need a gradient boosting base model, not {self.engine}")
+            explainer = self.explainer = TreeShapExplainer(engine)
+        return explainer
+
+    def _predict_grades(self, X: np.ndarray) -> np.ndarray:
+        """
+        Predict grades (0-20) for encoded feature rows
+
+        Small batches go through the flattened engine, which skips sklearn's
+        per-call overhead; large batches are faster in sklearn's compiled loop.
+        """
+        if self.inference_engine is not None and len(X) <= ENGINE_MAX_BATCH:
+            return self.inference_engine.predict(X)
+        return self.base_model.predict(X)
+
     def prepare_features(self, features: Dict[str, any]) -> np.ndarray:
         """Convert input features dict to model input array"""
-        feature_values = []
-
-        for feature_name in self.feature_names:
-            if feature_name in features and features[feature_name] is not None:
-                value = features[feature_name]
-
-                # Encode categorical features
-                if feature_name in self.categorical_features:
-                    if feature_name in self.label_encoders:
-                        try:
-                            value = self.label_encoders[feature_name].transform([str(value)])[0]
-                        except ValueError:
-                            value = 0
-                    else:
-                        value = 0
-                elif isinstance(value, bool):
-                    value = 1 if value else 0
-
-                # Scale down non-controllable features
-                if feature_name in self.non_controllable_features:
-                    value = float(value) * self.non_controllable_weight
-
-                feature_values.append(float(value))
-            else:
-                # Use mean from training data
-                if self.training_data is not None and feature_name in self.training_data.columns:
-                    if feature_name in self.categorical_features:
-                        feature_values.append(0)
-                    else:
-                        feature_values.append(float(self.training_data[feature_name].mean()))
-                else:
-                    feature_values.append(0.0)
-
-        return np.array(feature_values).reshape(1, -1)
+        return self._get_feature_encoder().encode(features)
+
+    @staticmethod
+    def _grades_to_scores(grade_predictions: np.ndarray) -> np.ndarray:
+        """Convert predicted grades (0-20) to cooked scores (1-10)"""
+        return np.clip(11 - (np.asarray(grade_predictions) / 2.2).astype(int), 1, 10)
+
+    def _prediction_cache_key(self, X: np.ndarray, features: Dict[str, any]):
+        """Cache key: the encoded feature row plus the raw values that select the RL state"""
+        state_values = tuple(
+            (type(features[name]), features[name]) if name in features else None
+            for name in ("studytime", "failures")
+        )
+        key = (X.tobytes(), state_values)
+        hash(key)  # Raises TypeError for unhashable feature values
+        return key
 
     def predict_score(self, features: Dict[str, any], use_rl_adjustment: bool = True) -> int:
         """
         Predict AmICooked score (1-10) with RL adjustments
 
+        Results are cached by encoded feature vector. A cached entry keeps its
+        base score until the model is retrained, and its RL adjustment is
+        recomputed as soon as the Q-table state it was derived from changes.
+
         Args:
             features: Student features
             use_rl_adjustment: Whether to apply RL adjustment layer
@@ -337,22 +663,169 @@ class AmICookedRLModel:
         if not self.is_trained:
             raise RuntimeError("Model not trained. Call load_and_train_initial_model() first.")
 
-        # Get base prediction from ML model
+        started = time.perf_counter()
         X = self.prepare_features(features)
-        grade_prediction = self.base_model.predict(X)[0]
+        METRICS.observe_stage("prepare_features", time.perf_counter() - started)
+
+        key = None
+        entry = None
+        if self.prediction_cache.enabled:
+            try:
+                key = self._prediction_cache_key(X, features)
+                entry = self.prediction_cache.get(key)
+            except TypeError:
+                key = None
+
+        if entry is not None:
+            base_score, lineage, state, state_version, adjusted_score = entry
+        else:
+            # Get base prediction from ML model
+            started = time.perf_counter()
+            grade_prediction = self._predict_grades(X)[0]
+            METRICS.observe_stage("base_predict", time.perf_counter() - started)
+
+            # Convert grade (0-20) to cooked score (1-10)
+            base_score = max(1, min(10, 11 - int(grade_prediction / 2.2)))
+            lineage, state, state_version, adjusted_score = None, None, None, None
+
+        if not use_rl_adjustment:
+            if entry is None and key is not None:
+                self.prediction_cache.put(key, (base_score, None, None, None, None))
+            return int(base_score)
 
-        # Convert grade (0-20) to cooked score (1-10)
-        base_score = max(1, min(10, 11 - int(grade_prediction / 2.2)))
+        # Apply RL adjustment, reusing the cached one while its Q-table state is unchanged
+        if lineage is not self.rl_layer.lineage:
+            state = self.rl_layer.get_state(base_score, features)
+        current_version = self.rl_layer.q_table.version_of(state)
+        if lineage is self.rl_layer.lineage and state_version == current_version:
+            return adjusted_score
+
+        if entry is not None and adjusted_score is not None:
+            self.prediction_cache.invalidate(key)
+
+        started = time.perf_counter()
+        adjustment = self.rl_layer.select_action(state, training=False)
+        METRICS.observe_stage("rl_adjustment", time.perf_counter() - started)
+        adjusted_score = int(np.clip(base_score + adjustment, 1, 10))
+        if key is not None:
+            self.prediction_cache.put(key, (base_score, self.rl_layer.lineage, state, current_version, adjusted_score))
+        return adjusted_score
+
+    def predict_scores(self, features_list: List[Dict[str, any]], use_rl_adjustment: bool = True) -> List[int]:
+        """
+        Predict AmICooked scores (1-10) for many students at once
+
+        Builds a single feature matrix, makes one base model call and applies the
+        RL adjustments as an array operation. Results are in input order.
+
+        Args:
+            features_list: One features dict per student
+            use_rl_adjustment: Whether to apply RL adjustment layer
+
+        Returns:
+            List of scores from 1-10 (1=Chilling, 10=Cooked)
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call load_and_train_initial_model() first.")
+
+        if not features_list:
+            return []
+
+        started = time.perf_counter()
+        X = self._get_feature_encoder().encode_many(features_list)
+        encoded = time.perf_counter()
+        METRICS.observe_stage("batch_prepare_features", encoded - started)
+
+        base_scores = self._grades_to_scores(self._predict_grades(X))
+        predicted = time.perf_counter()
+        METRICS.observe_stage("batch_base_predict", predicted - encoded)
 
-        # Apply RL adjustment if enabled
         if use_rl_adjustment:
-            adjustment = self.rl_layer.get_adjustment(base_score, features, training=False)
-            adjusted_score = np.clip(base_score + adjustment, 1, 10)
-            return int(adjusted_score)
-        else:
-            return int(base_score)
+            adjustments = self.rl_layer.get_adjustments(base_scores, features_list, training=False)
+            base_scores = np.clip(base_scores + adjustments, 1, 10)
+            METRICS.observe_stage("batch_rl_adjustment", time.perf_counter() - predicted)
+
+        return [int(score) for score in base_scores]
 
-    def apply_feedback(self, features: Dict[str, any], predicted_score: int, feedback: str):
+    def explain(self, features_list: List[Dict[str, any]]) -> List[Dict]:
+        """
+        Per-feature contributions to the base model's predicted grade
+
+        Exact TreeSHAP values: for each student, the expected grade over the
+        training data plus the contributions equals the predicted grade (0-20).
+        Positive contributions raise the grade, i.e. make the student less
+        cooked. The RL adjustment is not attributed.
+
+        Returns:
+            One {"expected_grade", "predicted_grade", "contributions": {feature: value}}
+            per student, in input order
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call load_and_train_initial_model() first.")
+        if not features_list:
+            return []
+
+        explainer = self.get_explainer()
+        X = self._get_feature_encoder().encode_many(features_list)
+        with METRICS.time_stage("explain"):
+            values = explainer.shap_values(X)
+        expected = explainer.expected_value
+        return [
+            {
+                "expected_grade": expected,
+                "predicted_grade": expected + float(row.sum()),
+                "contributions": dict(zip(self.feature_names, row.tolist())),
+            }
+            for row in values
+        ]
+
+    def what_if(self, features: Dict[str, any], sweeps: Dict[str, Optional[List]],
+                use_rl_adjustment: bool = True) -> Dict:
+        """
+        Scores for a profile with controllable features changed one at a time
+
+        Every variant (plus the unchanged profile) is scored in one
+        predict_scores call, i.e. one base model call and one vectorized RL
+        adjustment, instead of one prediction per variant.
+
+        Args:
+            features: The base profile
+            sweeps: {feature: values to try}; None uses WHAT_IF_RANGES[feature]
+            use_rl_adjustment: Whether to apply RL adjustment layer
+
+        Returns:
+            {"baseline": score, "sweeps": {feature: [(value, score), ...]}}
+        """
+        variants = [features]
+        spans = {}
+        for name, values in sweeps.items():
+            if name not in WHAT_IF_RANGES:
+                raise ValueError(f"'{name}' is not a controllable feature (choose from {', '.join(WHAT_IF_RANGES)})")
+            if values is None:
+                values = WHAT_IF_RANGES[name]
+            allowed = {"yes", "no"} if isinstance(WHAT_IF_RANGES[name][0], str) else None
+            for value in values:
+                if allowed is not None and value not in allowed:
+                    raise ValueError(f"{name} must be 'yes' or 'no', not {value!r}")
+                if allowed is None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                    raise ValueError(f"{name} values must be numbers, not {value!r}")
+                if allowed is None and not WHAT_IF_BOUNDS[name][0] <= value <= WHAT_IF_BOUNDS[name][1]:
+                    low, high = WHAT_IF_BOUNDS[name]
+                    raise ValueError(f"{name} must be between {low} and {high}, not {value!r}")
+            spans[name] = (len(variants), list(values))
+            variants.extend({**features, name: value} for value in values)
+
+        scores = self.predict_scores(variants, use_rl_adjustment=use_rl_adjustment)
+        return {
+            "baseline": scores[0],
+            "sweeps": {
+                name: list(zip(values, scores[start:start + len(values)]))
+                for name, (start, values) in spans.items()
+            },
+        }
+
+    def apply_feedback(self, features: Dict[str, any], predicted_score: int, feedback: str,
+                       timestamp: Optional[str] = None, actual_grade: Optional[float] = None) -> RLFeedback:
         """
         Apply user feedback to improve predictions via reinforcement learning
 
@@ -360,33 +833,200 @@ class AmICookedRLModel:
             features: Features used for the prediction
             predicted_score: The score that was predicted
             feedback: "true" (correct), "higher" (should be more cooked), or "lower" (should be less cooked)
+            timestamp: Original time of the feedback when replaying it (defaults to now)
+            actual_grade: Final grade (0-20) the student actually got, if known; such
+                labelled feedback is later fitted into the base model (extend_base_model)
+
+        Returns:
+            The recorded RLFeedback event
         """
         # Validate feedback
         if feedback not in ["true", "higher", "lower"]:
             raise ValueError(f"Invalid feedback: {feedback}. Must be 'true', 'higher', or 'lower'")
 
+        # Calculate base_score to identify the correct state
+        # (Must match the state used in predict_score; done first so bad input changes nothing)
+        X = self.prepare_features(features)
+        grade_prediction = self._predict_grades(X)[0]
+        base_score = max(1, min(10, 11 - int(grade_prediction / 2.2)))
+
         # Store feedback
         rl_feedback = RLFeedback(
             features=features,
             predicted_score=predicted_score,
             feedback=feedback
         )
+        if timestamp is not None:
+            rl_feedback.timestamp = timestamp
+        event_time = datetime.fromisoformat(rl_feedback.timestamp).timestamp()
+        if actual_grade is not None:
+            rl_feedback.actual_grade = float(actual_grade)
+            self.labelled_feedback += 1
         self.feedback_history.append(rl_feedback)
 
-        # Calculate base_score to identify the correct state
-        # (Must match the state used in predict_score)
-        X = self.prepare_features(features)
-        grade_prediction = self.base_model.predict(X)[0]
-        base_score = max(1, min(10, 11 - int(grade_prediction / 2.2)))
-
         # Update RL layer immediately (online learning)
         # We use base_score as the state, so the RL layer learns adjustments relative to base
-        self.rl_layer.apply_feedback(base_score, feedback, features)
+        self.rl_layer.apply_feedback(base_score, feedback, features, timestamp=event_time)
 
         # Update statistics
         self.total_corrections += 1
         if feedback == "true":
             self.correct_predictions += 1
+        self.recent_feedback.append(1.0 if feedback == "true" else 0.0, timestamp=event_time)
+
+        return rl_feedback
+
+    def base_scores(self, features_list: List[Dict[str, any]], chunk_size: int = REPLAY_CHUNK_SIZE) -> np.ndarray:
+        """Base model scores (1-10, no RL adjustment) for many students, in chunks"""
+        encoder = self._get_feature_encoder()
+        scores = np.empty(len(features_list), dtype=int)
+        for start in range(0, len(features_list), chunk_size):
+            X = encoder.encode_many(features_list[start:start + chunk_size])
+            scores[start:start + len(X)] = self._grades_to_scores(self._predict_grades(X))
+        return scores
+
+    def replay_feedback(self, learning_rate: Optional[float] = None, discount_factor: Optional[float] = None,
+                        records: Optional[List[RLFeedback]] = None) -> Dict:
+        """
+        Rebuild the RL layer by replaying the feedback history in one batched pass
+
+        Base scores for every event are recomputed with the current base model,
+        then the events are applied in order to a fresh layer (see
+        rl_replay.replay_feedback). Use it after changing how states are keyed
+        or the Q-learning parameters; the feedback history itself is unchanged.
+
+        Args:
+            learning_rate: New learning rate (defaults to the current one)
+            discount_factor: New discount factor (defaults to the current one)
+            records: Feedback to replay (defaults to the full feedback history)
+
+        Returns:
+            Counts of events replayed and states updated
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call load_and_train_initial_model() first.")
+
+        records = list(self.feedback_history) if records is None else list(records)
+        layer = RLAdjustmentLayer(
+            learning_rate=self.rl_layer.learning_rate if learning_rate is None else learning_rate,
+            discount_factor=self.rl_layer.discount_factor if discount_factor is None else discount_factor,
+            epsilon=self.rl_layer.epsilon,
+        )
+        feedback = [record.feedback for record in records]
+        timestamps = [record.timestamp for record in records]
+
+        # Each distinct features dict is scored once, in one batched prediction
+        unique, inverse = unique_features([record.features for record in records])
+        summary = replay_feedback(layer, unique, self.base_scores(unique), inverse, feedback, timestamps)
+
+        # Feedback accuracy counters, as apply_feedback would have left them
+        correct = np.array([event == "true" for event in feedback], dtype=float)
+        recent_feedback = RollingWindow(self.recent_feedback.capacity)
+        tail = records[-recent_feedback.capacity:]
+        recent_feedback.extend(
+            correct[len(records) - len(tail):],
+            [datetime.fromisoformat(record.timestamp).timestamp() for record in tail],
+        )
+
+        # A new layer object also invalidates cached predictions and /average-stats
+        self.rl_layer = layer
+        self.total_corrections = len(records)
+        self.correct_predictions = int(correct.sum())
+        self.recent_feedback = recent_feedback
+
+        summary.update({
+            "learning_rate": layer.learning_rate,
+            "discount_factor": layer.discount_factor,
+            "q_table_size": len(layer.q_table),
+        })
+        return summary
+
+    @property
+    def pending_labelled(self) -> int:
+        """Labelled feedback not yet fitted into the base model"""
+        return self.labelled_feedback - self.labelled_used
+
+    def _feedback_since(self, start: int) -> List[RLFeedback]:
+        history = self.feedback_history
+        if isinstance(history, FeedbackHistory):
+            return history.since(start)
+        return list(history[start:])
+
+    def extend_base_model(self, n_estimators: int = INCREMENTAL_ESTIMATORS,
+                          min_labels: int = INCREMENTAL_MIN_LABELS) -> Optional[Dict]:
+        """
+        Fit labelled feedback into the base model without a full retrain
+
+        The boosting ensemble is warm-started with `n_estimators` more stages,
+        fitted to the residuals of the existing stages on the feedback
+        labelled with an actual grade since the last update. The cost grows
+        with the new feedback and the number of trees, not the dataset size.
+
+        Every INCREMENTAL_HOLDOUT_EVERY-th labelled record is held out of the
+        fit, and the MAE of the old and extended base models is measured on
+        those records. The update is only usable if the MAE improved; until
+        then the records stay pending and are fitted again, with whatever
+        arrives meanwhile, next time.
+
+        Nothing is changed in place: the result is a model carrying the
+        extended base model, to be swapped in with with_base_model() (which
+        keeps the RL state and any feedback received meanwhile).
+
+        Returns:
+            {"model": extended model or None if it did not improve, "improved": bool,
+            ...metrics}, or None if fewer than `min_labels` labelled records are pending
+        """
+        if not self.is_trained:
+            raise RuntimeError("Model not trained. Call load_and_train_initial_model() first.")
+        stages_param = get_engine(self.engine).stages_param
+        if stages_param is None:
+            raise TypeError(f"The {self.engine} engine does not support incremental updates")
+
+        end = len(self.feedback_history)
+        labelled = [
+            record for record in self._feedback_since(self.labelled_position)[:end - self.labelled_position]
+            if record.actual_grade is not None
+        ]
+        if not labelled or len(labelled) < max(min_labels, INCREMENTAL_HOLDOUT_EVERY):
+            return None
+
+        X = pd.DataFrame(
+            self._get_feature_encoder().encode_many([record.features for record in labelled]),
+            columns=self.feature_names,
+        )
+        y = np.array([record.actual_grade for record in labelled])
+        held_out = np.arange(len(labelled)) % INCREMENTAL_HOLDOUT_EVERY == INCREMENTAL_HOLDOUT_EVERY - 1
+
+        booster = copy.deepcopy(self.base_model)
+        n_before = booster.get_params()[stages_param]
+        booster.set_params(warm_start=True, **{stages_param: n_before + n_estimators})
+        if "subsample" in booster.get_params():
+            # A subsampled stage on a small batch can leave no out-of-bag rows to score
+            booster.set_params(subsample=1.0)
+        booster.fit(X[~held_out], y[~held_out])
+
+        mae_before = float(np.abs(self.base_model.predict(X[held_out]) - y[held_out]).mean())
+        mae_after = float(np.abs(booster.predict(X[held_out]) - y[held_out]).mean())
+        result = {
+            "model": None,
+            "improved": mae_after < mae_before,
+            "samples": int((~held_out).sum()),
+            "held_out": int(held_out.sum()),
+            "estimators_before": n_before,
+            "estimators_after": n_before + n_estimators,
+            "mae_before": mae_before,
+            "mae_after": mae_after,
+        }
+        if not result["improved"]:
+            return result
+
+        extended = copy.copy(self)
+        extended.base_model = booster
+        extended.model_id = uuid.uuid4().hex
+        extended.labelled_used = self.labelled_used + len(labelled)
+        extended.labelled_position = end
+        result["model"] = extended
+        return result
 
     def get_score_label(self, score: int) -> str:
         """Get human-readable label for score"""
@@ -409,44 +1049,244 @@ class AmICookedRLModel:
         accuracy = (self.correct_predictions / self.total_corrections
                    if self.total_corrections > 0 else 0.0)
 
-        # Calculate average reward from RL layer
-        avg_reward = (np.mean(self.rl_layer.episode_rewards)
-                     if self.rl_layer.episode_rewards else 0.0)
+        # Average reward from RL layer (streaming, O(1))
+        reward_stats = self.rl_layer.reward_stats
+        recent_rewards = self.rl_layer.recent_rewards
+
+        window_seconds = self.stats_window_minutes * 60
+        now = datetime.now().timestamp()
+        recent_accuracy = self.recent_feedback.since(window_seconds, now=now)
+        recent_reward = recent_rewards.since(window_seconds, now=now)
 
         return {
             "is_trained": self.is_trained,
+            "base_model_engine": self.engine,
             "base_model_r2": self.current_score,
             "total_feedback": len(self.feedback_history),
             "correct_predictions": self.correct_predictions,
             "total_corrections": self.total_corrections,
             "accuracy": accuracy,
-            "avg_rl_reward": avg_reward,
-            "rl_episodes": len(self.rl_layer.episode_rewards),
+            "avg_rl_reward": reward_stats.mean,
+            "rl_reward_std": reward_stats.std,
+            "rl_episodes": reward_stats.count,
             "q_table_size": len(self.rl_layer.q_table),
+            "labelled_feedback": self.labelled_feedback,
+            "pending_labelled_feedback": self.pending_labelled,
+            "recent": {
+                "last_n": {
+                    "window": self.recent_feedback.capacity,
+                    "count": self.recent_feedback.size,
+                    "accuracy": self.recent_feedback.mean(),
+                    "avg_rl_reward": recent_rewards.mean(),
+                },
+                "last_minutes": {
+                    "minutes": self.stats_window_minutes,
+                    "count": recent_accuracy["count"],
+                    "accuracy": recent_accuracy["mean"],
+                    "avg_rl_reward": recent_reward["mean"],
+                },
+            },
         }
 
-    def save_model(self, path: str = "api/rl_model.pkl"):
-        """Save model and all state"""
+    def save_model(self, path: str = DEFAULT_MODEL_PATH):
+        """
+        Save model and all state
+
+        Paths ending in .pkl use the legacy single-pickle format; any other
+        path is a versioned artifact directory (see save_artifact).
+        """
+        if str(path).endswith(".pkl"):
+            self._save_pickle(path)
+        else:
+            self.save_artifact(path)
+        print(f"RL Model saved to {path}")
+
+    def _save_pickle(self, path: str):
+        """Save everything into one pickle (legacy format)"""
         data = {
             "base_model": self.base_model,
             "rl_layer": self.rl_layer,
             "label_encoders": self.label_encoders,
-            "feedback_history": self.feedback_history,
+            "feedback_history": list(self.feedback_history),
             "training_data": self.training_data,
             "is_trained": self.is_trained,
             "initial_score": self.initial_score,
             "current_score": self.current_score,
             "total_corrections": self.total_corrections,
             "correct_predictions": self.correct_predictions,
+            "journal_seq": self.journal_seq,
+            "labelled_feedback": self.labelled_feedback,
+            "labelled_used": self.labelled_used,
+            "labelled_position": self.labelled_position,
+            "engine": self.engine,
+            "recent_feedback": self.recent_feedback,
+            "model_id": self.model_id,
         }
         Path(path).parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "wb") as f:
+
+        # Write then rename, so other processes never load a half-written file
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
             pickle.dump(data, f)
-        print(f"RL Model saved to {path}")
+        os.replace(tmp_path, path)
+
+    def save_artifact(self, root: str = DEFAULT_MODEL_PATH) -> Path:
+        """
+        Save as a new version of an artifact directory
+
+        A version holds:
+        - model.json: scores, counters, label encoder classes and other metadata
+        - base_model.pkl, training_data.pkl: only read when first needed
+        - encoder.json, engine/: compiled feature encoder and flattened trees (.npy)
+        - rl/: Q-table and reward window (.npy) plus the RL parameters
+        - recent_feedback/: windowed accuracy buffer (.npy)
+        - history.jsonl: feedback history, only read when iterated
+
+        Files derived from the base model are hard-linked from the previous
+        version while model_id is unchanged, so a snapshot after feedback only
+        writes the RL state and copies the history file.
+
+        Afterwards feedback_history reads the new version, so a model that is
+        already published to readers should be saved through a fork().
+        """
+        history = self.feedback_history
+        saved = {}
+
+        def write(directory: Path, previous: Optional[Path]):
+            reuse = (previous is not None and self.model_id is not None
+                     and read_manifest(previous).get("model_id") == self.model_id)
+            if reuse:
+                for name in BASE_MODEL_FILES:
+                    if (previous / name).exists():
+                        link_or_copy(previous / name, directory / name)
+            else:
+                with open(directory / "base_model.pkl", "wb") as f:
+                    pickle.dump(self.base_model, f)
+                if self.training_data is not None:
+                    with open(directory / "training_data.pkl", "wb") as f:
+                        pickle.dump(self.training_data, f)
+                if self.feature_encoder is not None:
+                    with open(directory / "encoder.json", "w") as f:
+                        json.dump(self.feature_encoder.to_dict(), f)
+                if self.inference_engine is not None:
+                    self.inference_engine.save(directory / "engine")
+
+            self.rl_layer.save(directory / "rl")
+            self.recent_feedback.save(directory / "recent_feedback")
+            if isinstance(history, FeedbackHistory):
+                saved["history"] = history.save(directory / "history.jsonl")
+            else:
+                saved["history"] = FeedbackHistory.write(history, directory / "history.jsonl")
+
+            write_manifest(directory, {
+                "model_id": self.model_id,
+                "is_trained": self.is_trained,
+                "initial_score": self.initial_score,
+                "current_score": self.current_score,
+                "total_corrections": self.total_corrections,
+                "correct_predictions": self.correct_predictions,
+                "journal_seq": self.journal_seq,
+                "labelled_feedback": self.labelled_feedback,
+                "labelled_used": self.labelled_used,
+                "labelled_position": self.labelled_position,
+                "engine": self.engine,
+                "feature_names": self.feature_names,
+                "feedback_count": saved["history"],
+                "label_encoders": {
+                    name: encoder.classes_.tolist() for name, encoder in self.label_encoders.items()
+                },
+            })
+
+        directory = write_version(root, write)
+
+        # The saved history now lives on disk; only later records stay in memory
+        if isinstance(history, FeedbackHistory):
+            self.feedback_history = history.rebased(directory / "history.jsonl", saved["history"])
+        else:
+            self.feedback_history = FeedbackHistory(
+                directory / "history.jsonl", saved["history"], RLFeedback.from_dict
+            )
+            for record in history[saved["history"]:]:
+                self.feedback_history.append(record)
+        return directory
+
+    @classmethod
+    def load_artifact(cls, root: str = DEFAULT_MODEL_PATH) -> "AmICookedRLModel":
+        """
+        Load the current version of an artifact directory
+
+        Only metadata and the RL state are read up front. The tree arrays are
+        memory-mapped read-only and the Q-table copy-on-write, so processes
+        loading the same version share those pages. The base model, dataset
+        and feedback history are read when first used.
+        """
+        directory = current_version(root)
+        if directory is None:
+            raise FileNotFoundError(f"No model artifact in {root}")
+        manifest = read_manifest(directory)
+
+        model_instance = cls()
+        model_instance.base_model = LazyFile(directory / "base_model.pkl", pickle.load)
+        model_instance.rl_layer = RLAdjustmentLayer.load(directory / "rl")
+        model_instance.label_encoders = {
+            name: _fitted_label_encoder(classes) for name, classes in manifest["label_encoders"].items()
+        }
+        if (directory / "training_data.pkl").exists():
+            model_instance.training_data = LazyFile(directory / "training_data.pkl", pickle.load)
+        model_instance.feedback_history = FeedbackHistory(
+            directory / "history.jsonl", manifest["feedback_count"], RLFeedback.from_dict
+        )
+        for name in ("model_id", "is_trained", "initial_score", "current_score",
+                     "total_corrections", "correct_predictions", "journal_seq"):
+            setattr(model_instance, name, manifest[name])
+        for name in ("labelled_feedback", "labelled_used", "labelled_position"):
+            setattr(model_instance, name, manifest.get(name, 0))
+        # Artifacts from before the engine registry hold a GradientBoostingRegressor
+        model_instance.engine = manifest.get("engine", "gbr")
+        model_instance.feature_names = manifest.get("feature_names", model_instance.feature_names)
+        model_instance.recent_feedback = RollingWindow.load(directory / "recent_feedback")
+
+        if (directory / "encoder.json").exists():
+            with open(directory / "encoder.json") as f:
+                model_instance.feature_encoder = CompiledFeatureEncoder.from_dict(json.load(f))
+        if (directory / "engine").exists():
+            model_instance.inference_engine = FlatTreeEnsemble.load(directory / "engine", mmap_mode="r")
+        return model_instance
+
+    @classmethod
+    def saved_feature_names(cls, path: str = DEFAULT_MODEL_PATH) -> List[str]:
+        """Feature names of a saved model, read from the artifact metadata without loading it"""
+        path = Path(path)
+        directory = current_version(path) if path.suffix != ".pkl" else None
+        if directory is not None:
+            names = read_manifest(directory).get("feature_names")
+            if names is None and (directory / "encoder.json").exists():
+                with open(directory / "encoder.json") as f:
+                    names = json.load(f)["feature_names"]
+            if names is not None:
+                return names
+        elif not path.exists() and not path.with_name(path.name + ".pkl").exists():
+            raise FileNotFoundError(f"No saved model at {path}")
+        # Legacy pickles and older artifacts use the fixed feature list
+        return cls().feature_names
 
     @classmethod
-    def load_model(cls, path: str = "api/rl_model.pkl"):
-        """Load model and all state"""
+    def load_model(cls, path: str = DEFAULT_MODEL_PATH):
+        """
+        Load model and all state
+
+        Reads an artifact directory, or a legacy .pkl file. While an artifact
+        directory has not been saved yet, a legacy pickle next to it
+        (<path>.pkl) is loaded instead; the next save migrates it.
+        """
+        path = Path(path)
+        if path.suffix != ".pkl":
+            if current_version(path) is not None:
+                model_instance = cls.load_artifact(path)
+                print(f"RL Model loaded from {path}")
+                return model_instance
+            path = path.with_name(path.name + ".pkl")
+
         try:
             with open(path, "rb") as f:
                 data = pickle.load(f)
@@ -462,9 +1302,31 @@ class AmICookedRLModel:
             model_instance.current_score = data.get("current_score")
             model_instance.total_corrections = data.get("total_corrections", 0)
             model_instance.correct_predictions = data.get("correct_predictions", 0)
+            model_instance.journal_seq = data.get("journal_seq", 0)
+            for name in ("labelled_feedback", "labelled_used", "labelled_position"):
+                setattr(model_instance, name, data.get(name, 0))
+            model_instance.engine = data.get("engine", "gbr")
+            model_instance.model_id = data.get("model_id")
+            if "recent_feedback" in data:
+                model_instance.recent_feedback = data["recent_feedback"]
+            else:
+                for past in model_instance.feedback_history[-REWARD_WINDOW_SIZE:]:
+                    model_instance.recent_feedback.append(
+                        1.0 if past.feedback == "true" else 0.0,
+                        timestamp=datetime.fromisoformat(past.timestamp).timestamp(),
+                    )
+            model_instance.compile_feature_encoder()
+            model_instance.compile_inference_engine()
 
             print(f"RL Model loaded from {path}")
             return model_instance
         except FileNotFoundError:
             print("No saved RL model found, creating new instance")
             return cls()
+
+
+def _fitted_label_encoder(classes: List) -> LabelEncoder:
+    """LabelEncoder restored from its classes_"""
+    encoder = LabelEncoder()
+    encoder.classes_ = np.array(classes, dtype=object)
+    return encoder
@@ -0,0 +1,177 @@
+"""
+Offline replay of feedback history into the RL adjustment layer
+
+Rebuilds the Q-table from a feedback log, e.g. after changing get_state, the
+learning rate or the discount factor. Base scores for every event are
+recomputed with one batched prediction per chunk (see
+AmICookedRLModel.replay_feedback) and states, actions and rewards are derived
+up front, so only the Q-learning recurrence itself runs per event.
+
+    python api/rl_replay.py --learning-rate 0.05 --discount-factor 0.5
+    python api/rl_replay.py --dry-run
+
+Run it while the server is stopped (its next snapshot would overwrite the
+result), or use POST /admin/replay-feedback on a running server.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Feedback -> (action that should have been taken, reward), as in RLAdjustmentLayer.apply_feedback
+FEEDBACK_ACTIONS = {"true": (0, 1.0), "higher": (1, 0.5), "lower": (-1, 0.5)}
+_FEEDBACK_CODES = {feedback: code for code, feedback in enumerate(FEEDBACK_ACTIONS)}
+
+
+def unique_features(features_list: Sequence[Optional[Dict]]):
+    """
+    Distinct feature dicts in a log and, per event, the index of its dict
+
+    Feedback logs repeat the same answers many times, so base scores and
+    states only need computing once per distinct dict. Values are compared
+    with their types, since e.g. studytime 2 and 2.0 select different Q-table
+    states. Dicts with unhashable values are kept as distinct entries.
+    """
+    unique: List[Optional[Dict]] = []
+    seen: Dict = {}
+    inverse = np.empty(len(features_list), dtype=np.intp)
+    for i, features in enumerate(features_list):
+        try:
+            key = tuple((name, type(value), value) for name, value in features.items()) if features else ()
+            number = seen.get(key)
+        except TypeError:
+            key, number = None, None
+        if number is None:
+            number = len(unique)
+            unique.append(features)
+            if key is not None:
+                seen[key] = number
+        inverse[i] = number
+    return unique, inverse
+
+
+def replay_feedback(layer, features: Sequence[Optional[Dict]], base_scores: Sequence[int],
+                    inverse: np.ndarray, feedback: Sequence[str], timestamps: Sequence[str]) -> Dict:
+    """
+    Apply a feedback log to an RL layer, with the same result as calling
+    layer.apply_feedback for each event in order
+
+    `features` and `base_scores` are the distinct feature dicts of the log and
+    their base scores; event i used features[inverse[i]] (see unique_features).
+    States are looked up once per distinct dict and numbered, and each event's
+    state, next state, action and reward are gathered with array indexing. The
+    Q-values of every state involved are then held in one flat list while the
+    updates run in order, and written back to the Q-table once at the end.
+    Events with unknown feedback are skipped.
+    """
+    table = layer.q_table
+    n_actions = len(layer.actions)
+    feedback_actions = list(FEEDBACK_ACTIONS.values())
+
+    locators: List = []
+    numbers: Dict = {}
+
+    def number_of(loc) -> int:
+        number = numbers.get(loc)
+        if number is None:
+            number = numbers[loc] = len(locators)
+            locators.append(loc)
+        return number
+
+    # State of each distinct dict, and its next state for each kind of feedback
+    state_of = np.empty(len(features), dtype=np.intp)
+    next_state_of = np.empty((len(features), len(feedback_actions)), dtype=np.intp)
+    for j, (event_features, score) in enumerate(zip(features, base_scores)):
+        score = int(score)
+        state_of[j] = number_of(layer.get_state(score, event_features))
+        for code, (action, _) in enumerate(feedback_actions):
+            next_state_of[j, code] = number_of(layer.get_state(min(10, max(1, score + action)), event_features))
+
+    codes = np.fromiter((_FEEDBACK_CODES.get(event, -1) for event in feedback), dtype=np.intp, count=len(feedback))
+    kept = np.flatnonzero(codes >= 0)
+    codes = codes[kept]
+    event_features = inverse[kept]
+
+    states = state_of[event_features]
+    next_states = next_state_of[event_features, codes]
+    action_ids = np.array([layer._action_index[action] for action, _ in feedback_actions])[codes]
+    rewards = np.array([reward for _, reward in feedback_actions])[codes]
+
+    # Q(s,a) ← Q(s,a) + α[r + γ max_a' Q(s',a') - Q(s,a)], on plain floats
+    q = []
+    for loc in locators:
+        q.extend(table.get(loc).tolist())
+    alpha = layer.learning_rate
+    gamma = layer.discount_factor
+    for state, action, reward, next_state in zip(states.tolist(), action_ids.tolist(),
+                                                 rewards.tolist(), next_states.tolist()):
+        start = next_state * n_actions
+        next_max_q = max(q[start:start + n_actions])
+        index = state * n_actions + action
+        current_q = q[index]
+        q[index] = current_q + alpha * (reward + gamma * next_max_q - current_q)
+
+    updates = np.bincount(states, minlength=len(locators))
+    for number, loc in enumerate(locators):
+        if updates[number]:
+            table.set_row(loc, q[number * n_actions:(number + 1) * n_actions], int(updates[number]))
+
+    layer.version += len(kept)
+    layer.reward_stats.update_many(rewards)
+    tail = kept[-layer.recent_rewards.capacity:]
+    layer.recent_rewards.extend(
+        rewards[len(kept) - len(tail):],
+        [datetime.fromisoformat(timestamps[i]).timestamp() for i in tail],
+    )
+
+    return {
+        "events": len(kept),
+        "skipped": len(feedback) - len(kept),
+        "distinct_features": len(features),
+        "states_updated": int((updates > 0).sum()),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from feedback_journal import FeedbackJournal
+    from rl_model import AmICookedRLModel, DEFAULT_MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Rebuild the RL Q-table by replaying the feedback history")
+    parser.add_argument("--model", default=os.environ.get("AMICOOKED_MODEL_PATH", DEFAULT_MODEL_PATH))
+    parser.add_argument("--journal", default=os.environ.get("AMICOOKED_JOURNAL_PATH", "api/feedback_journal.jsonl"),
+                        help="Feedback journal whose tail is included (the server's journal by default)")
+    parser.add_argument("--learning-rate", type=float, help="New learning rate (default: keep the model's)")
+    parser.add_argument("--discount-factor", type=float, help="New discount factor (default: keep the model's)")
+    parser.add_argument("--dry-run", action="store_true", help="Report the result without saving it")
+    args = parser.parse_args(argv)
+
+    journal = FeedbackJournal(args.journal)
+    try:
+        with journal.exclusive():
+            model = AmICookedRLModel.load_model(args.model)
+            if not model.is_trained:
+                print(f"No trained model at {args.model}", file=sys.stderr)
+                return 1
+            journal.replay_into(model)
+
+            started = time.perf_counter()
+            summary = model.replay_feedback(args.learning_rate, args.discount_factor)
+            summary["seconds"] = time.perf_counter() - started
+
+            if not args.dry_run:
+                model.save_model(args.model)
+                journal.compact(model.journal_seq)
+    finally:
+        journal.close()
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
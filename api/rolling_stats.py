@@ -0,0 +1,191 @@
+import bisect
+import json
+import math
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+
+class RunningStats:
+    """Streaming count, sum, mean and variance (Welford's algorithm) in O(1) memory"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]):
+        stats = cls()
+        for value in values:
+            stats.update(value)
+        return stats
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"count": self.count, "total": self.total, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, float]):
+        stats = cls()
+        stats.__dict__.update(state)
+        return stats
+
+    def copy(self) -> "RunningStats":
+        return RunningStats.from_dict(self.to_dict())
+
+    def update(self, value: float):
+        """Add one observation"""
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def update_many(self, values: np.ndarray):
+        """Add a batch of observations (merged with Chan et al.'s parallel formula)"""
+        values = np.asarray(values, dtype=float)
+        n = len(values)
+        if n == 0:
+            return
+        batch_mean = float(values.mean())
+        batch_m2 = float(((values - batch_mean) ** 2).sum())
+        count = self.count + n
+        delta = batch_mean - self.mean
+        self.m2 += batch_m2 + delta * delta * self.count * n / count
+        self.mean += delta * n / count
+        self.total += float(values.sum())
+        self.count = count
+
+    @property
+    def variance(self) -> float:
+        """Population variance of all observations"""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class RollingWindow:
+    """
+    Fixed-size ring buffer of timestamped values.
+
+    Gives the mean over the last `capacity` values in O(1), and over the values
+    recorded in the last T seconds in O(capacity). Time windows can only see
+    values still in the buffer, so size the capacity for the expected rate.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.values = np.zeros(capacity)
+        self.timestamps = np.full(capacity, np.nan)
+        self.position = 0  # Slot for the next value
+        self.size = 0
+        self.total = 0.0  # Sum of the values currently in the buffer
+
+    def append(self, value: float, timestamp: Optional[float] = None):
+        """Record a value (timestamp in epoch seconds, defaults to now)"""
+        if self.size == self.capacity:
+            self.total -= self.values[self.position]
+        else:
+            self.size += 1
+        self.values[self.position] = value
+        self.timestamps[self.position] = time.time() if timestamp is None else timestamp
+        self.total += value
+        self.position = (self.position + 1) % self.capacity
+
+    def extend(self, values: Sequence[float], timestamps: Sequence[float]):
+        """Record many values in order (only the last `capacity` are kept)"""
+        start = max(0, len(values) - self.capacity)
+        for value, timestamp in zip(values[start:], timestamps[start:]):
+            self.append(float(value), timestamp=float(timestamp))
+
+    def copy(self) -> "RollingWindow":
+        """Independent copy of the buffer and cursor"""
+        window = RollingWindow.__new__(RollingWindow)
+        window.__dict__.update(self.__dict__)
+        window.values = self.values.copy()
+        window.timestamps = self.timestamps.copy()
+        return window
+
+    def save(self, directory):
+        """Write the buffers as .npy files and the cursor as JSON"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "values.npy", self.values)
+        np.save(directory / "timestamps.npy", self.timestamps)
+        with open(directory / "window.json", "w") as f:
+            json.dump({"capacity": self.capacity, "position": self.position,
+                       "size": self.size, "total": self.total}, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode: Optional[str] = "c") -> "RollingWindow":
+        """Read a window written by save() (copy-on-write mapped by default)"""
+        directory = Path(directory)
+        with open(directory / "window.json") as f:
+            meta = json.load(f)
+        window = cls(meta["capacity"])
+        window.values = np.asarray(np.load(directory / "values.npy", mmap_mode=mmap_mode))
+        window.timestamps = np.asarray(np.load(directory / "timestamps.npy", mmap_mode=mmap_mode))
+        window.position = meta["position"]
+        window.size = meta["size"]
+        window.total = meta["total"]
+        return window
+
+    def mean(self) -> float:
+        """Mean of the values in the buffer (0.0 when empty)"""
+        return self.total / self.size if self.size else 0.0
+
+    def since(self, seconds: float, now: Optional[float] = None) -> Dict[str, float]:
+        """Count and mean of the values recorded in the last `seconds`"""
+        now = time.time() if now is None else now
+        recent = self.timestamps[:self.size] >= now - seconds
+        count = int(recent.sum())
+        return {
+            "count": count,
+            "mean": float(self.values[:self.size][recent].mean()) if count else 0.0,
+        }
+
+
+class Histogram:
+    """
+    Counts of observations per bucket, for fixed upper bounds (plus +Inf).
+
+    Observing is O(log buckets) and memory is constant. Counts are kept per
+    bucket; cumulative() gives the "less than or equal" form Prometheus uses.
+    """
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = sorted(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Add one observation"""
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+
+    def cumulative(self) -> Dict[str, int]:
+        """Observations less than or equal to each bound, keyed by bound ("+Inf" last)"""
+        result = {}
+        running = 0
+        for bound, count in zip(self.bounds + [math.inf], self.counts):
+            running += count
+            result["+Inf" if bound == math.inf else f"{bound:g}"] = running
+        return result
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "mean": self.total / self.count if self.count else 0.0,
+            "buckets": self.cumulative(),
+        }
@@ -0,0 +1,82 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Optional, Tuple
+
+from rl_model import AmICookedRLModel
+from tree_engine import FlatTreeEnsemble
+
+
+class SharedModelState:
+    """
+    Files that let several server processes serve the same model.
+
+    - engines/<model_id>/: the flattened base model as .npy files. Every worker
+      memory-maps them read-only, so the tree arrays are held once in the page
+      cache instead of once per process.
+    - generation: replaced whenever a worker swaps in a different base model
+      (/train, /retrain, /reset-model). The other workers notice the change and
+      reload the model snapshot.
+
+    Feedback is replicated separately, through the shared FeedbackJournal.
+    """
+
+    def __init__(self, root: str = "api/shared"):
+        self.root = Path(root)
+        self.engines_dir = self.root / "engines"
+        self.generation_path = self.root / "generation"
+        self.engines_dir.mkdir(parents=True, exist_ok=True)
+        self._seen = self._generation_stamp()
+
+    def _generation_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.generation_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def changed(self) -> bool:
+        """Whether another process published a model this one has not loaded"""
+        return self._generation_stamp() != self._seen
+
+    def mark_current(self):
+        """Record that the currently published model has been loaded"""
+        self._seen = self._generation_stamp()
+
+    def attach(self, model: AmICookedRLModel) -> bool:
+        """Replace the model's inference engine with the shared, memory-mapped copy"""
+        if model.inference_engine is None or model.model_id is None:
+            return False
+
+        directory = self.engines_dir / model.model_id
+        if not (directory / "meta.json").exists():
+            # Export under a private name, then rename; another worker may win the race
+            tmp_dir = self.engines_dir / f".{model.model_id}.{os.getpid()}.tmp"
+            model.inference_engine.save(tmp_dir)
+            try:
+                os.rename(tmp_dir, directory)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        model.inference_engine = FlatTreeEnsemble.load(directory, mmap_mode="r")
+        return True
+
+    def publish(self, model: AmICookedRLModel):
+        """
+        Announce a new base model
+
+        Its snapshot must already be saved, and the caller should hold the
+        journal lock so no other worker snapshots a stale model in between.
+        """
+        self.attach(model)
+
+        tmp_path = self.generation_path.with_name(f"generation.{os.getpid()}.tmp")
+        tmp_path.write_text(model.model_id or uuid.uuid4().hex)
+        os.replace(tmp_path, self.generation_path)
+        self.mark_current()
+
+        # Workers still mapping an older engine keep their mapping after the unlink
+        for directory in self.engines_dir.iterdir():
+            if directory.name != model.model_id and not directory.name.startswith("."):
+                shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,219 @@
+"""
+Synthetic student datasets and feedback streams for scale testing
+
+A Gaussian copula is fitted to student-por.csv: every column keeps its own
+empirical distribution (the same values and frequencies) and the columns keep
+the rank correlations of the real data (e.g. G1/G2/G3, Dalc/Walc, failures and
+grades). Output has exactly the source schema, is deterministic for a seed and
+is generated in chunks, so any size can be written in bounded memory:
+
+    python api/synthetic_data.py students --rows 1000000 --seed 7 --output students-1m.csv
+    python api/synthetic_data.py feedback --events 1000000 --seed 7 --output feedback-1m.jsonl
+
+Feedback streams are written one RLFeedback per line (the format of an
+artifact's history.jsonl) and can be applied with model.apply_feedback.
+"""
+import argparse
+import json
+import sys
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+from scipy.stats import norm
+
+from dataset import DATASET_PATH
+from rl_model import AmICookedRLModel, RLFeedback
+
+DEFAULT_CHUNK_SIZE = 100000
+
+
+class StudentDataGenerator:
+    """
+    Gaussian copula over the columns of a student dataset.
+
+    Each column is described by its distinct values and their cumulative
+    frequencies. Text columns are ordered by their mean final grade first, so
+    their dependence on the other columns is roughly monotonic, as the copula
+    assumes. Sampling draws correlated normals, maps them to uniforms and
+    reads each column's value off its empirical CDF.
+    """
+
+    def __init__(self, columns: List[str], values: Dict[str, np.ndarray], cumulative: Dict[str, np.ndarray],
+                 correlation: np.ndarray, dtypes: Dict[str, str]):
+        self.columns = columns
+        self.values = values
+        self.cumulative = cumulative
+        self.correlation = correlation
+        self.dtypes = dtypes
+        # Small ridge so rounding never leaves the matrix not positive definite
+        self._cholesky = np.linalg.cholesky(correlation + np.eye(len(columns)) * 1e-9)
+
+    @classmethod
+    def fit(cls, df: pd.DataFrame, target: str = "G3") -> "StudentDataGenerator":
+        values, cumulative, dtypes = {}, {}, {}
+        scores = np.empty((len(df), len(df.columns)))
+        attenuation = np.empty(len(df.columns))
+        for i, name in enumerate(df.columns):
+            column = df[name]
+            counts = column.value_counts()
+            if column.dtype.kind in "iuf":
+                counts = counts.sort_index()
+                dtypes[name] = str(column.dtype)
+            else:
+                # Order categories by the mean target so the copula sees a monotonic relation
+                counts = counts.loc[df.groupby(name)[target].mean().sort_values(kind="stable").index]
+                dtypes[name] = "object"
+            probabilities = counts.to_numpy() / len(df)
+            upper = np.cumsum(probabilities)
+            upper[-1] = 1.0
+            values[name] = counts.index.to_numpy()
+            cumulative[name] = upper
+
+            # Normal score of each observation: the middle of its value's CDF step
+            codes = pd.Index(counts.index).get_indexer(column)
+            levels = ndtri(upper - probabilities / 2)
+            scores[:, i] = levels[codes]
+            attenuation[i] = cls._attenuation(levels, upper, probabilities)
+
+        # Scores of tied values correlate less than the normals behind them; undo that per pair
+        correlation = np.corrcoef(scores, rowvar=False) / np.outer(attenuation, attenuation)
+        correlation = cls._nearest_correlation(np.clip(correlation, -0.99, 0.99))
+        return cls(list(df.columns), values, cumulative, correlation, dtypes)
+
+    @staticmethod
+    def _attenuation(levels: np.ndarray, upper: np.ndarray, probabilities: np.ndarray) -> float:
+        """Correlation between a standard normal and the score of the value it is binned into"""
+        cuts = ndtri(np.clip(upper, 0, 1))
+        density = norm.pdf(np.concatenate([[-np.inf], cuts]))
+        covariance = float(np.sum(levels * (density[:-1] - density[1:])))
+        mean = float(np.sum(probabilities * levels))
+        variance = float(np.sum(probabilities * levels ** 2)) - mean ** 2
+        return covariance / np.sqrt(variance) if variance > 0 else 1.0
+
+    @staticmethod
+    def _nearest_correlation(matrix: np.ndarray) -> np.ndarray:
+        """Closest positive definite matrix with a unit diagonal (eigenvalues clipped)"""
+        np.fill_diagonal(matrix, 1.0)
+        eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+        matrix = (eigenvectors * np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(matrix))
+        return matrix / np.outer(scale, scale)
+
+    @classmethod
+    def from_csv(cls, path: str = DATASET_PATH) -> "StudentDataGenerator":
+        return cls.fit(pd.read_csv(path))
+
+    def sample(self, n_rows: int, rng: np.random.Generator) -> pd.DataFrame:
+        """n_rows synthetic students with the source columns and dtypes"""
+        normals = rng.standard_normal((n_rows, len(self.columns))) @ self._cholesky.T
+        uniforms = ndtr(normals)
+        data = {}
+        for i, name in enumerate(self.columns):
+            cumulative = self.cumulative[name]
+            index = np.minimum(np.searchsorted(cumulative, uniforms[:, i], side="right"), len(cumulative) - 1)
+            column = self.values[name][index]
+            data[name] = column if self.dtypes[name] == "object" else column.astype(self.dtypes[name])
+        return pd.DataFrame(data, columns=self.columns)
+
+    def generate(self, n_rows: int, seed: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """n_rows students in chunks of at most chunk_size (the same rows for a seed, whatever the chunk size)"""
+        rng = np.random.default_rng(seed)
+        for start in range(0, n_rows, chunk_size):
+            yield self.sample(min(chunk_size, n_rows - start), rng)
+
+    def write_csv(self, path: str, n_rows: int, seed: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Write n_rows students as a CSV with the source schema; returns the row count"""
+        written = 0
+        with open(path, "w", newline="") as f:
+            for chunk in self.generate(n_rows, seed, chunk_size):
+                chunk.to_csv(f, index=False, header=written == 0)
+                written += len(chunk)
+        if written == 0:
+            pd.DataFrame(columns=self.columns).to_csv(path, index=False)
+        return written
+
+    def feedback_stream(self, n_events: int, seed: int = 0, accuracy: float = 0.6,
+                        label_fraction: float = 0.1, start: Optional[datetime] = None,
+                        interval_seconds: float = 1.0, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[RLFeedback]:
+        """
+        Feedback events on synthetic students
+
+        Each event carries the student's model features and a predicted score
+        that matches the score implied by the student's final grade with
+        probability `accuracy` and is off by one or two otherwise. The
+        feedback says how the prediction compares ("true", "higher", "lower"),
+        and `label_fraction` of the events also report the actual grade.
+        """
+        feature_names = AmICookedRLModel().feature_names
+        rng = np.random.default_rng(seed)
+        timestamp = start or datetime(2024, 1, 1)
+        step = timedelta(seconds=interval_seconds)
+        generated = 0
+        while generated < n_events:
+            students = self.sample(min(chunk_size, n_events - generated), rng)
+            n = len(students)
+            true_scores = AmICookedRLModel._grades_to_scores(students["G3"].to_numpy())
+            errors = rng.choice([-2, -1, 1, 2], size=n) * (rng.random(n) >= accuracy)
+            predicted = np.clip(true_scores + errors, 1, 10)
+            labelled = rng.random(n) < label_fraction
+
+            rows = students[feature_names].astype(object).to_dict("records")
+            for row, truth, score, grade, has_label in zip(rows, true_scores.tolist(), predicted.tolist(),
+                                                           students["G3"].tolist(), labelled.tolist()):
+                if truth == score:
+                    feedback = "true"
+                else:
+                    feedback = "higher" if truth > score else "lower"
+                yield RLFeedback(
+                    features=row,
+                    predicted_score=int(score),
+                    feedback=feedback,
+                    timestamp=timestamp.isoformat(),
+                    actual_grade=float(grade) if has_label else None,
+                )
+                timestamp += step
+            generated += n
+
+    def write_feedback(self, path: str, n_events: int, seed: int = 0, **options) -> int:
+        """Write a feedback stream as JSON lines (RLFeedback fields); returns the event count"""
+        written = 0
+        with open(path, "w") as f:
+            for event in self.feedback_stream(n_events, seed, **options):
+                f.write(json.dumps(asdict(event)) + "\n")
+                written += 1
+        return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic students or feedback")
+    parser.add_argument("--source", default=DATASET_PATH, help="Dataset the generator is fitted to")
+    parser.add_argument("--seed", type=int, default=0)
+    subparsers = parser.add_subparsers(dest="kind", required=True)
+
+    students = subparsers.add_parser("students", help="A CSV with the schema of the source dataset")
+    students.add_argument("--rows", type=float, required=True, help="Number of students (e.g. 1e6)")
+    students.add_argument("--output", required=True)
+
+    feedback = subparsers.add_parser("feedback", help="Feedback events as JSON lines")
+    feedback.add_argument("--events", type=float, required=True, help="Number of events (e.g. 1e6)")
+    feedback.add_argument("--accuracy", type=float, default=0.6, help="Fraction of correct predictions")
+    feedback.add_argument("--label-fraction", type=float, default=0.1, help="Fraction of events with the actual grade")
+    feedback.add_argument("--output", required=True)
+    args = parser.parse_args(argv)
+
+    generator = StudentDataGenerator.from_csv(args.source)
+    if args.kind == "students":
+        count = generator.write_csv(args.output, int(args.rows), seed=args.seed)
+    else:
+        count = generator.write_feedback(args.output, int(args.events), seed=args.seed,
+                                         accuracy=args.accuracy, label_fraction=args.label_fraction)
+    print(json.dumps({"kind": args.kind, "count": count, "output": args.output}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+Tests for the base model engine registry
+"""
+import copy
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from base_engines import ENGINES, evaluate_engines, get_engine
+from rl_model import AmICookedRLModel
+
+
+def test_unknown_engine_is_rejected():
+    with pytest.raises(ValueError, match="Unknown base engine"):
+        get_engine("xgboost")
+    with pytest.raises(ValueError):
+        AmICookedRLModel("xgboost")
+
+
+def test_evaluation_reports_every_engine(trained_model):
+    X_train, X_test, y_train, y_test = copy.deepcopy(trained_model).training_split()
+    report = evaluate_engines(X_train, X_test, y_train, y_test, iterations=5)
+
+    assert set(report) == set(ENGINES)
+    for result in report.values():
+        assert result["train_seconds"] > 0
+        assert result["predict_one"]["p50_ms"] > 0
+        assert result["predict_batch"]["rows"] == len(X_test)
+        assert -1 < result["test_r2"] <= 1
+    assert report["gbr"]["test_r2"] == pytest.approx(trained_model.current_score)
+
+
+@pytest.mark.parametrize("engine", ["hist_gbr", "linear"])
+def test_model_trains_and_persists_with_engine(engine, student_rows, tmp_path):
+    model = AmICookedRLModel(engine)
+    results = model.load_and_train_initial_model()
+    assert results["engine"] == engine
+    assert model.inference_engine is None
+    scores = model.predict_scores(student_rows[:20])
+    assert all(1 <= score <= 10 for score in scores)
+    assert [model.predict_score(row) for row in student_rows[:20]] == scores
+
+    model.save_model(tmp_path / "model")
+    loaded = AmICookedRLModel.load_model(tmp_path / "model")
+    assert loaded.engine == engine
+    assert loaded.predict_scores(student_rows[:20]) == scores
+
+
+def test_incremental_updates_follow_the_engine(student_rows):
+    model = AmICookedRLModel("hist_gbr")
+    model.load_and_train_initial_model()
+    for row in student_rows[:10]:
+        model.apply_feedback(features=row, predicted_score=5, feedback="true", actual_grade=20)
+    # Too few rows for a split (min_samples_leaf): the stages change nothing, so nothing is consumed
+    assert model.extend_base_model(n_estimators=3)["model"] is None
+    assert model.pending_labelled == 10
+
+    for row in student_rows[10:60]:
+        model.apply_feedback(features=row, predicted_score=5, feedback="true", actual_grade=20)
+    result = model.extend_base_model(n_estimators=3)
+    assert result["model"].base_model.n_iter_ == 103
+    assert result["model"].pending_labelled == 0
+
+    linear = AmICookedRLModel("linear")
+    linear.load_and_train_initial_model()
+    with pytest.raises(TypeError):
+        linear.extend_base_model()
+
+
+def test_engines_endpoint(server):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        body = client.get("/engines").json()
+        assert body["current"] == "gbr"
+        assert set(body["engines"]) == set(ENGINES)
+        assert client.post("/retrain", json={"engine": "xgboost"}).status_code == 400
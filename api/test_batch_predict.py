@@ -0,0 +1,67 @@
+"""
+Tests for batch scoring with AmICookedRLModel.predict_scores
+"""
+import copy
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+
+def test_batch_matches_single_predictions(trained_model, student_rows):
+    rows = student_rows[:50] + [{"studytime": 2, "G1": 10}, {"higher": "no", "failures": 3}]
+
+    batch = trained_model.predict_scores(rows, use_rl_adjustment=False)
+    single = [trained_model.predict_score(row, use_rl_adjustment=False) for row in rows]
+
+    assert batch == single
+
+
+def test_batch_applies_learned_adjustments(trained_model):
+    saved_rl_layer = copy.deepcopy(trained_model.rl_layer)
+    try:
+        features = {"studytime": 2, "failures": 0, "G1": 12, "G2": 12}
+        base_score = trained_model.predict_score(features, use_rl_adjustment=False)
+        for _ in range(5):
+            trained_model.rl_layer.apply_feedback(base_score, "higher", features)
+
+        scores = trained_model.predict_scores([features] * 3)
+        expected = min(10, base_score + 1)
+        assert scores == [expected] * 3
+        assert scores[0] == trained_model.predict_score(features)
+    finally:
+        trained_model.rl_layer = saved_rl_layer
+
+
+def test_batch_empty_and_order(trained_model, student_rows):
+    assert trained_model.predict_scores([]) == []
+
+    rows = student_rows[:20]
+    forward = trained_model.predict_scores(rows, use_rl_adjustment=False)
+    backward = trained_model.predict_scores(rows[::-1], use_rl_adjustment=False)
+    assert forward == backward[::-1]
+    assert np.all((np.array(forward) >= 1) & (np.array(forward) <= 10))
+
+
+def test_endpoint_reports_invalid_items_individually(server):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        valid = {"studytime": 2, "G1": 12, "G2": 13}
+        students = [valid, "not a student", None, [1, 2], 7, {"studytime": "lots"}, {}, valid]
+        response = client.post("/predict/batch", json={"students": students})
+        assert response.status_code == 200
+        results = response.json()["results"]
+
+        assert [result["index"] for result in results] == list(range(len(students)))
+        expected = client.post("/predict", json=valid).json()["score"]
+        assert results[0]["score"] == results[-1]["score"] == expected
+        for result in results[1:5]:
+            assert result["score"] is None
+            assert result["error"].startswith("input: Input should be a valid dictionary")
+        assert results[5]["error"] == "studytime: Input should be a valid integer, unable to parse string as an integer"
+        assert client.post("/predict", json={"studytime": "lots"}).status_code == 422
+        assert results[6]["error"] == "At least one feature must be provided"
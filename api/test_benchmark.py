@@ -0,0 +1,45 @@
+"""
+Tests for the benchmark suite (tiny iteration counts; timings are not asserted)
+"""
+import json
+
+from benchmark import api_benchmarks, compare, main, measure
+
+PERCENTILE_KEYS = {"iterations", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "min_ms", "max_ms", "ops_per_sec"}
+
+
+def test_measure_reports_percentiles():
+    calls = []
+    result = measure(lambda: calls.append(1), iterations=50, warmup=2)
+    assert len(calls) == 52
+    assert set(result) == PERCENTILE_KEYS
+    assert result["min_ms"] <= result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"] <= result["max_ms"]
+    assert result["ops_per_sec"] > 0
+
+
+def test_compare_flags_slower_benchmarks():
+    baseline = {"results": {"fast": {"p50_ms": 1.0}, "slow": {"p50_ms": 1.0}}}
+    report = {"results": {"fast": {"p50_ms": 1.1}, "slow": {"p50_ms": 2.0}, "new": {"p50_ms": 5.0}}}
+    regressions = compare(report, baseline, threshold=1.25)
+    assert [r["benchmark"] for r in regressions] == ["slow"]
+    assert regressions[0]["ratio"] == 2.0
+
+
+def test_api_benchmarks_use_test_client(server):
+    results = api_benchmarks(server, scale=0.01)
+    assert {"api_predict", "api_feedback", "api_average_stats", "average_stats_compute"} <= set(results)
+    assert all(set(result) == PERCENTILE_KEYS for result in results.values())
+
+
+def test_cli_writes_json_report(tmp_path):
+    output = tmp_path / "bench.json"
+    assert main(["--no-api", "--quick", "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    assert {"python", "numpy", "sklearn"} <= set(report["meta"])
+    assert {"prepare_features", "predict_score", "apply_feedback", "save_model_artifact",
+            "load_model_artifact", "train"} <= set(report["results"])
+
+    # A report compared with itself has no regressions
+    assert main(["--no-api", "--quick", "--output", str(output), "--compare", str(output),
+                 "--threshold", "100"]) == 0
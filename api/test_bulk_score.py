@@ -0,0 +1,93 @@
+"""
+Tests for streaming bulk scoring of CSV and JSONL files
+"""
+import copy
+import json
+
+import pandas as pd
+import pytest
+
+import bulk_score
+from bulk_score import main as bulk_main
+from bulk_score import score_file
+from conftest import REPO_ROOT
+from feedback_journal import FeedbackJournal
+
+
+@pytest.fixture(scope="module")
+def saved_model(trained_model, tmp_path_factory):
+    path = tmp_path_factory.mktemp("bulk") / "model"
+    trained_model.save_model(path)
+    return path
+
+
+@pytest.fixture(scope="module")
+def roster():
+    df = pd.read_csv(REPO_ROOT / "api" / "student-por.csv")
+    df.insert(0, "student_id", [f"s{i}" for i in range(len(df))])
+    return df
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_csv_scores_match_predict_scores(trained_model, saved_model, roster, tmp_path, workers):
+    roster.to_csv(tmp_path / "roster.csv", index=False)
+
+    summary = score_file(str(tmp_path / "roster.csv"), str(tmp_path / "scores.csv"), model_path=str(saved_model),
+                         chunk_size=100, workers=workers, id_column="student_id")
+    assert summary["rows"] == len(roster)
+
+    scores = pd.read_csv(tmp_path / "scores.csv")
+    assert scores["student_id"].tolist() == roster["student_id"].tolist()
+    expected = trained_model.predict_scores(roster[trained_model.feature_names].to_dict("records"))
+    assert scores["score"].tolist() == expected
+    assert scores["label"].tolist() == [trained_model.get_score_label(s) for s in expected]
+
+
+def test_jsonl_with_missing_fields(trained_model, saved_model, tmp_path, capsys):
+    students = [{"studytime": 2, "G1": 12, "G2": 13}, {"failures": 1, "higher": "yes"}, {}]
+    (tmp_path / "roster.jsonl").write_text("".join(json.dumps(s) + "\n" for s in students))
+
+    assert bulk_main([str(tmp_path / "roster.jsonl"), str(tmp_path / "scores.jsonl"),
+                      "--model", str(saved_model), "--no-journal", "--chunk-size", "2"]) == 0
+    assert json.loads(capsys.readouterr().out)["rows"] == 3
+
+    results = [json.loads(line) for line in (tmp_path / "scores.jsonl").read_text().splitlines()]
+    assert [r["row"] for r in results] == [0, 1, 2]
+    assert [r["score"] for r in results] == trained_model.predict_scores(students)
+
+
+def test_journal_tail_is_read_without_touching_the_journal(trained_model, saved_model, roster, tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    journal = FeedbackJournal(str(journal_path))
+    expected_model = copy.deepcopy(trained_model)
+    for studytime in (1, 2, 3, 4) * 5:
+        record = expected_model.apply_feedback(features={"studytime": studytime}, predicted_score=5, feedback="higher")
+        journal.append(record)
+    journal.close()
+    (tmp_path / "journal.jsonl.lock").unlink()
+    with open(journal_path, "a") as f:
+        f.write('{"seq": 99, "features"')  # A record the server is still writing
+    before = journal_path.read_bytes()
+
+    roster.head(50).to_csv(tmp_path / "roster.csv", index=False)
+    score_file(str(tmp_path / "roster.csv"), str(tmp_path / "scores.csv"), model_path=str(saved_model),
+               journal_path=str(journal_path))
+
+    assert journal_path.read_bytes() == before
+    assert not (tmp_path / "journal.jsonl.lock").exists()
+    expected = expected_model.predict_scores(roster.head(50)[trained_model.feature_names].to_dict("records"))
+    assert pd.read_csv(tmp_path / "scores.csv")["score"].tolist() == expected
+
+
+def test_workers_do_not_load_the_model_in_the_parent(trained_model, saved_model, roster, tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the parent process loaded the model")
+
+    monkeypatch.setattr(bulk_score.AmICookedRLModel, "load_model", fail)
+    roster.head(20).to_csv(tmp_path / "roster.csv", index=False)
+    summary = score_file(str(tmp_path / "roster.csv"), str(tmp_path / "scores.csv"), model_path=str(saved_model),
+                         workers=1)
+    assert summary["rows"] == 20
+    assert bulk_score.AmICookedRLModel.saved_feature_names(saved_model) == trained_model.feature_names
+    with pytest.raises(FileNotFoundError):
+        bulk_score.AmICookedRLModel.saved_feature_names(tmp_path / "missing")
@@ -0,0 +1,177 @@
+"""
+Tests for copy-on-write model state: writers update a fork, readers never block
+"""
+import copy
+import threading
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from rl_model import AmICookedRLModel
+
+
+def q_values(model):
+    return {state: dict(actions) for state, actions in model.rl_layer.q_table.items()}
+
+
+def test_fork_leaves_the_published_model_untouched(trained_model):
+    live = copy.deepcopy(trained_model)
+    features = {"studytime": 2, "failures": 0, "G1": 11, "G2": 12}
+    before = (q_values(live), live.rl_layer.version, live.total_corrections,
+              live.recent_feedback.values.copy(), live.predict_score(features))
+
+    forked = live.fork()
+    for _ in range(20):
+        forked.apply_feedback(features=features, predicted_score=5, feedback="lower")
+
+    assert (q_values(live), live.rl_layer.version, live.total_corrections) == before[:3]
+    assert np.array_equal(live.recent_feedback.values, before[3])
+    assert live.predict_score(features) == before[4]
+    assert forked.total_corrections == live.total_corrections + 20
+    assert len(forked.feedback_history) == len(live.feedback_history) + 20
+    assert forked.predict_score(features) < before[4]
+    assert forked.base_model is live.base_model
+
+
+def test_forked_artifact_history_is_independent(trained_model, tmp_path):
+    model = copy.deepcopy(trained_model)
+    model.apply_feedback(features={"studytime": 2}, predicted_score=5, feedback="true")
+    model.save_model(tmp_path / "model")
+    live = AmICookedRLModel.load_model(tmp_path / "model")
+    live.apply_feedback(features={"studytime": 3}, predicted_score=5, feedback="higher")
+    before = [record.feedback for record in live.feedback_history]
+
+    forked = live.fork()
+    forked.apply_feedback(features={"studytime": 1}, predicted_score=5, feedback="lower")
+    forked.save_model(tmp_path / "model")
+
+    # Saving the fork moves its history to the new version; the live model still reads the old one
+    assert [record.feedback for record in live.feedback_history] == before
+    assert [record.feedback for record in forked.feedback_history] == before + ["lower"]
+
+
+def test_cached_adjustments_stay_valid_across_forks(trained_model):
+    live = copy.deepcopy(trained_model)
+    features = {"studytime": 1, "failures": 2, "G1": 9, "G2": 9}
+    score = live.predict_score(features)
+
+    # Feedback on another state keeps the cached adjustment; on its own state it is recomputed
+    forked = live.fork()
+    forked.apply_feedback(features={"studytime": 4, "failures": 0, "G1": 18, "G2": 18},
+                          predicted_score=1, feedback="true")
+    hits = forked.prediction_cache.stats()["hits"]
+    assert forked.predict_score(features) == score
+    assert forked.prediction_cache.stats()["hits"] == hits + 1
+
+    for _ in range(20):
+        forked.apply_feedback(features=features, predicted_score=score, feedback="higher")
+    assert forked.predict_score(features) > score
+    assert live.predict_score(features) == score
+
+
+def test_predictions_do_not_wait_for_writers(server):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        student = {"studytime": 2, "failures": 0, "G1": 70, "G2": 75}
+
+        # A feedback write or snapshot holding the lock does not hold up predictions
+        with server.feedback_lock:
+            started = time.monotonic()
+            assert client.post("/predict", json=student).status_code == 200
+            assert client.post("/predict/batch", json={"students": [student] * 3}).status_code == 200
+            assert time.monotonic() - started < 5
+
+        # Feedback publishes a new model instance; the previous one is unchanged
+        published = server.model
+        before = q_values(published)
+        errors = []
+
+        def predict_loop():
+            for _ in range(50):
+                response = client.post("/predict", json=student)
+                if response.status_code != 200:
+                    errors.append(response.text)
+
+        readers = [threading.Thread(target=predict_loop) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for _ in range(20):
+            assert client.post("/feedback", json={
+                "features": student, "predicted_score": 5, "feedback": "lower",
+            }).status_code == 200
+        for reader in readers:
+            reader.join()
+
+        assert errors == []
+        assert server.model is not published
+        assert q_values(published) == before
+        assert server.model.total_corrections == published.total_corrections + 20
+
+
+def test_feedback_does_not_recompute_dataset_averages(server, monkeypatch):
+    calls = []
+    compute = server.compute_average_params
+    monkeypatch.setattr(server, "compute_average_params", lambda df: calls.append(1) or compute(df))
+    monkeypatch.setitem(server._average_params_cache, "training_data", None)
+
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        first = client.get("/average-stats").json()
+        for feedback in ("higher", "lower", "true"):
+            assert client.post("/feedback", json={
+                "features": {"studytime": 3, "failures": 1}, "predicted_score": 5, "feedback": feedback,
+            }).status_code == 200
+            assert client.get("/average-stats").json()["average_person_params"] == first["average_person_params"]
+        assert len(calls) == 1
+
+
+def test_feedback_is_published_only_once_journaled(server, monkeypatch):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        published = server.model
+        history_size = len(published.feedback_history)
+
+        def fail(record):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(server.journal, "append", fail)
+        response = client.post("/feedback", json={
+            "features": {"studytime": 2}, "predicted_score": 5, "feedback": "higher",
+        })
+        assert response.status_code == 500
+        assert server.model is published
+        assert len(server.model.feedback_history) == history_size
+
+
+def test_snapshot_publishes_a_saved_fork(server):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        client.post("/feedback", json={"features": {"studytime": 3}, "predicted_score": 5, "feedback": "true"})
+        published = server.model
+        history = published.feedback_history
+        state = (history.path, history.saved_count, len(history._new))
+
+        server.snapshot_model()
+
+        # Readers holding the old model keep a consistent history; the saved fork replaces it
+        assert published.feedback_history is history
+        assert (history.path, history.saved_count, len(history._new)) == state
+        assert server.model is not published
+        assert server.model.feedback_history._new == []
+        assert list(server.model.feedback_history) == list(history)
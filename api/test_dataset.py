@@ -0,0 +1,59 @@
+"""
+Tests for the columnar dataset cache
+"""
+import shutil
+
+import pandas as pd
+import pytest
+
+import dataset
+from dataset import ColumnarDataset, load_dataset
+
+CSV = "api/student-por.csv"
+
+
+@pytest.fixture
+def csv_copy(tmp_path):
+    path = tmp_path / "students.csv"
+    shutil.copy(CSV, path)
+    return path
+
+
+def test_columns_are_compact_and_round_trip():
+    original = pd.read_csv(CSV)
+    data = ColumnarDataset.from_dataframe(original, "digest")
+
+    assert all(values.dtype.itemsize == 1 for values in data.columns.values())
+    assert data.categories["Mjob"] == sorted(original["Mjob"].unique())
+
+    frame = data.to_dataframe()
+    assert list(frame.columns) == list(original.columns)
+    for name in original.columns:
+        assert frame[name].astype(original[name].dtype).tolist() == original[name].tolist()
+
+    report = data.memory_report()
+    assert report["rows"] == len(original)
+    assert report["total_bytes"] * 10 < report["default_pandas_bytes"]
+
+
+def test_cache_is_keyed_on_file_contents(csv_copy, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    first = load_dataset(csv_copy, cache_dir)
+    assert (cache_dir / first.source_digest / "dataset.json").exists()
+
+    # Unchanged file: served from memory, then from the on-disk cache, never re-parsed
+    monkeypatch.setattr(dataset.pd, "read_csv", lambda *args, **kwargs: pytest.fail("CSV re-parsed"))
+    assert load_dataset(csv_copy, cache_dir) is first
+    dataset._loaded.clear()
+    reloaded = load_dataset(csv_copy, cache_dir)
+    assert reloaded is not first
+    assert reloaded.to_dataframe().equals(first.to_dataframe())
+    monkeypatch.undo()
+
+    # Changed contents: new digest, parsed again
+    with open(csv_copy, "a") as f:
+        f.write('"MS","M",18,"U","GT3","T",2,2,"other","other","home","mother",1,2,0,'
+                '"no","no","no","no","yes","yes","yes","no",4,3,3,1,1,5,0,"10","11",11\n')
+    changed = load_dataset(csv_copy, cache_dir)
+    assert changed.source_digest != first.source_digest
+    assert changed.n_rows == first.n_rows + 1
@@ -0,0 +1,65 @@
+"""
+Tests for the compiled feature encoder used by prepare_features
+"""
+import numpy as np
+
+
+def reference_prepare_features(model, features):
+    """The original per-request encoding, kept here as the parity reference"""
+    feature_values = []
+    for feature_name in model.feature_names:
+        if feature_name in features and features[feature_name] is not None:
+            value = features[feature_name]
+            if feature_name in model.categorical_features:
+                if feature_name in model.label_encoders:
+                    try:
+                        value = model.label_encoders[feature_name].transform([str(value)])[0]
+                    except ValueError:
+                        value = 0
+                else:
+                    value = 0
+            elif isinstance(value, bool):
+                value = 1 if value else 0
+            if feature_name in model.non_controllable_features:
+                value = float(value) * model.non_controllable_weight
+            feature_values.append(float(value))
+        elif model.training_data is not None and feature_name in model.training_data.columns:
+            if feature_name in model.categorical_features:
+                feature_values.append(0)
+            else:
+                feature_values.append(float(model.training_data[feature_name].mean()))
+        else:
+            feature_values.append(0.0)
+    return np.array(feature_values).reshape(1, -1)
+
+
+def test_full_rows_match_reference(trained_model, student_rows):
+    for row in student_rows[:100]:
+        np.testing.assert_array_equal(
+            trained_model.prepare_features(row),
+            reference_prepare_features(trained_model, row),
+        )
+
+
+def test_partial_and_unusual_inputs_match_reference(trained_model):
+    cases = [
+        {},
+        {"studytime": 2, "G1": 10},
+        {"sex": "X", "Mjob": "astronaut", "age": 17},
+        {"paid": True, "famrel": True, "absences": False},
+        {"Medu": 3, "Fedu": None, "higher": "yes", "unknown_feature": 5},
+    ]
+    for features in cases:
+        np.testing.assert_array_equal(
+            trained_model.prepare_features(features),
+            reference_prepare_features(trained_model, features),
+        )
+
+
+def test_encode_many_matches_single_rows(trained_model, student_rows):
+    rows = student_rows[:25] + [{"studytime": 4}]
+    encoder = trained_model.feature_encoder
+    batch = encoder.encode_many(rows)
+    assert batch.shape == (len(rows), len(trained_model.feature_names))
+    for i, row in enumerate(rows):
+        np.testing.assert_array_equal(batch[i], encoder.encode(row)[0])
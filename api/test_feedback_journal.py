@@ -0,0 +1,122 @@
+"""
+Tests for the append-only feedback journal
+"""
+import copy
+
+from feedback_journal import FeedbackJournal
+from rl_model import RLFeedback
+
+
+def make_feedback(i):
+    return RLFeedback(
+        features={"studytime": 1 + i % 4, "failures": i % 2, "G1": 10 + i % 5},
+        predicted_score=5,
+        feedback=["true", "higher", "lower"][i % 3],
+    )
+
+
+def test_append_and_read(tmp_path):
+    journal = FeedbackJournal(tmp_path / "journal.jsonl", fsync="always")
+    seqs = [journal.append(make_feedback(i)) for i in range(5)]
+    assert seqs == [1, 2, 3, 4, 5]
+
+    records = list(journal.read(after_seq=3))
+    assert [seq for seq, _ in records] == [4, 5]
+    assert records[0][1].features == make_feedback(3).features
+    assert records[0][1].feedback == make_feedback(3).feedback
+    journal.close()
+
+    reopened = FeedbackJournal(tmp_path / "journal.jsonl")
+    assert reopened.last_seq == 5
+    assert reopened.pending == 5
+    reopened.close()
+
+
+def test_compact_keeps_tail_and_sequence(tmp_path):
+    journal = FeedbackJournal(tmp_path / "journal.jsonl")
+    for i in range(6):
+        journal.append(make_feedback(i))
+
+    journal.compact(upto_seq=4)
+    assert [seq for seq, _ in journal.read()] == [5, 6]
+    assert journal.pending == 2
+    assert journal.append(make_feedback(6)) == 7
+    journal.close()
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = FeedbackJournal(path)
+    journal.append(make_feedback(0))
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"seq": 2, "features": {"stud')
+
+    reopened = FeedbackJournal(path)
+    assert reopened.last_seq == 1
+    assert reopened.append(make_feedback(1)) == 2
+    assert [seq for seq, _ in reopened.read()] == [1, 2]
+    reopened.close()
+
+
+def test_snapshot_plus_replay_restores_state(trained_model, tmp_path):
+    live = copy.deepcopy(trained_model)
+    journal = FeedbackJournal(tmp_path / "journal.jsonl")
+
+    for i in range(4):
+        live.journal_seq = journal.append(live.apply_feedback(**_kwargs(make_feedback(i))))
+    live.save_model(tmp_path / "model.pkl")
+    journal.compact(live.journal_seq)
+
+    for i in range(4, 10):
+        live.journal_seq = journal.append(live.apply_feedback(**_kwargs(make_feedback(i))))
+    journal.close()
+
+    restored = type(live).load_model(tmp_path / "model.pkl")
+    reopened = FeedbackJournal(tmp_path / "journal.jsonl")
+    assert reopened.replay_into(restored) == 6
+
+    assert restored.journal_seq == live.journal_seq == 10
+    assert len(restored.feedback_history) == len(live.feedback_history)
+    assert restored.feedback_history[-1].timestamp == live.feedback_history[-1].timestamp
+    assert restored.total_corrections == live.total_corrections
+    assert {k: dict(v) for k, v in restored.rl_layer.q_table.items()} == \
+        {k: dict(v) for k, v in live.rl_layer.q_table.items()}
+    reopened.close()
+
+
+def _kwargs(feedback):
+    return {
+        "features": feedback.features,
+        "predicted_score": feedback.predicted_score,
+        "feedback": feedback.feedback,
+    }
+
+
+def test_journals_sharing_a_file_replicate_feedback(trained_model, tmp_path):
+    # Two handles on one path stand in for two worker processes
+    path = tmp_path / "journal.jsonl"
+    first, second = FeedbackJournal(path), FeedbackJournal(path)
+    worker_a, worker_b = copy.deepcopy(trained_model), copy.deepcopy(trained_model)
+
+    for i in range(3):
+        worker_a.journal_seq = first.append(worker_a.apply_feedback(**_kwargs(make_feedback(i))))
+    assert second.has_new_records()
+    assert second.sync_into(worker_b) == 3
+
+    worker_b.journal_seq = second.append(worker_b.apply_feedback(**_kwargs(make_feedback(3))))
+    assert worker_b.journal_seq == 4
+    assert first.sync_into(worker_a) == 1
+
+    # Records appended just before another handle compacts are not lost
+    for i in range(4, 6):
+        worker_a.journal_seq = first.append(worker_a.apply_feedback(**_kwargs(make_feedback(i))))
+    first.compact(worker_a.journal_seq)
+    assert second.sync_into(worker_b) == 2
+    assert second.append(make_feedback(6)) == 7
+
+    assert worker_a.journal_seq == worker_b.journal_seq == 6
+    assert {k: dict(v) for k, v in worker_a.rl_layer.q_table.items()} == \
+        {k: dict(v) for k, v in worker_b.rl_layer.q_table.items()}
+    first.close()
+    second.close()
@@ -0,0 +1,125 @@
+"""
+Tests for incremental base model updates from labelled feedback
+"""
+import copy
+import time
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+from conftest import REPO_ROOT
+from rl_model import AmICookedRLModel
+
+
+def labelled_feedback(model, n, offset=0, shift=3):
+    # Grades shifted from the training labels, so extra stages have something to learn
+    df = pd.read_csv(REPO_ROOT / "api" / "student-por.csv")
+    for _, row in df.iloc[offset:offset + n].iterrows():
+        model.apply_feedback(features=row[model.feature_names].to_dict(), predicted_score=5,
+                             feedback="true", actual_grade=float(min(max(row["G3"] + shift, 0), 20)))
+
+
+def test_extend_base_model_adds_stages_for_new_labels_only(trained_model):
+    model = copy.deepcopy(trained_model)
+    assert model.extend_base_model() is None
+
+    model.apply_feedback(features={"studytime": 2}, predicted_score=5, feedback="higher")
+    labelled_feedback(model, 40)
+    assert model.pending_labelled == 40
+
+    n_before = model.base_model.estimators_.shape[0]
+    result = model.extend_base_model(n_estimators=5)
+    extended = result.pop("model")
+    assert (result["samples"], result["held_out"]) == (32, 8)
+    assert result["estimators_after"] == n_before + 5
+    assert result["improved"] and result["mae_after"] < result["mae_before"]
+
+    # The live model is untouched until the extended base model is swapped in
+    assert model.base_model.estimators_.shape[0] == n_before
+    swapped = model.with_base_model(extended)
+    assert swapped.base_model.estimators_.shape[0] == n_before + 5
+    assert swapped.pending_labelled == 0
+    assert swapped.model_version == model.model_version + 1
+    assert swapped.predict_score({"studytime": 3, "G1": 12, "G2": 13}) in range(1, 11)
+
+    # Only labels received after the update are fitted next time
+    labelled_feedback(swapped, 10, offset=40)
+    assert swapped.extend_base_model(n_estimators=2)["samples"] == 8
+
+
+def test_small_batches_are_not_consumed(trained_model):
+    model = copy.deepcopy(trained_model)
+    labelled_feedback(model, 1)
+    assert model.extend_base_model(n_estimators=5) is None
+    assert model.pending_labelled == 1
+
+    # A single record is fitted without subsampling once no minimum is required
+    labelled_feedback(model, 4, offset=1)
+    assert model.extend_base_model(n_estimators=5, min_labels=1)["samples"] == 4
+
+
+def test_update_that_does_not_help_is_refused(trained_model):
+    model = copy.deepcopy(trained_model)
+    # The held-out records (every fifth) move the opposite way to the fitted ones
+    for i in range(20):
+        labelled_feedback(model, 1, offset=i, shift=-4 if i % 5 == 4 else 4)
+    result = model.extend_base_model(n_estimators=5)
+    assert result["model"] is None and not result["improved"]
+    assert result["mae_after"] >= result["mae_before"]
+    assert model.pending_labelled == 20
+
+
+def test_labelled_counters_survive_save_and_load(trained_model, tmp_path):
+    model = copy.deepcopy(trained_model)
+    labelled_feedback(model, 10)
+    model = model.with_base_model(model.extend_base_model(n_estimators=2)["model"])
+    labelled_feedback(model, 5, offset=10)
+
+    for path in (tmp_path / "model", tmp_path / "model.pkl"):
+        model.save_model(path)
+        loaded = AmICookedRLModel.load_model(path)
+        assert (loaded.labelled_feedback, loaded.labelled_used, loaded.pending_labelled) == (15, 10, 5)
+        assert loaded.feedback_history[-1].actual_grade is not None
+        assert loaded.extend_base_model(n_estimators=1, min_labels=5)["samples"] == 4
+
+
+def test_admin_endpoint_extends_live_model(server, admin_headers):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        features = {"studytime": 2, "G1": 11, "G2": 12, "failures": 0}
+        response = client.post("/feedback", json={
+            "features": features, "predicted_score": 5, "feedback": "lower", "actual_grade": 25,
+        })
+        assert response.status_code == 422
+
+        original = server.model
+        n_before = original.base_model.estimators_.shape[0]
+
+        try:
+            # One label is below the minimum: nothing is fitted or consumed
+            client.post("/feedback", json={
+                "features": features, "predicted_score": 5, "feedback": "true", "actual_grade": 19,
+            })
+            response = client.post("/admin/incremental-update", json={"n_estimators": 3}, headers=admin_headers)
+            assert response.status_code == 200
+            assert response.json() == {"samples": 0, "swapped": False, "pending_labelled": 1, "min_labels": 10}
+            assert server.model.pending_labelled == 1
+
+            for grade in (18, 19, 20) * 3:
+                client.post("/feedback", json={
+                    "features": features, "predicted_score": 5, "feedback": "true", "actual_grade": grade,
+                })
+            response = client.post("/admin/incremental-update", json={"n_estimators": 3}, headers=admin_headers)
+            assert response.status_code == 200
+            assert response.json()["swapped"] is True
+            assert server.model.base_model.estimators_.shape[0] == n_before + 3
+            assert server.model.pending_labelled == 0
+
+            assert client.post("/admin/incremental-update", json={}, headers=admin_headers).json()["samples"] == 0
+        finally:
+            # Other tests expect the shared server to keep the session's base model
+            server.swap_in_trained_model(original)
@@ -0,0 +1,96 @@
+"""
+Tests for the Prometheus metrics registry and the /metrics endpoint
+"""
+import time
+
+from fastapi.testclient import TestClient
+
+from metrics import Metrics
+from rolling_stats import Histogram
+
+
+def samples(text):
+    """Metric lines (without comments) as {name{labels}: value}"""
+    result = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            result[name] = float(value)
+    return result
+
+
+def test_render_counters_histograms_and_gauges():
+    metrics = Metrics(namespace="test")
+    metrics.describe("requests", "Requests handled")
+    metrics.inc("requests", (("kind", "a"),))
+    metrics.inc("requests", (("kind", "a"),))
+    metrics.inc("requests", (("kind", 'b"quoted"'),), value=3)
+    metrics.observe_stage("encode", 0.00002)
+    with metrics.time_stage("encode"):
+        pass
+    metrics.register_gauge("size", "Items", lambda: 7)
+    metrics.register_gauge("lookups", "Lookups", lambda: {(("result", "hit"),): 4}, kind="counter")
+    metrics.register_gauge("broken", "Unreadable", lambda: 1 / 0)
+
+    text = metrics.render()
+    assert "# HELP test_requests_total Requests handled" in text
+    assert "# TYPE test_stage_duration_seconds histogram" in text
+    assert "# TYPE test_lookups_total counter" in text
+    assert "test_broken" not in text
+
+    values = samples(text)
+    assert values['test_requests_total{kind="a"}'] == 2
+    assert values['test_requests_total{kind="b\\"quoted\\""}'] == 3
+    assert values['test_stage_duration_seconds_bucket{stage="encode",le="2.5e-05"}'] >= 1
+    assert values['test_stage_duration_seconds_bucket{stage="encode",le="+Inf"}'] == 2
+    assert values['test_stage_duration_seconds_count{stage="encode"}'] == 2
+    assert values["test_size"] == 7
+    assert values['test_lookups_total{result="hit"}'] == 4
+
+
+def test_registered_histograms_and_disabled_recording():
+    metrics = Metrics(namespace="test", enabled=False)
+    external = Histogram([1, 2, 4])
+    external.observe(3)
+    metrics.register_histogram("batch_size", "Batch sizes", external)
+    metrics.inc("requests")
+    metrics.observe_stage("encode", 0.1)
+
+    values = samples(metrics.render())
+    assert values['test_batch_size_bucket{le="4"}'] == 1
+    assert "test_requests_total" not in values
+    assert not any(name.startswith("test_stage_duration") for name in values)
+
+
+def test_recording_is_cheap():
+    metrics = Metrics(namespace="test")
+    n = 20000
+    started = time.perf_counter()
+    for _ in range(n):
+        metrics.observe_stage("encode", 0.0001)
+    assert (time.perf_counter() - started) / n < 50e-6
+
+
+def test_metrics_endpoint_reports_request_stages(server):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        assert client.post("/predict", json={"studytime": 1, "failures": 3, "G1": 40}).status_code == 200
+        assert client.post("/feedback", json={
+            "features": {"studytime": 1}, "predicted_score": 5, "feedback": "lower",
+        }).status_code == 200
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        values = samples(response.text)
+
+    for stage in ("validation", "prepare_features", "base_predict", "rl_adjustment",
+                  "apply_feedback", "journal_append"):
+        assert values[f'amicooked_stage_duration_seconds_count{{stage="{stage}"}}'] >= 1, stage
+    assert values['amicooked_feedback_total{feedback="lower"}'] >= 1
+    assert values["amicooked_q_table_size"] >= 1
+    assert values['amicooked_http_request_duration_seconds_count{method="POST",route="/predict",status="200"}'] >= 1
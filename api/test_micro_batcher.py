@@ -0,0 +1,69 @@
+"""
+Tests for the async micro-batching scheduler
+"""
+import asyncio
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def test_concurrent_requests_share_a_batch():
+    calls = []
+
+    def score_batch(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    async def main():
+        batcher = MicroBatcher(score_batch, max_batch_size=8, max_wait_us=20000)
+        # Warm up: the first request under light load is dispatched on its own
+        assert await batcher.submit(0) == 0
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(1, 13)))
+        return batcher, results
+
+    batcher, results = asyncio.run(main())
+    assert results == [i * 10 for i in range(1, 13)]
+    assert calls[0] == [0]
+    assert max(len(call) for call in calls[1:]) == 8
+    assert sum(len(call) for call in calls) == 13
+    assert batcher.batch_sizes.count == len(calls)
+    assert batcher.queue_depth.count == 13
+
+
+def test_light_traffic_is_not_delayed():
+    async def main():
+        batcher = MicroBatcher(lambda items: items, max_batch_size=8, max_wait_us=5_000_000)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for i in range(3):
+            assert await batcher.submit(i) == i
+        return loop.time() - start
+
+    assert asyncio.run(main()) < 1.0
+
+
+def test_errors_reach_every_request_in_the_batch():
+    def score_batch(items):
+        raise RuntimeError("model exploded")
+
+    async def main():
+        batcher = MicroBatcher(score_batch, max_batch_size=4, max_wait_us=1000)
+        return await asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_batched_scores_match_predict_score(trained_model, student_rows):
+    async def main():
+        batcher = MicroBatcher(trained_model.predict_scores, max_batch_size=16, max_wait_us=5000)
+        return await asyncio.gather(*(batcher.submit(row) for row in student_rows[:40]))
+
+    expected = [trained_model.predict_score(row) for row in student_rows[:40]]
+    assert asyncio.run(main()) == expected
+
+
+def test_rejects_empty_batches():
+    with pytest.raises(ValueError):
+        MicroBatcher(lambda items: items, max_batch_size=0)
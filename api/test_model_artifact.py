@@ -0,0 +1,115 @@
+"""
+Tests for the versioned, memory-mappable model artifact format
+"""
+import copy
+import os
+
+import numpy as np
+
+from model_artifact import FeedbackHistory, current_version
+from rl_model import AmICookedRLModel, RLFeedback
+
+
+def with_feedback(trained_model, n):
+    model = copy.deepcopy(trained_model)
+    for i in range(n):
+        model.apply_feedback(
+            features={"studytime": 1 + i % 4, "failures": i % 2},
+            predicted_score=4 + i % 3,
+            feedback=["true", "higher", "lower"][i % 3],
+        )
+    return model
+
+
+def q_values(model):
+    return {key: dict(values) for key, values in model.rl_layer.q_table.items()}
+
+
+def test_round_trip_matches_original(trained_model, student_rows, tmp_path):
+    model = with_feedback(trained_model, 12)
+    model.save_artifact(tmp_path / "model")
+    loaded = AmICookedRLModel.load_artifact(tmp_path / "model")
+
+    assert q_values(loaded) == q_values(model)
+    assert loaded.get_stats() == model.get_stats()
+    assert loaded.label_encoders.keys() == model.label_encoders.keys()
+    assert loaded.predict_scores(student_rows) == model.predict_scores(student_rows)
+    assert [loaded.predict_score(row) for row in student_rows[:20]] == \
+        [model.predict_score(row) for row in student_rows[:20]]
+
+    assert len(loaded.feedback_history) == 12
+    assert loaded.feedback_history[-1] == model.feedback_history[-1]
+    assert list(loaded.feedback_history) == list(model.feedback_history)
+
+
+def test_large_state_is_loaded_lazily(trained_model, student_rows, tmp_path):
+    with_feedback(trained_model, 30).save_artifact(tmp_path / "model")
+    loaded = AmICookedRLModel.load_artifact(tmp_path / "model")
+
+    assert not AmICookedRLModel.base_model.is_loaded(loaded)
+    assert not AmICookedRLModel.training_data.is_loaded(loaded)
+    assert isinstance(loaded.feedback_history, FeedbackHistory)
+    assert loaded.feedback_history._new == []
+    assert not loaded.inference_engine.value.flags.writeable
+
+    # Small batches never need the sklearn estimator
+    loaded.predict_scores(student_rows[:10])
+    assert not AmICookedRLModel.base_model.is_loaded(loaded)
+
+    loaded.predict_scores(student_rows)
+    assert AmICookedRLModel.base_model.is_loaded(loaded)
+    assert len(loaded.training_data) == len(student_rows)
+
+
+def test_snapshots_link_unchanged_files_and_prune(trained_model, tmp_path):
+    root = tmp_path / "model"
+    model = with_feedback(trained_model, 3)
+    first = model.save_artifact(root)
+
+    model.apply_feedback(features={"studytime": 2}, predicted_score=5, feedback="true")
+    second = model.save_artifact(root)
+    assert os.stat(first / "base_model.pkl").st_ino == os.stat(second / "base_model.pkl").st_ino
+    assert model.feedback_history._new == []
+    assert len(model.feedback_history) == 4
+
+    third = model.save_artifact(root)
+    assert current_version(root) == third
+    assert not first.exists()
+    assert second.exists()
+
+    # Loading keeps working from an open version after it is pruned
+    loaded = AmICookedRLModel.load_artifact(root)
+    model.save_artifact(root)
+    model.save_artifact(root)
+    assert len(loaded.training_data) > 0
+    assert len(list(loaded.feedback_history)) == 4
+
+
+def test_feedback_after_load_is_saved(trained_model, tmp_path):
+    root = tmp_path / "model"
+    with_feedback(trained_model, 5).save_artifact(root)
+
+    loaded = AmICookedRLModel.load_artifact(root)
+    loaded.apply_feedback(features={"failures": 1}, predicted_score=8, feedback="lower")
+    loaded.save_artifact(root)
+
+    reloaded = AmICookedRLModel.load_artifact(root)
+    assert len(reloaded.feedback_history) == 6
+    assert reloaded.feedback_history[-1].feedback == "lower"
+    assert q_values(reloaded) == q_values(loaded)
+    np.testing.assert_array_equal(reloaded.recent_feedback.values, loaded.recent_feedback.values)
+
+
+def test_legacy_pickle_is_loaded_until_first_save(trained_model, tmp_path):
+    model = with_feedback(trained_model, 4)
+    model.save_model(tmp_path / "model.pkl")
+
+    loaded = AmICookedRLModel.load_model(tmp_path / "model")
+    assert loaded.is_trained
+    assert q_values(loaded) == q_values(model)
+
+    loaded.save_model(tmp_path / "model")
+    migrated = AmICookedRLModel.load_model(tmp_path / "model")
+    assert isinstance(migrated.feedback_history, FeedbackHistory)
+    assert list(migrated.feedback_history) == list(model.feedback_history)
+    assert isinstance(migrated.feedback_history[0], RLFeedback)
@@ -0,0 +1,65 @@
+"""
+Tests for the predict_score result cache
+"""
+import copy
+
+from prediction_cache import PredictionCache
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(maxsize=2, ttl=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (2, 1, 1, 2)
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("prediction_cache.time.monotonic", lambda: now[0])
+    cache = PredictionCache(maxsize=10, ttl=5.0)
+    cache.put("a", 1)
+    now[0] += 4.0
+    assert cache.get("a") == 1
+    now[0] += 2.0
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(maxsize=0)
+    cache.put("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_model_cache_follows_q_table_updates(trained_model):
+    model = copy.deepcopy(trained_model)
+    features = {"studytime": 2, "failures": 0, "G1": 11, "G2": 12}
+
+    first = model.predict_score(features)
+    assert model.predict_score(dict(features)) == first
+    assert model.prediction_cache.stats()["hits"] == 1
+
+    base_score = model.predict_score(features, use_rl_adjustment=False)
+    for _ in range(3):
+        model.rl_layer.apply_feedback(base_score, "lower", features)
+    assert model.predict_score(features) == max(1, base_score - 1)
+    assert model.prediction_cache.stats()["invalidations"] == 1
+
+    # Same numeric encoding but a different RL state key must not share an entry
+    float_features = {**features, "studytime": 2.0}
+    assert model.predict_score(float_features) == base_score
+
+
+def test_retrain_clears_cache(trained_model):
+    model = copy.deepcopy(trained_model)
+    model.predict_score({"studytime": 3})
+    assert model.prediction_cache.stats()["size"] == 1
+    model.load_and_train_initial_model()
+    assert model.prediction_cache.stats()["size"] == 0
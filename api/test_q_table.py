@@ -0,0 +1,74 @@
+"""
+Tests for the dense Q-table behind RLAdjustmentLayer
+"""
+import pickle
+from collections import defaultdict
+
+import numpy as np
+
+from rl_model import RLAdjustmentLayer
+
+
+def test_reads_do_not_create_states():
+    layer = RLAdjustmentLayer()
+    for score in range(1, 11):
+        layer.get_adjustment(score, {"studytime": 2, "failures": 0})
+    layer.get_adjustments(np.arange(1, 11), [{"studytime": 3}] * 10)
+    assert len(layer.q_table) == 0
+
+
+def test_unseen_state_gets_no_adjustment_and_learned_state_is_greedy():
+    layer = RLAdjustmentLayer()
+    features = {"studytime": 2, "failures": 1}
+    assert layer.get_adjustment(6, features) == 0
+
+    layer.apply_feedback(6, "lower", features)
+    assert layer.get_adjustment(6, features) == -1
+    assert list(layer.get_adjustments(np.array([6, 6, 7]), [features, features, features])) == [-1, -1, 0]
+    assert dict(layer.q_table.items()) == {"score_6_st2_f1": {-2: 0.0, -1: 0.05, 0: 0.0, 1: 0.0, 2: 0.0}}
+
+
+def test_state_keys_match_legacy_format():
+    layer = RLAdjustmentLayer()
+    assert layer.get_state_key(5) == "score_5"
+    assert layer.get_state_key(5, {"studytime": 2}) == "score_5_st2"
+    assert layer.get_state_key(5, {"failures": 0, "G1": 3}) == "score_5_f0"
+    assert layer.get_state_key(5, {"studytime": 7, "failures": 1}) == "score_5_st7_f1"
+    assert layer.get_state_key(5, {"studytime": 2.0}) == "score_5_st2.0"
+
+
+def test_off_grid_states_still_learn():
+    layer = RLAdjustmentLayer()
+    raw_features = {"studytime": 8, "failures": 0}  # raw hours, never normalized
+    layer.apply_feedback(4, "higher", raw_features)
+    assert layer.get_adjustment(4, raw_features) == 1
+    assert layer.get_adjustments(np.array([4]), [raw_features])[0] == 1
+    assert "score_4_st8_f0" in dict(layer.q_table.items())
+
+
+def test_legacy_pickle_is_migrated():
+    legacy = RLAdjustmentLayer.__new__(RLAdjustmentLayer)
+    q_table = defaultdict(lambda: defaultdict(float))
+    q_table["score_3_st2_f0"][1] = 0.25
+    q_table["score_9"][-1] = 0.5
+    q_table["score_5_st9"][0] = 0.1
+    q_table["score_7"]  # Created by a read, never updated
+    legacy.__dict__.update({
+        "learning_rate": 0.1,
+        "discount_factor": 0.9,
+        "epsilon": 0.05,
+        "q_table": {state: dict(actions) for state, actions in q_table.items()},
+        "actions": [-2, -1, 0, 1, 2],
+        "episode_rewards": [0.5, 0.5, 1.0],
+        "feature_adjustments": {},
+    })
+
+    layer = pickle.loads(pickle.dumps(legacy))
+
+    assert len(layer.q_table) == 3
+    assert layer.get_adjustment(3, {"studytime": 2, "failures": 0}) == 1
+    assert layer.get_adjustment(9) == -1
+    assert layer.get_adjustment(5, {"studytime": 9}) == 0
+    assert dict(layer.q_table.items())["score_5_st9"][0] == 0.1
+    assert layer.reward_stats.count == 3
+    assert layer.recent_rewards.size == 3
@@ -0,0 +1,120 @@
+"""
+Tests for the sampling request profiler
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from request_profiler import RequestProfiler
+
+
+def busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def slow_inner():
+    busy(0.05)
+
+
+def test_slow_requests_are_written_as_collapsed_stacks(tmp_path):
+    profiler = RequestProfiler(directory=tmp_path, slow_ms=30, interval_ms=1)
+
+    @profiler.profile
+    def handler(seconds):
+        if seconds:
+            slow_inner()
+        return "done"
+
+    assert handler(0) == "done"
+    assert profiler.files() == []
+
+    assert handler(1) == "done"
+    [path] = profiler.files()
+    assert path.name.split("-")[1] == "handler"
+
+    lines = path.read_text().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    frames = stack.split(";")
+    assert frames[:3] == ["handler", "test_request_profiler.py:handler", "test_request_profiler.py:slow_inner"]
+    assert not any("wrapper" in frame for frame in frames)
+
+
+def test_sampled_fraction_and_rotation(tmp_path):
+    profiler = RequestProfiler(directory=tmp_path, sample_rate=1.0, interval_ms=1, max_files=3)
+
+    @profiler.profile
+    def handler():
+        busy(0.04)
+
+    for _ in range(5):
+        handler()
+    assert len(profiler.files()) == 3
+    assert profiler.written == 5
+
+    profiler.configure(sample_rate=0.0)
+    assert not profiler.enabled
+    handler()
+    assert profiler.written == 5
+
+
+def test_async_handlers_only_record_while_running(tmp_path):
+    profiler = RequestProfiler(directory=tmp_path, sample_rate=1.0, interval_ms=1)
+
+    @profiler.profile
+    async def handler():
+        busy(0.02)
+        await asyncio.sleep(0.02)
+        return 1
+
+    assert asyncio.run(handler()) == 1
+    [path] = profiler.files()
+    assert all("busy" in line or "handler " in line for line in path.read_text().splitlines())
+
+
+def test_rejects_invalid_settings(tmp_path):
+    profiler = RequestProfiler(directory=tmp_path)
+    with pytest.raises(ValueError):
+        profiler.configure(sample_rate=2)
+    with pytest.raises(ValueError):
+        profiler.configure(interval_ms=0)
+
+
+def test_admin_endpoint_toggles_profiling(server, admin_headers, tmp_path):
+    server.profiler.directory = tmp_path
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        try:
+            settings = client.put("/admin/profiling", json={"slow_ms": 0, "interval_ms": 0.5},
+                                  headers=admin_headers).json()
+            assert settings["enabled"] and settings["slow_ms"] == 0
+
+            for _ in range(20):
+                assert client.get("/average-stats").status_code == 200
+            assert client.get("/admin/profiling", headers=admin_headers).json()["file_count"] > 0
+        finally:
+            settings = client.put("/admin/profiling", json={"slow_ms": None}, headers=admin_headers).json()
+        assert not settings["enabled"]
+
+
+def test_admin_endpoints_are_closed_without_a_token(server, admin_headers, monkeypatch):
+    with TestClient(server.app) as client:
+        assert client.get("/admin/profiling").status_code == 403
+        assert client.get("/admin/profiling", headers={"X-Admin-Token": "wrong"}).status_code == 403
+        assert client.get("/admin/profiling", headers=admin_headers).status_code == 200
+
+        monkeypatch.setattr(server, "ADMIN_TOKEN", None)
+        for headers in ({}, {"X-Admin-Token": ""}, admin_headers):
+            response = client.get("/admin/profiling", headers=headers)
+            assert response.status_code == 403
+            assert "AMICOOKED_ADMIN_TOKEN" in response.json()["detail"]
+        assert client.post("/admin/incremental-update", json={}).status_code == 403
+        assert client.post("/admin/replay-feedback", json={}).status_code == 403
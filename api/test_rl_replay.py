@@ -0,0 +1,117 @@
+"""
+Tests for bulk offline replay of the feedback history
+"""
+import copy
+import random
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from rl_model import RLFeedback
+from rl_replay import main as replay_main
+from rl_replay import unique_features
+
+
+def with_feedback(trained_model, student_rows, n, seed=0):
+    rng = random.Random(seed)
+    model = copy.deepcopy(trained_model)
+    for i in range(n):
+        if i % 3:
+            features = dict(student_rows[rng.randrange(len(student_rows))])
+        else:
+            # Raw, unnormalized values land in the off-grid part of the Q-table
+            features = {"studytime": rng.randint(0, 7), "failures": rng.randint(0, 3)}
+        model.apply_feedback(features=features, predicted_score=5,
+                             feedback=rng.choice(["true", "higher", "lower"]))
+    return model
+
+
+def q_values(model):
+    return {key: dict(values) for key, values in model.rl_layer.q_table.items()}
+
+
+def test_replay_matches_online_learning(trained_model, student_rows):
+    live = with_feedback(trained_model, student_rows, 600)
+    replayed = copy.deepcopy(live)
+    summary = replayed.replay_feedback()
+
+    assert summary["events"] == 600 and summary["skipped"] == 0
+    assert q_values(replayed) == q_values(live)
+    np.testing.assert_array_equal(replayed.rl_layer.q_table.state_versions, live.rl_layer.q_table.state_versions)
+    assert replayed.rl_layer.version == live.rl_layer.version
+    assert replayed.rl_layer.reward_stats.mean == pytest.approx(live.rl_layer.reward_stats.mean)
+    np.testing.assert_array_equal(replayed.rl_layer.recent_rewards.values, live.rl_layer.recent_rewards.values)
+    assert replayed.get_stats()["accuracy"] == live.get_stats()["accuracy"]
+    assert replayed.predict_scores(student_rows) == live.predict_scores(student_rows)
+
+
+def test_replay_with_new_parameters(trained_model, student_rows):
+    model = with_feedback(trained_model, student_rows, 200)
+    before = q_values(model)
+
+    summary = model.replay_feedback(learning_rate=0.5, discount_factor=0.0)
+    assert model.rl_layer.learning_rate == 0.5
+    assert model.rl_layer.discount_factor == 0.0
+    assert summary["q_table_size"] == len(before)
+    assert q_values(model) != before
+
+    # Matches learning online with the same parameters
+    fresh = copy.deepcopy(trained_model)
+    fresh.rl_layer.learning_rate, fresh.rl_layer.discount_factor = 0.5, 0.0
+    for record in model.feedback_history:
+        fresh.apply_feedback(record.features, record.predicted_score, record.feedback, timestamp=record.timestamp)
+    assert q_values(fresh) == q_values(model)
+
+
+def test_unique_features_groups_equal_dicts():
+    unique, inverse = unique_features([{"a": 1}, {"a": 1}, {"b": [1]}, {"b": [1]}, {}])
+    assert unique[:1] == [{"a": 1}]
+    assert inverse.tolist() == [0, 0, 1, 2, 3]
+
+    # Equal values of different types are different states
+    _, inverse = unique_features([{"a": 2}, {"a": 2.0}, {"a": True}, {"a": 1}, {"a": 2}])
+    assert inverse.tolist() == [0, 1, 2, 3, 0]
+
+
+def test_replay_keeps_int_and_float_states_apart(trained_model):
+    live = copy.deepcopy(trained_model)
+    for features, feedback in [({"studytime": 2}, "higher"), ({"studytime": 2.0}, "lower"),
+                               ({"failures": 1}, "true"), ({"failures": True}, "higher"),
+                               ({"studytime": 2.0}, "lower"), ({"studytime": 2}, "true")]:
+        live.apply_feedback(features=features, predicted_score=5, feedback=feedback)
+    replayed = copy.deepcopy(live)
+    replayed.replay_feedback()
+    assert q_values(replayed) == q_values(live)
+
+
+def test_cli_rebuilds_the_saved_model(trained_model, student_rows, tmp_path, capsys):
+    model = with_feedback(trained_model, student_rows, 50)
+    model.save_model(tmp_path / "model")
+    journal = tmp_path / "journal.jsonl"
+
+    assert replay_main(["--model", str(tmp_path / "model"), "--journal", str(journal),
+                        "--learning-rate", "0.2"]) == 0
+    assert '"events": 50' in capsys.readouterr().out
+
+    from rl_model import AmICookedRLModel
+    loaded = AmICookedRLModel.load_model(tmp_path / "model")
+    assert loaded.rl_layer.learning_rate == 0.2
+    assert len(loaded.feedback_history) == 50
+    assert isinstance(loaded.feedback_history[0], RLFeedback)
+
+
+def test_admin_endpoint_replays_live_feedback(server, admin_headers):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        client.post("/feedback", json={"features": {"studytime": 2}, "predicted_score": 5, "feedback": "higher"})
+        before = q_values(server.model)
+        response = client.post("/admin/replay-feedback", json={}, headers=admin_headers)
+        assert response.status_code == 200
+        assert response.json()["events"] == len(server.model.feedback_history)
+        assert q_values(server.model) == before
@@ -0,0 +1,55 @@
+"""
+Tests for the constant-memory RL statistics
+"""
+import copy
+
+import numpy as np
+
+from rolling_stats import Histogram, RollingWindow, RunningStats
+
+
+def test_running_stats_match_numpy():
+    values = np.random.default_rng(0).normal(0.5, 0.3, size=500)
+    stats = RunningStats.from_values(values)
+    assert stats.count == 500
+    assert np.isclose(stats.total, values.sum())
+    assert np.isclose(stats.mean, values.mean())
+    assert np.isclose(stats.variance, values.var())
+
+
+def test_rolling_window_keeps_last_n():
+    window = RollingWindow(capacity=4)
+    for value in [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]:
+        window.append(value, timestamp=0.0)
+    assert window.size == 4
+    assert window.mean() == np.mean([3.0, 4.0, 5.0, 6.0])
+
+
+def test_rolling_window_time_range():
+    window = RollingWindow(capacity=10)
+    for t, value in [(0.0, 1.0), (100.0, 0.0), (200.0, 1.0), (250.0, 1.0)]:
+        window.append(value, timestamp=t)
+    assert window.since(120, now=260.0) == {"count": 2, "mean": 1.0}
+    assert window.since(1000, now=260.0)["count"] == 4
+    assert RollingWindow(3).since(60) == {"count": 0, "mean": 0.0}
+
+
+def test_model_stats_are_windowed(trained_model):
+    model = copy.deepcopy(trained_model)
+    for feedback in ["true", "true", "higher", "lower"]:
+        model.apply_feedback({"studytime": 2, "G1": 12}, 5, feedback)
+
+    stats = model.get_stats()
+    assert stats["rl_episodes"] == 4
+    assert np.isclose(stats["avg_rl_reward"], np.mean([1.0, 1.0, 0.5, 0.5]))
+    assert stats["recent"]["last_n"]["accuracy"] == 0.5
+    assert stats["recent"]["last_minutes"]["count"] == 4
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram([1, 2, 4, 8])
+    for value in [1, 1, 2, 3, 5, 9, 100]:
+        histogram.observe(value)
+    assert histogram.count == 7
+    assert histogram.total == 121
+    assert histogram.cumulative() == {"1": 2, "2": 3, "4": 4, "8": 5, "+Inf": 7}
@@ -0,0 +1,49 @@
+"""
+Tests for background startup, health probes and warm-up
+"""
+import os
+import time
+
+from fastapi.testclient import TestClient
+
+
+def wait_until_ready(client, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.05)
+    raise AssertionError(f"Server not ready after {timeout}s: {response.json()}")
+
+
+def test_startup_reports_ready_after_warm_up(server):
+    with TestClient(server.app) as client:
+        assert client.get("/health/live").json() == {"status": "alive"}
+
+        ready = wait_until_ready(client).json()
+        assert ready["phase"] == "ready"
+        assert {"load_seconds", "warmup_seconds", "total_seconds"} <= set(ready["timings"])
+
+        response = client.post("/predict", json={"studytime": 3, "failures": 0, "G1": 70, "G2": 75})
+        assert response.status_code == 200
+        assert 1 <= response.json()["score"] <= 10
+
+
+def test_model_endpoints_wait_for_startup(server):
+    with TestClient(server.app) as client:
+        wait_until_ready(client)
+        server.startup_complete.clear()
+        try:
+            assert client.post("/predict", json={"studytime": 3}).status_code == 503
+            assert client.get("/health/ready").status_code == 503
+            assert client.get("/health/live").status_code == 200
+        finally:
+            server.startup_complete.set()
+
+
+def test_server_fixture_does_not_leak_environment(server):
+    # The server keeps its temporary paths; other tests see the environment as it was
+    assert os.environ.get("AMICOOKED_MODEL_PATH") != server.MODEL_PATH
+    assert os.environ.get("AMICOOKED_JOURNAL_PATH") != server.JOURNAL_PATH
+    assert str(server.journal.path) == server.JOURNAL_PATH
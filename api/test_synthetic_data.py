@@ -0,0 +1,79 @@
+"""
+Tests for the synthetic dataset and feedback generator
+"""
+import copy
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import REPO_ROOT
+from rl_model import RLFeedback
+from synthetic_data import StudentDataGenerator, main
+
+
+@pytest.fixture(scope="module")
+def source():
+    return pd.read_csv(REPO_ROOT / "api" / "student-por.csv")
+
+
+@pytest.fixture(scope="module")
+def generator(source):
+    return StudentDataGenerator.fit(source)
+
+
+def test_samples_match_schema_and_values(source, generator):
+    sample = pd.concat(generator.generate(5000, seed=3, chunk_size=1500))
+    assert len(sample) == 5000
+    assert list(sample.columns) == list(source.columns)
+    assert (sample.dtypes == source.dtypes).all()
+    for name in source.columns:
+        assert set(sample[name].unique()) <= set(source[name].unique())
+        assert abs(sample[name].value_counts(normalize=True) - source[name].value_counts(normalize=True)).max() < 0.05
+
+
+def test_seed_is_deterministic_whatever_the_chunk_size(generator):
+    first = pd.concat(generator.generate(1000, seed=11, chunk_size=1000), ignore_index=True)
+    again = pd.concat(generator.generate(1000, seed=11, chunk_size=1000), ignore_index=True)
+    pd.testing.assert_frame_equal(first, again)
+    other = pd.concat(generator.generate(1000, seed=12), ignore_index=True)
+    assert not first.equals(other)
+
+
+def test_keeps_grade_correlations(source, generator):
+    sample = pd.concat(generator.generate(20000, seed=5))
+    for a, b in (("G1", "G3"), ("G2", "G3"), ("Dalc", "Walc"), ("failures", "G3")):
+        real = source[a].corr(source[b], method="spearman")
+        synthetic = sample[a].corr(sample[b], method="spearman")
+        assert abs(real - synthetic) < 0.1, (a, b, real, synthetic)
+
+
+def test_writes_csv_readable_like_the_source(source, tmp_path):
+    path = tmp_path / "students.csv"
+    assert main(["--seed", "2", "students", "--rows", "2500", "--output", str(path)]) == 0
+    written = pd.read_csv(path)
+    assert len(written) == 2500
+    assert (written.dtypes == source.dtypes).all()
+
+
+def test_feedback_stream_applies_to_model(generator, trained_model, tmp_path):
+    path = tmp_path / "feedback.jsonl"
+    assert generator.write_feedback(str(path), 300, seed=4, label_fraction=0.5) == 300
+    events = [RLFeedback.from_dict(json.loads(line)) for line in path.read_text().splitlines()]
+
+    assert {event.feedback for event in events} == {"true", "higher", "lower"}
+    assert set(events[0].features) == set(trained_model.feature_names)
+    assert 100 < sum(event.actual_grade is not None for event in events) < 200
+    assert [event.timestamp for event in events] == sorted(event.timestamp for event in events)
+    for event in events:
+        if event.feedback == "higher":
+            assert event.predicted_score < 11 - int(event.features["G2"] / 2.2) + 3
+
+    model = copy.deepcopy(trained_model)
+    for event in events:
+        model.apply_feedback(features=event.features, predicted_score=event.predicted_score,
+                             feedback=event.feedback, timestamp=event.timestamp,
+                             actual_grade=event.actual_grade)
+    assert model.pending_labelled == sum(event.actual_grade is not None for event in events)
+    assert np.isfinite(model.predict_score(events[0].features))
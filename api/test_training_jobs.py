@@ -0,0 +1,111 @@
+"""
+Tests for background retraining and the atomic model swap
+"""
+import copy
+import json
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+
+import pytest
+
+from conftest import REPO_ROOT
+from training_jobs import TrainingJobManager, validate_trained_model
+
+
+def test_with_base_model_keeps_rl_state(trained_model):
+    live = copy.deepcopy(trained_model)
+    live.apply_feedback({"studytime": 2, "G1": 10}, 6, "lower")
+    candidate = copy.deepcopy(trained_model)
+
+    swapped = live.with_base_model(candidate)
+
+    assert swapped is not live
+    assert swapped.base_model is candidate.base_model
+    assert swapped.rl_layer is live.rl_layer
+    assert swapped.feedback_history is live.feedback_history
+    assert swapped.total_corrections == 1
+    assert swapped.model_version == live.model_version + 1
+    assert swapped.prediction_cache is not live.prediction_cache
+    assert swapped.predict_score({"studytime": 2, "G1": 10}) == live.predict_score({"studytime": 2, "G1": 10})
+
+
+def test_validation_rejects_poor_models(trained_model):
+    validate_trained_model(trained_model)
+    with pytest.raises(ValueError):
+        validate_trained_model(trained_model, min_test_r2=1.01)
+
+    untrained = type(trained_model)()
+    with pytest.raises(ValueError):
+        validate_trained_model(untrained)
+
+
+def test_job_trains_in_worker_and_hands_over_model():
+    done = threading.Event()
+    received = []
+
+    def on_trained(candidate):
+        received.append(candidate)
+        done.set()
+
+    manager = TrainingJobManager(on_trained=on_trained)
+    try:
+        job = manager.submit()
+        assert manager.submit() is job  # Only one job at a time
+        assert done.wait(timeout=120)
+        job.future.result()
+        assert received[0].is_trained
+        for _ in range(500):
+            if job.finished_at is not None:
+                break
+            time.sleep(0.01)
+        assert job.status == "succeeded"
+        assert job.swapped
+        assert manager.get(job.job_id).to_dict()["results"]["test_score"] > 0.5
+    finally:
+        manager.shutdown()
+
+
+def test_worker_failure_is_reported_on_the_job():
+    manager = TrainingJobManager(on_trained=lambda candidate: None)
+    try:
+        job = manager.submit("xgboost")
+        for _ in range(3000):
+            if job.finished_at is not None:
+                break
+            time.sleep(0.01)
+        assert job.status == "failed"
+        assert job.error.startswith("TrainingWorkerError: Training worker exited with code 1")
+        assert "Unknown base engine 'xgboost'" in job.error
+    finally:
+        manager.shutdown()
+
+
+def test_entry_point_without_main_guard_runs_once(tmp_path):
+    # The worker must not re-import the script that started the server
+    runs = tmp_path / "runs.txt"
+    script = tmp_path / "serve.py"
+    script.write_text(textwrap.dedent(f"""
+        import json, threading, time
+        from training_jobs import TrainingJobManager
+
+        with open({str(runs)!r}, "a") as f:
+            f.write("run\\n")
+        done = threading.Event()
+        manager = TrainingJobManager(on_trained=lambda candidate: done.set())
+        job = manager.submit()
+        done.wait(timeout=120)
+        job.future.result()
+        while job.finished_at is None:
+            time.sleep(0.01)
+        print(json.dumps(job.to_dict()))
+        manager.shutdown()
+    """))
+    completed = subprocess.run([sys.executable, str(script)], cwd=REPO_ROOT, capture_output=True, text=True,
+                               env={"PYTHONPATH": str(REPO_ROOT / "api"), "PATH": ""}, timeout=180)
+    assert completed.returncode == 0, completed.stderr
+    job = json.loads(completed.stdout.strip().splitlines()[-1])
+    assert job["status"] == "succeeded" and job["swapped"]
+    assert runs.read_text() == "run\n"
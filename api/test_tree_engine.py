@@ -0,0 +1,58 @@
+"""
+Parity tests for the flattened tree-ensemble inference engine
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+from tree_engine import FlatTreeEnsemble
+
+
+@pytest.mark.parametrize("params", [
+    {"n_estimators": 50, "max_depth": 3},
+    {"n_estimators": 30, "max_depth": 6, "subsample": 0.7, "learning_rate": 0.3},
+    {"n_estimators": 20, "max_depth": 2, "init": "zero"},
+])
+def test_matches_sklearn_on_random_data(params):
+    rng = np.random.default_rng(7)
+    X = rng.integers(0, 6, size=(400, 8)).astype(float) + rng.normal(0, 0.1, size=(400, 8))
+    y = X[:, 0] * 2 - X[:, 3] + rng.normal(0, 0.5, size=400)
+    gbr = GradientBoostingRegressor(random_state=0, **params).fit(X, y)
+
+    engine = FlatTreeEnsemble.from_gradient_boosting(gbr)
+    X_test = rng.normal(2.5, 2, size=(300, 8))
+
+    np.testing.assert_allclose(engine.predict(X_test), gbr.predict(X_test), rtol=0, atol=1e-10)
+    for row in X_test[:20]:
+        assert engine.predict_one(row) == pytest.approx(gbr.predict(row[None, :])[0], abs=1e-10)
+
+
+def test_matches_base_model_on_dataset(trained_model, student_rows):
+    X = trained_model.feature_encoder.encode_many(student_rows)
+    engine = trained_model.inference_engine
+
+    expected = trained_model.base_model.predict(X)
+    np.testing.assert_allclose(engine.predict(X), expected, rtol=0, atol=1e-10)
+    np.testing.assert_array_equal(
+        trained_model._grades_to_scores(engine.predict(X)),
+        trained_model._grades_to_scores(expected),
+    )
+
+
+def test_leaf_nodes_point_to_themselves(trained_model):
+    engine = trained_model.inference_engine
+    leaves = engine.leaves(np.zeros((3, engine.n_features)))
+    assert leaves.shape == (3, engine.n_trees)
+    np.testing.assert_array_equal(engine.left[leaves], leaves)
+    np.testing.assert_array_equal(engine.right[leaves], leaves)
+
+
+def test_save_and_memory_mapped_load(trained_model, student_rows, tmp_path):
+    engine = trained_model.inference_engine
+    engine.save(tmp_path / "engine")
+    mapped = FlatTreeEnsemble.load(tmp_path / "engine", mmap_mode="r")
+
+    assert not mapped.value.flags.writeable
+    X = trained_model.feature_encoder.encode_many(student_rows[:50])
+    np.testing.assert_array_equal(mapped.predict(X), engine.predict(X))
+    assert mapped.predict_one(X[0]) == engine.predict_one(X[0])
@@ -0,0 +1,100 @@
+"""
+Tests for TreeSHAP feature contributions
+"""
+import itertools
+import math
+import time
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.ensemble import GradientBoostingRegressor
+
+from tree_engine import FlatTreeEnsemble
+from tree_shap import TreeShapExplainer
+
+
+def brute_force_shap(engine, x):
+    """Shapley values of TreeSHAP's value function, by enumerating every coalition"""
+    def expectation(node, coalition):
+        if engine.left[node] == node:
+            return engine.value[node]
+        feature = engine.feature[node]
+        left, right = engine.left[node], engine.right[node]
+        if feature in coalition:
+            return expectation(left if np.float32(x[feature]) <= engine.threshold[node] else right, coalition)
+        return (engine.cover[left] * expectation(left, coalition)
+                + engine.cover[right] * expectation(right, coalition)) / engine.cover[node]
+
+    def value(coalition):
+        return sum(expectation(root, coalition) for root in engine.roots)
+
+    n = engine.n_features
+    phi = np.zeros(n)
+    for i in range(n):
+        others = [j for j in range(n) if j != i]
+        for size in range(n):
+            weight = math.factorial(size) * math.factorial(n - size - 1) / math.factorial(n)
+            for subset in itertools.combinations(others, size):
+                phi[i] += weight * (value(set(subset) | {i}) - value(set(subset)))
+    return phi
+
+
+@pytest.mark.parametrize("params", [
+    {"n_estimators": 8, "max_depth": 3},
+    {"n_estimators": 5, "max_depth": 5, "subsample": 0.7},
+])
+def test_matches_exact_shapley_values(params):
+    rng = np.random.default_rng(3)
+    X = rng.integers(0, 4, size=(300, 5)).astype(float)
+    y = 2 * X[:, 0] - X[:, 1] * X[:, 2] + rng.normal(0, 0.3, size=300)
+    engine = FlatTreeEnsemble.from_gradient_boosting(GradientBoostingRegressor(random_state=0, **params).fit(X, y))
+    explainer = TreeShapExplainer(engine)
+
+    rows = X[:4] + 0.5
+    values = explainer.shap_values(rows)
+    for row, phi in zip(rows, values):
+        np.testing.assert_allclose(phi, brute_force_shap(engine, row), atol=1e-10)
+    np.testing.assert_allclose(values.sum(axis=1) + explainer.expected_value, engine.predict(rows), atol=1e-10)
+
+
+def test_contributions_add_up_to_the_prediction(trained_model, student_rows):
+    explanations = trained_model.explain(student_rows[:300])
+    X = trained_model.feature_encoder.encode_many(student_rows[:300])
+    grades = trained_model.base_model.predict(X)
+
+    assert [e["predicted_grade"] for e in explanations] == pytest.approx(grades.tolist(), abs=1e-9)
+    for explanation in explanations:
+        assert list(explanation["contributions"]) == trained_model.feature_names
+        total = explanation["expected_grade"] + sum(explanation["contributions"].values())
+        assert total == pytest.approx(explanation["predicted_grade"])
+
+
+def test_engines_saved_without_cover_are_re_exported(trained_model, student_rows, tmp_path):
+    engine = trained_model.inference_engine
+    engine.save(tmp_path / "engine")
+    (tmp_path / "engine" / "cover.npy").unlink()
+    old = FlatTreeEnsemble.load(tmp_path / "engine")
+    assert old.cover is None
+
+    expected = trained_model.explain(student_rows[:5])
+    model = trained_model.with_base_model(trained_model)
+    model.inference_engine = old
+    assert model.explain(student_rows[:5]) == expected
+
+
+def test_predict_with_explanation(server):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        profile = {"studytime": 3, "absences": 4, "G1": 80, "G2": 85}
+        assert client.post("/predict", json=profile).json()["explanation"] is None
+        explanation = client.post("/predict?explain=true", json=profile).json()["explanation"]
+        assert explanation["contributions"]["G2"] > 0
+
+        batch = client.post("/predict/batch", json={"students": [profile, {"G1": 5}], "explain": True}).json()
+        assert batch["results"][0]["explanation"] == explanation
+        assert batch["results"][1]["explanation"]["contributions"]["G1"] < 0
@@ -0,0 +1,64 @@
+"""
+Tests for what-if sweeps over controllable features
+"""
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from rl_model import WHAT_IF_RANGES
+
+PROFILE = {"studytime": 2, "absences": 10, "G1": 11, "G2": 12, "goout": 4, "paid": "no"}
+
+
+def test_sweep_matches_single_predictions(trained_model):
+    result = trained_model.what_if(PROFILE, {name: None for name in WHAT_IF_RANGES})
+
+    assert result["baseline"] == trained_model.predict_score(PROFILE)
+    assert list(result["sweeps"]) == list(WHAT_IF_RANGES)
+    for name, points in result["sweeps"].items():
+        assert [value for value, _ in points] == WHAT_IF_RANGES[name]
+        for value, score in points:
+            assert score == trained_model.predict_score({**PROFILE, name: value})
+
+
+def test_sweep_rejects_bad_values(trained_model):
+    with pytest.raises(ValueError, match="controllable"):
+        trained_model.what_if(PROFILE, {"G1": [10, 12]})
+    with pytest.raises(ValueError, match="yes"):
+        trained_model.what_if(PROFILE, {"paid": ["maybe"]})
+    with pytest.raises(ValueError, match="numbers"):
+        trained_model.what_if(PROFILE, {"absences": ["many"]})
+    with pytest.raises(ValueError, match="between 1 and 4"):
+        trained_model.what_if(PROFILE, {"studytime": [5, 100]})
+    with pytest.raises(ValueError, match="between 1 and 5"):
+        trained_model.what_if(PROFILE, {"goout": [0]})
+    with pytest.raises(ValueError, match="between 0 and 93"):
+        trained_model.what_if(PROFILE, {"absences": [-1]})
+    assert [value for value, _ in trained_model.what_if(PROFILE, {"absences": [0, 93]})["sweeps"]["absences"]] == [0, 93]
+
+
+def test_what_if_endpoint(server):
+    with TestClient(server.app) as client:
+        deadline = time.monotonic() + 30
+        while client.get("/health/ready").status_code != 200:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+
+        response = client.post("/predict/what-if", json={
+            "features": PROFILE, "vary": ["goout"], "values": {"absences": [0, 30]},
+        })
+        assert response.status_code == 200
+        body = response.json()
+        assert body["baseline_score"] == client.post("/predict", json=PROFILE).json()["score"]
+        assert [point["value"] for point in body["sweeps"]["goout"]] == [1, 2, 3, 4, 5]
+        assert [point["value"] for point in body["sweeps"]["absences"]] == [0, 30]
+
+        assert set(client.post("/predict/what-if", json={"features": PROFILE}).json()["sweeps"]) == set(WHAT_IF_RANGES)
+        assert client.post("/predict/what-if", json={"features": PROFILE, "vary": ["G1"]}).status_code == 422
+        assert client.post("/predict/what-if", json={
+            "features": PROFILE, "values": {"paid": ["maybe"]},
+        }).status_code == 400
+        response = client.post("/predict/what-if", json={"features": PROFILE, "values": {"studytime": [5, 100]}})
+        assert response.status_code == 400
+        assert "between 1 and 4" in response.json()["detail"]
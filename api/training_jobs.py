@@ -0,0 +1,199 @@
+"""
+Background retraining in a separate worker process
+
+The worker is a fresh interpreter running this file as its entry point, so it
+only imports the training code. (A multiprocessing "spawn" worker re-imports
+the parent's __main__ module first, which reruns any entry point script that
+lacks an `if __name__ == "__main__":` guard.)
+
+    python api/training_jobs.py --output result.pkl [--engine hist_gbr]
+"""
+import argparse
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from rl_model import AmICookedRLModel
+
+
+def train_fresh_model(engine: Optional[str] = None) -> Tuple[AmICookedRLModel, Dict]:
+    """Train a new model from scratch (runs in the worker process)"""
+    fresh = AmICookedRLModel(engine)
+    results = fresh.load_and_train_initial_model()
+    return fresh, results
+
+
+class TrainingWorkerError(RuntimeError):
+    """The retraining worker process exited without producing a model"""
+
+
+def validate_trained_model(candidate: AmICookedRLModel, min_test_r2: float = 0.0):
+    """Raise ValueError if a freshly trained model is not fit to replace the live one"""
+    if not candidate.is_trained:
+        raise ValueError("Candidate model is not trained")
+
+    if candidate.current_score is None or not np.isfinite(candidate.current_score):
+        raise ValueError(f"Candidate model has no valid test R² ({candidate.current_score})")
+    if candidate.current_score < min_test_r2:
+        raise ValueError(
+            f"Candidate test R² {candidate.current_score:.4f} is below the minimum {min_test_r2:.4f}"
+        )
+
+    # Smoke test the full inference path on a few training students
+    sample = candidate.training_data[candidate.feature_names].head(25).to_dict("records")
+    scores = candidate.predict_scores(sample, use_rl_adjustment=False)
+    if not all(1 <= score <= 10 for score in scores):
+        raise ValueError(f"Candidate model produced out-of-range scores: {scores}")
+
+
+@dataclass
+class TrainingJob:
+    """A background retraining run"""
+    job_id: str
+    future: Future = field(repr=False)
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+    results: Optional[Dict] = None
+    error: Optional[str] = None
+    swapped: bool = False
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is not None:
+            return "failed" if self.error is not None else "succeeded"
+        if self.future.running() or self.future.done():
+            return "running"
+        return "queued"
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "finished_at": self.finished_at,
+            "results": self.results,
+            "error": self.error,
+            "swapped": self.swapped,
+        }
+
+
+class TrainingJobManager:
+    """
+    Runs retraining in a separate worker process so request threads never
+    block on (or observe) a half-trained model.
+
+    When a job finishes, the candidate model is validated and handed to
+    `on_trained`, which is responsible for swapping it in. Only one job runs at
+    a time; submitting while one is active returns the active job.
+    """
+
+    def __init__(self, on_trained: Callable[[AmICookedRLModel], None], min_test_r2: float = 0.0,
+                 max_jobs_kept: int = 50):
+        self.on_trained = on_trained
+        self.min_test_r2 = min_test_r2
+        self.max_jobs_kept = max_jobs_kept
+
+        # One thread waits on the worker process; the process keeps it independent
+        # of the server's threads and live model
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._jobs: Dict[str, TrainingJob] = {}
+        self._active: Optional[TrainingJob] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="training-job")
+        return self._executor
+
+    def _train_in_worker(self, engine: Optional[str]) -> Tuple[AmICookedRLModel, Dict]:
+        """Run train_fresh_model in a worker process and load its result"""
+        with tempfile.TemporaryDirectory(prefix="amicooked-train-") as directory:
+            output = os.path.join(directory, "result.pkl")
+            command = [sys.executable, os.path.abspath(__file__), "--output", output]
+            if engine is not None:
+                command += ["--engine", engine]
+            # The worker sees the same import path as this process
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+            self._process = subprocess.Popen(command, env=env, stderr=subprocess.PIPE, text=True)
+            try:
+                _, stderr = self._process.communicate()
+                returncode = self._process.returncode
+            finally:
+                self._process = None
+            if returncode != 0:
+                lines = stderr.strip().splitlines()
+                raise TrainingWorkerError(
+                    f"Training worker exited with code {returncode}: {lines[-1] if lines else 'no output'}"
+                )
+            with open(output, "rb") as f:
+                return pickle.load(f)
+
+    def submit(self, engine: Optional[str] = None) -> TrainingJob:
+        """Start a retraining job (with the named base engine), or return the one already in progress"""
+        with self._lock:
+            if self._active is not None and self._active.finished_at is None:
+                return self._active
+
+            future = self._get_executor().submit(self._train_in_worker, engine)
+            job = TrainingJob(job_id=uuid.uuid4().hex, future=future)
+            self._jobs[job.job_id] = job
+            self._active = job
+
+            # Forget the oldest finished jobs
+            finished = [j for j in self._jobs.values() if j.finished_at is not None]
+            for old in finished[:max(0, len(self._jobs) - self.max_jobs_kept)]:
+                del self._jobs[old.job_id]
+
+        future.add_done_callback(lambda f: self._finish(job, f))
+        return job
+
+    def _finish(self, job: TrainingJob, future: Future):
+        """Validate the trained candidate and hand it over for the swap"""
+        try:
+            candidate, results = future.result()
+            validate_trained_model(candidate, self.min_test_r2)
+            job.results = results
+            self.on_trained(candidate)
+            job.swapped = True
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+        finally:
+            job.finished_at = datetime.now().isoformat()
+
+    def get(self, job_id: str) -> Optional[TrainingJob]:
+        return self._jobs.get(job_id)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        process = self._process
+        if process is not None:
+            process.kill()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Train a fresh model (the retraining worker)")
+    parser.add_argument("--engine", default=None, help="Base engine (default: the model's default)")
+    parser.add_argument("--output", required=True, help="Where to pickle the (model, results) pair")
+    args = parser.parse_args(argv)
+
+    result = train_fresh_model(args.engine)
+    with open(args.output, "wb") as f:
+        pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
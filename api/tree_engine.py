@@ -0,0 +1,163 @@
+import json
+import numpy as np
+from pathlib import Path
+from typing import Optional
+
+from sklearn.ensemble import GradientBoostingRegressor
+
+
+class FlatTreeEnsemble:
+    """
+    Tree ensemble flattened into contiguous arrays for low-latency inference.
+
+    Every node of every tree lives in one set of arrays (feature, threshold,
+    left, right, value). Leaves point to themselves, so all trees are walked
+    together with `max_depth` vectorized steps instead of one sklearn call with
+    input validation per prediction. Leaf values are pre-multiplied by the
+    learning rate and `offset` holds the ensemble's initial prediction.
+    `cover` holds each node's (weighted) training sample count, used for
+    feature attributions (see tree_shap).
+
+    Inputs are compared in float32, exactly like sklearn's tree traversal.
+    """
+
+    # Arrays written by save() and read back (optionally memory-mapped) by load()
+    ARRAYS = ("feature", "threshold", "left", "right", "value", "roots", "children", "cover")
+
+    # Arrays that engines saved by older versions may lack
+    OPTIONAL_ARRAYS = ("cover",)
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 right: np.ndarray, value: np.ndarray, roots: np.ndarray, max_depth: int,
+                 offset: float, n_features: int, children: Optional[np.ndarray] = None,
+                 cover: Optional[np.ndarray] = None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.offset = offset
+        self.n_features = n_features
+        self.cover = cover
+
+        # Interleaved (left, right) children: the next node is children[2 * node + goes_right]
+        if children is None:
+            children = np.stack([left, right], axis=1).ravel().astype(np.int32)
+        self.children = children
+
+    @classmethod
+    def from_gradient_boosting(cls, model: GradientBoostingRegressor):
+        """Export a fitted GradientBoostingRegressor"""
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+
+        n_nodes = np.array([tree.node_count for tree in trees])
+        starts = np.concatenate([[0], np.cumsum(n_nodes)[:-1]])
+        total = int(n_nodes.sum())
+
+        feature = np.zeros(total, dtype=np.int32)
+        threshold = np.full(total, np.inf)
+        left = np.empty(total, dtype=np.int32)
+        right = np.empty(total, dtype=np.int32)
+        value = np.empty(total)
+        cover = np.empty(total)
+
+        for tree, start in zip(trees, starts):
+            nodes = slice(start, start + tree.node_count)
+            own_index = np.arange(start, start + tree.node_count)
+            is_leaf = tree.children_left == -1
+
+            feature[nodes] = np.where(is_leaf, 0, tree.feature)
+            threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold)
+            left[nodes] = np.where(is_leaf, own_index, tree.children_left + start)
+            right[nodes] = np.where(is_leaf, own_index, tree.children_right + start)
+            value[nodes] = tree.value[:, 0, 0] * model.learning_rate
+            cover[nodes] = tree.weighted_n_node_samples
+
+        if model.init_ == "zero":
+            offset = 0.0
+        else:
+            offset = float(np.ravel(model.init_.predict(np.zeros((1, model.n_features_in_))))[0])
+
+        return cls(
+            feature=feature,
+            threshold=threshold,
+            left=left,
+            right=right,
+            value=value,
+            roots=starts.astype(np.int32),
+            max_depth=max(tree.max_depth for tree in trees),
+            offset=offset,
+            n_features=model.n_features_in_,
+            cover=cover,
+        )
+
+    @classmethod
+    def try_from_model(cls, model) -> Optional["FlatTreeEnsemble"]:
+        """Export a fitted model if it is a supported tree ensemble, else None"""
+        if isinstance(model, GradientBoostingRegressor) and hasattr(model, "estimators_"):
+            return cls.from_gradient_boosting(model)
+        return None
+
+    def save(self, directory):
+        """Write the arrays as .npy files plus a JSON header"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in self.ARRAYS:
+            if getattr(self, name) is not None:
+                np.save(directory / f"{name}.npy", getattr(self, name))
+        with open(directory / "meta.json", "w") as f:
+            json.dump({
+                "max_depth": int(self.max_depth),
+                "offset": float(self.offset),
+                "n_features": int(self.n_features),
+            }, f)
+
+    @classmethod
+    def load(cls, directory, mmap_mode: Optional[str] = "r") -> "FlatTreeEnsemble":
+        """
+        Read an ensemble written by save()
+
+        With mmap_mode="r" the arrays are mapped read-only, so processes loading
+        the same directory share one copy of them in the page cache.
+        """
+        directory = Path(directory)
+        with open(directory / "meta.json") as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.asarray(np.load(directory / f"{name}.npy", mmap_mode=mmap_mode))
+            for name in cls.ARRAYS
+            if name not in cls.OPTIONAL_ARRAYS or (directory / f"{name}.npy").exists()
+        }
+        return cls(**arrays, **meta)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """Leaf node reached in every tree, shape (n_samples, n_trees)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat_X = X.ravel()
+        row_offsets = (np.arange(len(X), dtype=np.int32) * X.shape[1])[:, None]
+        nodes = np.tile(self.roots, (len(X), 1))
+        for _ in range(self.max_depth):
+            goes_right = ~(flat_X[row_offsets + self.feature[nodes]] <= self.threshold[nodes])
+            nodes = self.children[2 * nodes + goes_right]
+        return nodes
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Predict a batch, shape (n_samples, n_features) -> (n_samples,)"""
+        X = np.asarray(X)
+        if X.shape[0] == 1:
+            return np.array([self.predict_one(X[0])])
+        return self.value[self.leaves(X)].sum(axis=1) + self.offset
+
+    def predict_one(self, x: np.ndarray) -> float:
+        """Predict a single row, shape (n_features,)"""
+        x = np.asarray(x, dtype=np.float32)
+        nodes = self.roots
+        for _ in range(self.max_depth):
+            nodes = self.children[2 * nodes + ~(x[self.feature[nodes]] <= self.threshold[nodes])]
+        return float(self.value[nodes].sum() + self.offset)
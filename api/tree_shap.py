@@ -0,0 +1,182 @@
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from tree_engine import FlatTreeEnsemble
+
+# Deepest supported trees (each leaf's table has one row per pattern of failed path splits)
+MAX_PATH_DEPTH = 8
+
+# Rows attributed per vectorized step, bounding the (rows, depth, leaves) temporaries
+EXPLAIN_CHUNK_SIZE = 32
+
+
+class TreeShapExplainer:
+    """
+    Exact per-feature contributions (path-dependent TreeSHAP values) for a
+    FlatTreeEnsemble.
+
+    The prediction is split into the ensemble's expected value plus one
+    contribution per feature, with the same value function as TreeSHAP:
+    features outside a coalition follow both children of a split, weighted by
+    training cover. Each leaf's share only depends on which of the distinct
+    features on its path the row satisfies, so for every leaf the
+    contributions for all such patterns are computed once up front (the
+    "v2" variant of Fast TreeSHAP). Explaining a row then checks the path
+    conditions of every leaf, packs the failed ones into a bit pattern and
+    gathers one table row per leaf, all as array operations; the cost is
+    linear in the number of leaves times the depth.
+    """
+
+    def __init__(self, ensemble: FlatTreeEnsemble):
+        if ensemble.cover is None:
+            raise ValueError("The tree ensemble has no node cover; rebuild it from the base model")
+        self.n_features = ensemble.n_features
+
+        paths = self._leaf_paths(ensemble)
+        depth = max(1, max(len(path) for _, path in paths))
+        if depth > MAX_PATH_DEPTH:
+            raise ValueError(f"Trees are {depth} levels deep (at most {MAX_PATH_DEPTH} supported)")
+        slots = [self._slots(path) for _, path in paths]
+        width = max(1, max(len(features) for features, _ in slots))
+
+        n_leaves = len(paths)
+        # Path conditions per step, padded with ones that always hold (x <= inf, going left)
+        self.path_feature = np.zeros((depth, n_leaves), dtype=np.intp)
+        self.path_threshold = np.full((depth, n_leaves), np.inf)
+        self.path_left = np.ones((depth, n_leaves), dtype=bool)
+        path_bit = np.zeros((n_leaves, depth), dtype=np.int64)
+        full_mask = np.zeros(n_leaves, dtype=np.int64)
+        leaf_feature = np.full((n_leaves, width), self.n_features, dtype=np.intp)
+        slot_table = np.zeros((n_leaves, 1 << width, width))
+
+        expected = ensemble.offset
+        by_width = {}
+        for leaf, ((node, path), (features, zero_fractions)) in enumerate(zip(paths, slots)):
+            slot_of = {feature: slot for slot, feature in enumerate(features)}
+            for step, (feature, threshold, goes_left, _) in enumerate(path):
+                self.path_feature[step, leaf] = feature
+                self.path_threshold[step, leaf] = threshold
+                self.path_left[step, leaf] = goes_left
+                path_bit[leaf, step] = 1 << slot_of[feature]
+            full_mask[leaf] = (1 << len(features)) - 1
+            leaf_feature[leaf, :len(features)] = features
+
+            value = float(ensemble.value[node])
+            expected += value * float(np.prod([ratio for *_, ratio in path]))
+            by_width.setdefault(len(features), []).append((leaf, value, zero_fractions))
+        self.expected_value = expected
+
+        for d, leaves in by_width.items():
+            indices = np.array([leaf for leaf, _, _ in leaves])
+            values = np.array([value for _, value, _ in leaves])
+            zero_fractions = np.array([z for _, _, z in leaves]).reshape(len(leaves), d)
+            slot_table[indices, :1 << d, :d] = self._leaf_tables(values, zero_fractions)
+
+        # Re-index every leaf's table by the pattern of failed path steps, which
+        # explaining a row can compute without a per-feature reduction
+        leaf_index = np.arange(n_leaves)
+        self.table = np.empty((n_leaves << depth, width))
+        for failed_steps in range(1 << depth):
+            failed = np.zeros(n_leaves, dtype=np.int64)
+            for step in range(depth):
+                if failed_steps >> step & 1:
+                    failed |= path_bit[:, step]
+            self.table[(leaf_index << depth) + failed_steps] = slot_table[leaf_index, full_mask & ~failed]
+        self.depth = depth
+        self.width = width
+        self.leaf_base = leaf_index << depth
+        self.leaf_feature = leaf_feature
+
+    @staticmethod
+    def _leaf_paths(ensemble: FlatTreeEnsemble) -> List[Tuple[int, List[Tuple[int, float, bool, float]]]]:
+        """(leaf node, [(feature, threshold, goes_left, cover ratio), ...]) for every leaf, root first"""
+        paths = []
+        for root in ensemble.roots.tolist():
+            stack = [(int(root), [])]
+            while stack:
+                node, path = stack.pop()
+                left, right = int(ensemble.left[node]), int(ensemble.right[node])
+                if left == node:
+                    paths.append((node, path))
+                    continue
+                feature = int(ensemble.feature[node])
+                threshold = float(ensemble.threshold[node])
+                cover = float(ensemble.cover[node])
+                stack.append((right, path + [(feature, threshold, False, float(ensemble.cover[right]) / cover)]))
+                stack.append((left, path + [(feature, threshold, True, float(ensemble.cover[left]) / cover)]))
+        return paths
+
+    @staticmethod
+    def _slots(path) -> Tuple[List[int], List[float]]:
+        """Distinct features on a path and, per feature, the product of its cover ratios"""
+        features: List[int] = []
+        zero_fractions: List[float] = []
+        for feature, _, _, ratio in path:
+            if feature in features:
+                zero_fractions[features.index(feature)] *= ratio
+            else:
+                features.append(feature)
+                zero_fractions.append(ratio)
+        return features, zero_fractions
+
+    @staticmethod
+    def _leaf_tables(values: np.ndarray, zero_fractions: np.ndarray) -> np.ndarray:
+        """
+        Contributions of leaves with d distinct path features, for every pattern
+        of satisfied features: shape (leaves, 2^d, d)
+
+        For satisfied set M, feature i gets
+            v * (1[i in M] - z_i) * sum over S ⊆ M \\ {i} of w(|S|) * prod(z_j, j not in S, j != i)
+        with w(s) = s! (d - s - 1)! / d!.
+        """
+        n_leaves, d = zero_fractions.shape
+        table = np.zeros((n_leaves, 1 << d, d))
+        if d == 0:
+            return table
+        weights = [math.factorial(s) * math.factorial(d - s - 1) / math.factorial(d) for s in range(d)]
+
+        for i in range(d):
+            bit = 1 << i
+            # terms[S]: the summand for coalition S (a mask without bit i)
+            terms = {}
+            for subset in range(1 << d):
+                if subset & bit:
+                    continue
+                others = [j for j in range(d) if j != i and not subset >> j & 1]
+                product = np.prod(zero_fractions[:, others], axis=1) if others else np.ones(n_leaves)
+                terms[subset] = weights[bin(subset).count("1")] * product
+
+            for mask in range(1 << d):
+                allowed = mask & ~bit
+                total = np.zeros(n_leaves)
+                subset = allowed
+                while True:
+                    total += terms[subset]
+                    if subset == 0:
+                        break
+                    subset = (subset - 1) & allowed
+                satisfied = 1.0 if mask & bit else 0.0
+                table[:, mask, i] = values * (satisfied - zero_fractions[:, i]) * total
+        return table
+
+    def shap_values(self, X: np.ndarray) -> np.ndarray:
+        """Contributions per feature, shape (n_samples, n_features); each row sums to prediction - expected_value"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty((len(X), self.n_features))
+        for start in range(0, len(X), EXPLAIN_CHUNK_SIZE):
+            chunk = X[start:start + EXPLAIN_CHUNK_SIZE]
+            # Compared like FlatTreeEnsemble.leaves: float32 inputs against the split thresholds
+            failed = (chunk[:, self.path_feature] <= self.path_threshold) != self.path_left
+            failed_steps = failed[:, 0].view(np.uint8).copy()
+            for step in range(1, self.depth):
+                failed_steps |= failed[:, step].view(np.uint8) << step
+            contributions = np.take(self.table, self.leaf_base + failed_steps, axis=0)
+
+            # Sum each leaf's per-slot contributions into feature columns (the last one is padding)
+            columns = self.n_features + 1
+            bins = (np.arange(len(chunk))[:, None, None] * columns + self.leaf_feature).ravel()
+            sums = np.bincount(bins, weights=contributions.ravel(), minlength=len(chunk) * columns)
+            out[start:start + len(chunk)] = sums.reshape(len(chunk), columns)[:, :-1]
+        return out